@@ -11,8 +11,12 @@ class DBFConfig:
     encryption_password: str = None
     source_directory: str = None
     limit_rows: int = None  # Optional, set to None for no limit
+    backend: str = None  # 'ads' (Advantage provider) or 'native' (pure Python reader)
+    read_workers: int = None  # Tables read concurrently, 1 reads them one after another
+    staging_directory: str = None  # Scratch directory the tables are copied to before reading, None to read them in place
     
-    def __init__(self, dll_path=None, encryption_password=None, source_directory=None, limit_rows=None):
+    def __init__(self, dll_path=None, encryption_password=None, source_directory=None, limit_rows=None, backend=None,
+                 read_workers=None, staging_directory=None):
         # Load from .env if values not provided
         limit_rows=None
         load_dotenv()
@@ -22,11 +26,14 @@ class DBFConfig:
         self.encryption_password = encryption_password or env.get('DBF_ENCRYPTION_PASSWORD')
         self.source_directory = source_directory or env.get('DBF_SOURCE_DIR')
         self.limit_rows = limit_rows
+        self.backend = (backend or env.get('DBF_BACKEND', 'ads')).lower()
+        self.read_workers = max(1, int(read_workers or env.get('DBF_READ_WORKERS', '4')))
+        self.staging_directory = staging_directory or env.get('DBF_STAGING_DIR') or None
         
         # Validate required fields
-        if not self.dll_path:
+        if self.backend == 'ads' and not self.dll_path:
             raise ValueError("dll_path is required. Set it directly or via DBF_DLL_PATH in .env")
-        if not self.encryption_password:
+        if self.backend == 'ads' and not self.encryption_password:
             raise ValueError("encryption_password is required. Set it directly or via DBF_ENCRYPTION_PASSWORD in .env")
         if not self.source_directory:
             raise ValueError("source_directory is required. Set it directly or via DBF_SOURCE_DIR in .env")
@@ -3,6 +3,42 @@ from datetime import datetime, date
 from typing import Dict, List, Optional, Any
 from src.config.db_config import PostgresConnection
 from src.db.postgres_tracking import PostgresTracking
+from src.utils.record_hash import LEGACY_VERSION, dataset_hash, matches_stored
+
+# Formats of the DBF 'fecha' strings (es-MX, day first), tried in order
+DATE_FORMATS = [
+    '%d/%m/%Y %I:%M:%S %p',  # DD/MM/YYYY with AM/PM
+    '%d/%m/%Y %I:%M:%S %a. m.',  # DD/MM/YYYY with Spanish AM
+    '%d/%m/%Y %I:%M:%S %p. m.',  # DD/MM/YYYY with Spanish PM
+    '%d/%m/%Y %H:%M:%S',  # DD/MM/YYYY with 24-hour time
+    '%d/%m/%Y'  # DD/MM/YYYY date only
+]
+
+
+def parse_dbf_date(fecha: Any) -> Optional[datetime]:
+    """
+    Parse the 'fecha' of a DBF record with DATE_FORMATS.
+
+    Args:
+        fecha: Date string as the reader formats it, or a date/datetime
+
+    Returns:
+        The datetime, or None if it matches none of the formats
+    """
+    if isinstance(fecha, datetime):
+        return fecha
+    if isinstance(fecha, date):
+        return datetime(fecha.year, fecha.month, fecha.day)
+    if not fecha:
+        return None
+    # Replace Spanish AM/PM format to standard format if needed
+    temp_fecha = str(fecha).strip().replace('a. m.', 'AM').replace('p. m.', 'PM')
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(temp_fecha, fmt)
+        except ValueError:
+            continue
+    return None
 
 
 class DBFSQLComparator:
@@ -111,27 +147,11 @@ class DBFSQLComparator:
         try:
             # Handle Spanish format with periods in AM/PM (a. m. / p. m.)
             fecha = first_record['fecha']
-            # Try different date formats - DBF uses MM/DD/YYYY format
-            date_formats = [
-                '%d/%m/%Y %I:%M:%S %p',  # MM/DD/YYYY with AM/PM
-                '%d/%m/%Y %I:%M:%S %a. m.',  # MM/DD/YYYY with Spanish AM
-                '%d/%m/%Y %I:%M:%S %p. m.',  # MM/DD/YYYY with Spanish PM
-                '%d/%m/%Y %H:%M:%S',  # MM/DD/YYYY with 24-hour time
-                '%d/%m/%Y'  # MM/DD/YYYY date only
-            ]
-            
-            record_date = None
-            for fmt in date_formats:
-                try:
-                    # Replace Spanish AM/PM format to standard format if needed
-                    temp_fecha = fecha.replace('a. m.', 'AM').replace('p. m.', 'PM')
-                    record_date = datetime.strptime(temp_fecha, fmt)
-                    print(f"Successfully parsed date {fecha} using format {fmt}")
-                    break
-                except ValueError:
-                    continue
-                   
-            if record_date is None:
+            # Try the DBF date formats (DD/MM/YYYY)
+            record_date = parse_dbf_date(fecha)
+            if record_date is not None:
+                print(f"Successfully parsed date {fecha}")
+            else:
                 raise ValueError(f"Could not parse date: {fecha} with any known format")
                 
             start_date = record_date.date()
@@ -218,7 +238,7 @@ class DBFSQLComparator:
                 
                 # Compare hashes - if different, it needs to be updated
                 print(f'////////-----------DBF { dbf_record.get('md5_hash')}  vs  SQL {sql_record.get('hash')}')
-                if dbf_record.get('md5_hash') != sql_record.get('hash'):
+                if not matches_stored(dbf_record, sql_record.get('hash')):
                     # Store mismatched records for update
                     mismatched.append({
                         "folio": folio,
@@ -235,7 +255,9 @@ class DBFSQLComparator:
                         "id": int(sql_records_by_folio[folio].get('id', 0)),
                         "dbf_record": dbf_record,
                         "sql_record": sql_record,
-                        "hash": dbf_record.get('md5_hash')  # Both hashes are the same
+                        "hash": dbf_record.get('md5_hash'),  # Both hashes are the same
+                        # Matched through the previous hash version, the stored hash needs upgrading
+                        "rehash": dbf_record.get('md5_hash') != sql_record.get('hash')
                     })
             else:
                 # Store complete DBF-only records for creation
@@ -288,11 +310,7 @@ class DBFSQLComparator:
         Returns:
             MD5 hash as string
         """
-        import hashlib
-        import json
-        
-        # Generate hash for the entire dataset
-        dataset_str = json.dumps(dbf_records['data'], sort_keys=True)
-        dataset_hash = hashlib.md5(dataset_str.encode('utf-8')).hexdigest()
-        
-        return dataset_hash
+        # Same hash as the one stored for the batch (see MatchesProcess.get_dbf_data)
+        if dbf_records.get('dataset_hash'):
+            return dbf_records['dataset_hash']
+        return dataset_hash(dbf_records['data'], dbf_records.get('hash_version', LEGACY_VERSION))
@@ -2,6 +2,7 @@ import os
 import sys
 import logging
 import time
+import copy
 from turtle import st
 from pathlib import Path
 from src.config.db_config import PostgresConnection
@@ -10,14 +11,22 @@ import hashlib
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from src.controllers.ventas_controller import VentasController
 from src.dbf_enc_reader.mapping_manager import MappingManager
 from src.config.dbf_config import DBFConfig
 from src.models.ventas_model import VentasModel
-from src.controllers.dbf_sql_comparator import DBFSQLComparator
+from src.controllers.dbf_sql_comparator import DBFSQLComparator, parse_dbf_date
 from src.controllers.insertion_process import InsertionProcess
 from src.db.retries_tracking import RetriesTracking
+from src.dbf_enc_reader.change_capture import ChangeCapture, ChangeStateStore
+from src.dbf_enc_reader.staging import StagingArea
+from src.utils.get_enc import EncEnv
+from src.utils.record_hash import LEGACY_VERSION, HASH_VERSIONS, dataset_hash, day_root, hash_records
+
+# Header fields kept on every mapped header (see db_map_implementations)
+HEADER_FIELDS = ('Cabecera', 'Folio', 'cliente', 'empleado', 'fecha', 'total_bruto', 'hor', 'fpg', 'og_folio', 'md5_hash')
+
 
 class MatchesProcess:
 
@@ -30,6 +39,87 @@ class MatchesProcess:
         self.insertion_processor = InsertionProcess(self.db_config)
 
         self.retry_tracker = RetriesTracking(self.db_config)
+        self.change_capture = None
+
+    def _get_controller(self, config):
+        # Initialize mapping manager
+        mapping_file = Path(project_root) / "mappings_dv.json"
+        mapping_manager = MappingManager(str(mapping_file))
+        return VentasController(mapping_manager, config)
+
+    def stage_tables(self, config):
+        """Copy the tables of the sync to the staging directory (DBF_STAGING_DIR).
+
+        The scan then reads a consistent copy instead of the files the POS
+        is writing to.
+
+        Returns:
+            Config reading from the staging directory, or the same config
+            when staging is disabled
+        """
+        if not config.staging_directory:
+            return config
+
+        controller = self._get_controller(config)
+        tables = [controller.venta_dbf, controller.partvta_dbf] + controller.receipt_dbfs
+        staging_start = time.time()
+        staging = StagingArea(config.source_directory, config.staging_directory)
+        staged_config = copy.copy(config)
+        staged_config.source_directory = staging.stage(tables)
+        print(f"Time to stage DBF tables: {time.time() - staging_start:.2f} seconds")
+        return staged_config
+
+    def get_incremental_scope(self, config, start_date, end_date):
+        """Get the folios to sync when running incrementally (DBF_INCREMENTAL=True).
+
+        Compares the high-water marks of VENTA, PARTVTA, FLUJORES and FLUJO01
+        with the ones saved by the last successful sync (DBF_STATE_FILE) and
+        resolves the appended/modified records to their folios. Needs the
+        native backend, which can decode single records.
+
+        Returns:
+            Set of folios to sync, or None for a full scan
+        """
+        self.change_capture = None
+        env = EncEnv()
+        if env.get('DBF_INCREMENTAL', 'False').lower() != 'true':
+            return None
+        if config.backend != 'native':
+            print("Incremental sync needs DBF_BACKEND=native, running a full scan")
+            return None
+
+        controller = self._get_controller(config)
+        tables = [controller.venta_dbf, controller.partvta_dbf] + controller.receipt_dbfs
+        state_file = env.get('DBF_STATE_FILE') or str(Path(project_root) / "dbf_sync_state.json")
+        try:
+            self.change_capture = ChangeCapture(config.source_directory, tables, ChangeStateStore(state_file))
+            changes = self.change_capture.detect(start_date, end_date)
+            if changes is None:
+                return None
+            folios = controller.get_changed_folios(changes['tables'], start_date, end_date)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Change capture failed, running a full scan: {str(e)}")
+            return None
+
+        folios.update(changes['pending_folios'])
+        print(f"Incremental sync: {len(folios)} folios changed since the last sync")
+        return folios
+
+    def commit_incremental_state(self, comparison_result):
+        """Save the marks of this run once its operations were executed.
+
+        Folios that still had operations are kept as pending and checked
+        again on the next incremental run.
+        """
+        if self.change_capture is None:
+            return
+        pending = [
+            str(op['folio'])
+            for name in ('create', 'update', 'delete')
+            for op in comparison_result.get('api_operations', {}).get(name, [])
+        ]
+        self.change_capture.commit(pending)
+        self.change_capture = None
 
     def compare_data(self, config, start_date, end_date):
         
@@ -45,8 +135,40 @@ class MatchesProcess:
         print(f"Looking for records with date exactly matching: {start_date} - {end_date}")
         
         
+        # Read a snapshot of the tables instead of the live files
+        config = self.stage_tables(config)
+
+        # Folios changed since the last sync, None when everything is compared
+        scope = self.get_incremental_scope(config, start_date, end_date)
+        if scope is not None and not scope:
+            print("No DBF changes since the last sync")
+            return self.comparator.add_all(dbf_records={'data': []})
+
+        return self.compare_range(config, start_date, end_date, scope)
+
+    def compare_range(self, config, start_date, end_date, scope=None, receipt_range=None, receipt_index=None):
+        """Compare the DBF and SQL records of a date range.
+
+        Args:
+            config: DBF configuration, already staged
+            start_date: Start of the range
+            end_date: End of the range
+            scope: Optional folios to compare (see get_incremental_scope)
+            receipt_range: Optional (start, end) to look for receipts in when
+                the range is a chunk of a larger sync window
+            receipt_index: Optional receipts of that window (see
+                get_receipt_index), read once for all its chunks or shards
+
+        Returns:
+            The comparison result with the API operations
+        """
         #fetch dbf data
-        dbf_results = self.get_dbf_data(config, start_date, end_date)
+        dbf_results = self.get_dbf_data(config, start_date, end_date, scope, receipt_range, receipt_index)
+
+        # Leave out the days whose root matches the stored one, before mapping them
+        day_roots = None
+        if scope is None and self.use_day_roots():
+            day_roots = self.skip_unchanged_days(dbf_results, start_date, end_date)
 
         # print(dbf_results)
 
@@ -60,7 +182,14 @@ class MatchesProcess:
         print(f"\n=== db_map_implementations completed in {db_map_time:.2f} seconds ===")
         
         # Obtener registros SQL
-        sql_records = self.get_sql_data(start_date, end_date)
+        if day_roots is not None:
+            # Only the rows of the days left to compare
+            sql_records = self.get_sql_data_for_days(sorted(day_roots))
+        else:
+            sql_records = self.get_sql_data(start_date, end_date)
+        if scope is not None:
+            # Only the changed folios were read from the DBF
+            sql_records = [r for r in sql_records if str(r.get('folio')) in scope]
         
         if not sql_records:
             print(f"No hay registros en SQL entre {start_date} y {end_date}. Insertando nuevos registros")
@@ -69,10 +198,14 @@ class MatchesProcess:
         else:
             # When SQL records exist, compare them with DBF records
             comparison_result = self.comparator.compare_records_by_hash(dbf_records=dbf_results, sql_records=sql_records, start_date=start_date, end_date=end_date)
+            self.upgrade_legacy_hashes(comparison_result)
         
         # Print summary of operations
         self.print_comparison_results(comparison_result)
 
+        if day_roots is not None:
+            self.save_day_roots(day_roots, comparison_result)
+
         self.dischard_by_retries(comparison_result, start_date, end_date)
 
         # print('STOP')
@@ -98,34 +231,76 @@ class MatchesProcess:
 
         
         
-    def get_dbf_data(self, config, start_date, end_date):
-        """Obtiene datos DBF y agrega hashes MD5"""
-        import hashlib
-        import json
-        
-        # Initialize mapping manager
-        mapping_file = Path(project_root) / "mappings_dv.json"
-        mapping_manager = MappingManager(str(mapping_file))
-        controller = VentasController(mapping_manager, config)
+    def get_dbf_data(self, config, start_date, end_date, folios=None, receipt_range=None, receipt_index=None):
+        """Obtiene datos DBF y agrega el hash de cada registro (ver HASH_VERSION)"""
+        controller = self._get_controller(config)
         
         # Obtener datos originaales
-        data = controller.get_sales_in_range(start_date, end_date)
+        data = controller.get_sales_in_range(start_date, end_date, folios, receipt_range, receipt_index)
         
-        # Agregar hash MD5 a cada registro
-        for i, record in enumerate(data):
-            record_str = json.dumps(record, sort_keys=True)
-            record['md5_hash'] = hashlib.md5(record_str.encode('utf-8')).hexdigest()
-        
-        # Generar hash para todo el dataset
-        dataset_str = json.dumps(data, sort_keys=True)
-        dataset_hash = hashlib.md5(dataset_str.encode('utf-8')).hexdigest()
+        # Agregar hash a cada registro, antes de que db_map_implementations los modifique
+        version, keep_legacy = self.get_hash_settings()
+        hash_records(data, version, keep_legacy)
         
+        # Hash de todo el dataset
         return {
             'data': data,
-            'dataset_hash': dataset_hash,
+            'dataset_hash': dataset_hash(data, version),
+            'hash_version': version,
             'record_count': len(data)
         }
 
+    def get_receipt_index(self, config, start_date, end_date):
+        """Read the receipts of a sync window once, for its chunks or shards.
+
+        See VentasController.get_receipt_index.
+        """
+        return self._get_controller(config).get_receipt_index(start_date, end_date)
+
+    def get_hash_settings(self):
+        """Get the record hash version and whether the previous version is kept.
+
+        HASH_VERSION=1 keeps the original MD5 hashes. With HASH_VERSION=2 the
+        records still match the version 1 hashes stored before the switch
+        while HASH_LEGACY_MATCH is on, and those stored hashes are upgraded as
+        the folios are matched (see upgrade_legacy_hashes).
+
+        Returns:
+            Tuple of (version, keep_legacy)
+        """
+        env = EncEnv()
+        version = int(env.get('HASH_VERSION', str(LEGACY_VERSION)) or LEGACY_VERSION)
+        if version not in HASH_VERSIONS:
+            raise ValueError(f"Unknown HASH_VERSION {version}. Use one of {HASH_VERSIONS}")
+        keep_legacy = env.get('HASH_LEGACY_MATCH', 'True').lower() == 'true'
+        return version, keep_legacy
+
+    def upgrade_legacy_hashes(self, comparison_result):
+        """Store the current hash of the folios matched through the previous version.
+
+        Args:
+            comparison_result: Result of compare_records_by_hash
+
+        Returns:
+            Number of folios upgraded
+        """
+        from src.db.postgres_tracking import PostgresTracking
+
+        rehash = [
+            op for op in comparison_result.get('api_operations', {}).get('next_check', [])
+            if op.get('rehash')
+        ]
+        if not rehash:
+            return 0
+
+        tracker = PostgresTracking(self.db_config)
+        upgraded = 0
+        for op in rehash:
+            if tracker.update_existing_invoice(op['folio'], op['sql_record'].get('estado'), op['hash']):
+                upgraded += 1
+        print(f"Upgraded the stored hash of {upgraded} of {len(rehash)} folios to HASH_VERSION 2")
+        return upgraded
+
     def get_sql_data(self, start_date, end_date):
         """Obtiene datos SQL para comparación"""
         from src.db.postgres_tracking import PostgresTracking
@@ -137,6 +312,104 @@ class MatchesProcess:
         return tracker.get_records_by_date_range(start_date, end_date)
 
 
+    def get_sql_data_for_days(self, days):
+        """Obtiene datos SQL de unos días para comparación"""
+        from src.db.postgres_tracking import PostgresTracking
+
+        tracker = PostgresTracking(PostgresConnection.get_db_config())
+        return tracker.get_records_by_dates(days)
+
+    def use_day_roots(self):
+        """Whether unchanged days are skipped through their root hash (DAY_ROOTS, on by default)."""
+        return EncEnv().get('DAY_ROOTS', 'True').lower() == 'true'
+
+    @staticmethod
+    def get_record_day(record):
+        """Get the emission date of a DBF record (es-MX DD/MM/YYYY 'fecha').
+
+        Returns:
+            The date, or None if the record has no valid 'fecha'
+        """
+        fecha = parse_dbf_date(record.get('fecha'))
+        return fecha.date() if fecha else None
+
+    def skip_unchanged_days(self, dbf_results, start_date, end_date):
+        """Drop the records of the days whose root matches the stored one.
+
+        Each day of the range gets the root of its folio hashes (see
+        record_hash.day_root). A day whose root equals the one in hash_dia
+        has the same folios with the same hashes as estado_factura_venta,
+        so neither its SQL rows nor its folio-level diff are needed.
+
+        If a record's day can't be told (no valid 'fecha' or outside the
+        range) no root can be trusted, so day roots are off for the run.
+
+        Args:
+            dbf_results: Result of get_dbf_data, its data is filtered in place
+            start_date: Start of the range
+            end_date: End of the range
+
+        Returns:
+            Dictionary of day to (root, folio count) of the days left to
+            compare, or None when day roots are off for the run
+        """
+        from src.db.postgres_tracking import PostgresTracking
+
+        start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+        end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+        folios_by_day = {
+            start_day + timedelta(days=offset): {}
+            for offset in range((end_day - start_day).days + 1)
+        }
+        for record in dbf_results['data']:
+            day = self.get_record_day(record)
+            if day not in folios_by_day:
+                logging.warning(
+                    f"Day roots off for this run, folio {record.get('Folio')} "
+                    f"has no day in the range: {record.get('fecha')!r}"
+                )
+                return None
+            if record.get('Folio'):
+                folios_by_day[day][str(record['Folio'])] = record.get('md5_hash')
+
+        roots = {day: (day_root(folios), len(folios)) for day, folios in folios_by_day.items()}
+        stored = PostgresTracking(self.db_config).get_day_roots(start_day, end_day)
+        unchanged = {day for day, (root, _) in roots.items() if stored.get(day) == root}
+        if unchanged:
+            dbf_results['data'] = [r for r in dbf_results['data'] if self.get_record_day(r) not in unchanged]
+            dbf_results['record_count'] = len(dbf_results['data'])
+            dbf_results['dataset_hash'] = dataset_hash(dbf_results['data'], dbf_results['hash_version'])
+        print(f"Day roots: {len(unchanged)} of {len(roots)} days unchanged, skipped")
+        return {day: root for day, root in roots.items() if day not in unchanged}
+
+    def save_day_roots(self, day_roots, comparison_result):
+        """Store the roots of the compared days that need no operation.
+
+        Days with creates, updates, deletes or stored hashes still on the
+        previous version lose their root, they are compared again next run.
+        """
+        from src.db.postgres_tracking import PostgresTracking
+
+        operations = comparison_result.get('api_operations', {})
+        stale = set()
+        for name in ('create', 'update', 'delete', 'next_check'):
+            for op in operations.get(name, []):
+                if name == 'next_check' and not op.get('rehash'):
+                    continue
+                if 'dbf_record' in op:
+                    stale.add(self.get_record_day(op['dbf_record']))
+                if 'sql_record' in op:
+                    stale.add(op['sql_record'].get('fecha_emision'))
+
+        if None in stale:
+            # An operation whose day can't be told, none of the roots is safe
+            logging.warning("Operation without a valid day, no day root saved")
+            stale = set(day_roots)
+
+        roots = {day: root for day, root in day_roots.items() if day not in stale}
+        stale_days = [day for day in day_roots if day in stale]
+        PostgresTracking(self.db_config).save_day_roots(roots, stale_days)
+
     # The insert_process method has been moved to the InsertionProcess class
 
     # Comparison methods have been moved to DBFSQLComparator class
@@ -231,90 +504,64 @@ class MatchesProcess:
         processed_results = dbf_results.copy()
         
         if dbf_results and 'data' in dbf_results and dbf_results['data']:
-            for i, record in enumerate(dbf_results['data']):
-                # Check if this is a valid invoice record with the expected structure
-                if 'Cabecera' in record and record['Cabecera'] == 'DV':
-                    # Process the header (factura)
-                    header_data = {
-                        'Cabecera': record['Cabecera'],
-                        'Folio': record['Folio'],
-                        'cliente': record.get('cliente'),
-                        'empleado': record.get('empleado'),
-                        'fecha': record.get('fecha'),
-                        'total_bruto': record.get('total_bruto'),
-                        'hor': record.get('hor'),
-                        'fpg': record.get('fpg'),
-                        'og_folio': record.get('og_folio'),
-                        'md5_hash': record.get('md5_hash')
-                    }
-
-                    store = os.environ.get("CLAVE_SUCURSAL", "ROTON")  # Get from environment variable with fallback
-                    plaza = os.environ.get("CLAVE_PLAZA", "XALAP")  # Get from environment variable with fallback
-                    
-                    # Get mapped fields for the header
-                    header_start_time = time.time()
-                    header_mapped = data_mapper.process_record_fac(header_data,store,plaza)
-                    header_end_time = time.time()
-                    header_time = header_end_time - header_start_time
-                    total_header_time += header_time
-                    header_count += 1
-                    
-                    # Add mapped fields to the original record
-                    for key, value in header_mapped.items():
-                        processed_results['data'][i][key] = value
-                    
-                    # Process the detail records if they exist
-                    if 'detalles' in record and isinstance(record['detalles'], list):
-                        for j, detail in enumerate(record['detalles']):
-                            # Add any missing references from the header that might be needed
-                            detail_with_refs = detail.copy()
-                            
-                            # Generate hash from original detail before adding any mapped fields
-                            detail_str = str(sorted(detail.items()))
-                            detail_with_refs['detail_hash'] = hashlib.md5(detail_str.encode()).hexdigest()
-                            
-                            # Add references from header
-                            detail_with_refs['metodo_pago'] = record.get('fpg')  # Copy payment method from header
-                            detail_with_refs['hor'] = record.get('hor')
-                            detail_with_refs['emp'] = record.get('emp')
-                            detail_with_refs['emp_div'] = record.get('emp_div')
-                            detail_with_refs['ser_vta'] = record.get('ser_vta')
-                            detail_with_refs['clt'] = record.get('clt')
-                            
-                            # Get mapped fields for the detail
-                            detail_start_time = time.time()
-                            detail_mapped = data_mapper.process_record_det(detail_with_refs,store, plaza)
-                            detail_end_time = time.time()
-                            detail_time = detail_end_time - detail_start_time
-                            total_detail_time += detail_time
-                            detail_count += 1
-                            
-                            # Add mapped fields to the original detail record
-                            for key, value in detail_mapped.items():
-                                processed_results['data'][i]['detalles'][j][key] = value
-                    
-                    # Process the receipts records if they exist
-                    if 'recibos' in record and isinstance(record['recibos'], list):
-                        for n, receipt in enumerate(record['recibos']):
-                            receipt_with_refs = receipt.copy()
-                            
-                             # Get mapped fields for the receipt
-                            receipt_start_time = time.time()
-                            recepit_mapped = data_mapper.process_record_rec(receipt_with_refs,store, plaza)
-                            receipt_end_time = time.time()
-                            receipt_time = receipt_end_time - receipt_start_time
-                            total_receipt_time += receipt_time
-                            receipt_count += 1
-                            
-                            # Add mapped fields to the original detail record
-                            for key, value in recepit_mapped.items():
-                                processed_results['data'][i]['recibos'][n][key] = value
+            # Mappings shared by every record of the run, resolved once
+            context = data_mapper.get_run_context()
+
+            # Check if this is a valid invoice record with the expected structure
+            headers = [record for record in dbf_results['data'] if record.get('Cabecera') == 'DV']
+            for record in headers:
+                # The header fields the API formatting reads, even when the DBF lacks them
+                for key in HEADER_FIELDS:
+                    record.setdefault(key, None)
+
+            # Map the headers (factura) in place
+            header_start_time = time.time()
+            data_mapper.process_batch_fac(headers, context)
+            total_header_time = time.time() - header_start_time
+            header_count = len(headers)
+
+            details = []
+            receipts = []
+            hash_start_time = time.time()
+            for record in headers:
+                # Process the detail records if they exist
+                if isinstance(record.get('detalles'), list):
+                    for detail in record['detalles']:
+                        # Generate hash from original detail before adding any mapped fields
+                        detail_str = str(sorted(detail.items()))
+                        detail['detail_hash'] = hashlib.md5(detail_str.encode()).hexdigest()
+
+                        # Add references from header
+                        detail['metodo_pago'] = record.get('fpg')  # Copy payment method from header
+                        detail['hor'] = record.get('hor')
+                        detail['emp'] = record.get('emp')
+                        detail['emp_div'] = record.get('emp_div')
+                        detail['ser_vta'] = record.get('ser_vta')
+                        detail['clt'] = record.get('clt')
+                        details.append(detail)
+
+                # Process the receipts records if they exist
+                if isinstance(record.get('recibos'), list):
+                    receipts.extend(record['recibos'])
+            total_hash_time = time.time() - hash_start_time
+
+            # Map the details and receipts in place, each distinct key resolved once
+            detail_start_time = time.time()
+            data_mapper.process_batch_det(details, context)
+            total_detail_time = time.time() - detail_start_time
+            detail_count = len(details)
+
+            receipt_start_time = time.time()
+            data_mapper.process_batch_rec(receipts, context)
+            total_receipt_time = time.time() - receipt_start_time
+            receipt_count = len(receipts)
         
         # Print timing summary
         print(f"\n=== Timing Summary ===")
         print(f"Header processing: {total_header_time:.4f} seconds for {header_count} headers (avg: {total_header_time/header_count if header_count else 0:.4f} sec/header)")
         print(f"Detail processing: {total_detail_time:.4f} seconds for {detail_count} details (avg: {total_detail_time/detail_count if detail_count else 0:.4f} sec/detail)")
         print(f"Receipt processing: {total_receipt_time:.4f} seconds for {receipt_count} receipts (avg: {total_receipt_time/receipt_count if receipt_count else 0:.4f} sec/receipt)")
+        print(f"Detail hashing: {total_hash_time:.4f} seconds")
         print(f"Total mapping time: {total_header_time + total_detail_time + total_receipt_time:.4f} seconds")
         
         return processed_results
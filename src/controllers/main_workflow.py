@@ -5,15 +5,119 @@ from .api_response_tracking import APIResponseTracking
 from .send_request import SendRequest
 from .details_controller import DetailsController
 from .op import OP
-from datetime import date
+from src.utils.get_enc import EncEnv
+from src.utils.memory import MemoryGuard
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import os
 import sys
 import logging
 
+OPERATION_NAMES = ('create', 'update', 'delete')
+SUMMARY_COUNTS = ('create_count', 'update_count', 'delete_count', 'total_actions_needed')
+
+
+def new_totals():
+    """Running totals of a window synced in parts (chunks or shards)."""
+    return {
+        "api_operations": {name: [] for name in OPERATION_NAMES},
+        "summary": {name: 0 for name in SUMMARY_COUNTS},
+    }
+
+
+def add_to_totals(totals, result):
+    """Add the result of a part of the window to the totals.
+
+    Only the folios of the operations are kept, the records go with the part.
+    """
+    for name in OPERATION_NAMES:
+        totals["api_operations"][name].extend(
+            {'folio': o['folio']} for o in result.get('api_operations', {}).get(name, [])
+        )
+    for name in SUMMARY_COUNTS:
+        totals["summary"][name] += result.get('summary', {}).get(name, 0)
+
+
+# Receipts of the window of the shards, set by _init_shard_worker
+_shard_receipt_index = None
+
+
+def _init_shard_worker(receipt_index=None):
+    """Set up a shard worker.
+
+    Logging is set up again, as workers don't inherit the parent's handlers
+    on Windows. The receipt index is kept for every shard the worker runs,
+    so it is sent to each worker once instead of with each shard.
+    """
+    global _shard_receipt_index
+    from src.utils.logger_config import setup_logging
+    setup_logging()
+    _shard_receipt_index = receipt_index
+
+
+def run_shard(config, shard_date, scope, window, claims, receipt_index=None):
+    """Compare and send one day of a sharded window, in a worker process.
+
+    Args:
+        config: DBF configuration, already staged
+        shard_date: Day of the shard
+        scope: Folios to compare or None (see MatchesProcess.get_incremental_scope)
+        window: (start, end) of the whole window, to look for receipts in
+            when there is no receipt index
+        claims: Folio -> owning shard, shared by the workers. A folio is only
+            sent by the first shard claiming it
+        receipt_index: Receipts of the window (see MatchesProcess.get_receipt_index),
+            the one the worker was set up with by default
+
+    Returns:
+        The shard totals (see add_to_totals)
+    """
+    owner = str(shard_date)
+    if receipt_index is None:
+        receipt_index = _shard_receipt_index
+    result = MatchesProcess().compare_range(config, shard_date, shard_date, scope, window, receipt_index)
+    totals = new_totals()
+    if not result:
+        return totals
+
+    operations = result['api_operations']
+    for name in OPERATION_NAMES:
+        owned = []
+        for operation in operations.get(name, []):
+            if claims.setdefault(str(operation['folio']), owner) == owner:
+                owned.append(operation)
+            else:
+                logging.warning(f"Folio {operation['folio']} is owned by shard {claims[str(operation['folio'])]}, not sent by {owner}")
+        operations[name] = owned
+    result['summary'] = dict(result.get('summary', {}), **{
+        'create_count': len(operations.get('create', [])),
+        'update_count': len(operations.get('update', [])),
+        'delete_count': len(operations.get('delete', [])),
+        'total_actions_needed': sum(len(operations.get(name, [])) for name in OPERATION_NAMES),
+    })
+
+    op = OP()
+    op.execute(operations)
+    add_to_totals(totals, result)
+    return totals
+
+
 class WorkFlow:
     def start(self, config, start_date, end_date):
 
         self.matches_process = MatchesProcess()
+
+        # Backfills of several days can be spread over worker processes, one day per shard
+        shard_workers = int(EncEnv().get('SHARD_WORKERS', '0') or 0)
+        if shard_workers > 1 and end_date > start_date:
+            return self.start_sharded(config, start_date, end_date, shard_workers)
+
+        # Long windows (e.g. the whole previous month on the 1st) are synced in day chunks
+        chunk_days = int(EncEnv().get('CHUNK_DAYS', '0') or 0)
+        if chunk_days > 0 and (end_date - start_date).days >= chunk_days:
+            return self.start_chunked(config, start_date, end_date, chunk_days)
+
         result = self.matches_process.compare_data(config, start_date, end_date)
         #print(f' MAIN W Result {result}')
         # print("STOP")
@@ -35,6 +139,9 @@ class WorkFlow:
 
             op = OP()
             op.execute(result['api_operations'])
+
+            # The sync went through, the next incremental run starts from here
+            self.matches_process.commit_incremental_state(result)
         
 
 
@@ -92,4 +199,117 @@ class WorkFlow:
             #     #check anyways the details
             
 
-        return  result 
\ No newline at end of file
+        return  result 
+
+    def start_chunked(self, config, start_date, end_date, chunk_days):
+        """Sync a date window in chunks of chunk_days days (CHUNK_DAYS).
+
+        Each chunk is read, mapped, compared, sent and tracked before the next
+        one is read, so only one chunk of records is in memory and results are
+        sent while the rest of the window is still pending. Receipts are still
+        looked up in the whole window: FLUJORES and FLUJO01 are read once
+        into a REF_NUM index shared by the chunks, instead of once per chunk.
+        The index holds every receipt of the window for the whole run, which
+        counts towards MAX_RSS_MB.
+
+        After each chunk the resident memory is checked against MAX_RSS_MB:
+        over the ceiling the remaining chunks are halved, and with one day
+        chunks the run stops with MemoryError (the chunks already sent are
+        tracked, the incremental marks aren't saved).
+
+        Returns:
+            Result with the summed summary and the folios of the API operations
+        """
+        guard = MemoryGuard(float(EncEnv().get('MAX_RSS_MB', '0') or 0))
+
+        # Staging and change capture cover the whole window, once
+        config = self.matches_process.stage_tables(config)
+        scope = self.matches_process.get_incremental_scope(config, start_date, end_date)
+
+        totals = new_totals()
+        chunks = 0
+
+        receipt_index = None
+        if scope is not None and not scope:
+            logging.info('No DBF changes since the last sync')
+            chunk_start = end_date + timedelta(days=1)
+        else:
+            chunk_start = start_date
+            receipt_index = self.matches_process.get_receipt_index(config, start_date, end_date)
+
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            logging.info(f'Processing chunk {chunk_start} - {chunk_end} of {start_date} - {end_date}')
+
+            result = self.matches_process.compare_range(config, chunk_start, chunk_end, scope, (start_date, end_date), receipt_index)
+            if result:
+                op = OP()
+                op.execute(result['api_operations'])
+                add_to_totals(totals, result)
+            result = None
+            chunks += 1
+
+            chunk_start = chunk_end + timedelta(days=1)
+            if chunk_start <= end_date and guard.exceeded():
+                if chunk_days == 1:
+                    raise MemoryError(f"Over MAX_RSS_MB with one day chunks, stopping before {chunk_start}")
+                chunk_days = max(1, chunk_days // 2)
+                logging.warning(f'Over MAX_RSS_MB, continuing with chunks of {chunk_days} days')
+
+        result = dict(totals, status="completed", chunks=chunks)
+        # The whole window went through, the next incremental run starts from here
+        self.matches_process.commit_incremental_state(result)
+        logging.info(f'Finished {chunks} chunks: {result["summary"]}')
+        return result
+
+    def start_sharded(self, config, start_date, end_date, workers):
+        """Sync a date window with one shard per day in a pool of worker processes (SHARD_WORKERS).
+
+        Every shard compares and sends its own day (see run_shard). Staging
+        and change capture are done here once for the whole window, and the
+        incremental marks are only saved when every shard succeeded.
+
+        The receipts of the window are also read here once, into a REF_NUM
+        index each worker gets when it starts, so the shards don't scan
+        FLUJORES and FLUJO01 over the whole window once per day. Each
+        worker holds a copy of the index, memory traded for those scans.
+
+        Returns:
+            Result with the summed summary, the folios of the API operations
+            and the days whose shard failed
+        """
+        config = self.matches_process.stage_tables(config)
+        scope = self.matches_process.get_incremental_scope(config, start_date, end_date)
+
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        if scope is not None and not scope:
+            logging.info('No DBF changes since the last sync')
+            days = []
+
+        receipt_index = self.matches_process.get_receipt_index(config, start_date, end_date) if days else None
+
+        totals = new_totals()
+        failed = []
+        with multiprocessing.Manager() as manager:
+            claims = manager.dict()
+            with ProcessPoolExecutor(max_workers=min(workers, len(days) or 1), initializer=_init_shard_worker,
+                                     initargs=(receipt_index,)) as pool:
+                futures = {
+                    pool.submit(run_shard, config, day, scope, (start_date, end_date), claims): day
+                    for day in days
+                }
+                for future in as_completed(futures):
+                    day = futures[future]
+                    try:
+                        add_to_totals(totals, future.result())
+                        logging.info(f'Shard {day} finished')
+                    except Exception as e:
+                        logging.error(f'Shard {day} failed: {str(e)}')
+                        failed.append(str(day))
+
+        result = dict(totals, status="completed" if not failed else "partial", shards=len(days), failed_shards=sorted(failed))
+        if not failed:
+            # The whole window went through, the next incremental run starts from here
+            self.matches_process.commit_incremental_state(result)
+        logging.info(f'Finished {len(days)} shards ({len(failed)} failed): {result["summary"]}')
+        return result
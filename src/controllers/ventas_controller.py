@@ -2,10 +2,14 @@ from datetime import datetime, timedelta, date
 import logging
 from typing import Dict, Any, List
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from ..dbf_enc_reader.core import DBFReader
 from ..dbf_enc_reader.connection import DBFConnection
-from ..dbf_enc_reader.mapping_manager import MappingManager
+from ..dbf_enc_reader.converters import DataConverter
+from ..dbf_enc_reader.native import NativeBackend
+from ..dbf_enc_reader.mapping_manager import MappingManager, MappingPlan
 from ..config.dbf_config import DBFConfig
 import os
 import sys
@@ -22,54 +26,113 @@ class VentasController:
         self.mapping_manager = mapping_manager
         self.venta_dbf = "VENTA.DBF"  # Header table
         self.partvta_dbf = "PARTVTA.DBF"  # Details table
+        self.receipt_dbfs = ["FLUJORES.DBF", "FLUJO01.DBF"]  # Receipt tables, mapped with FLUJORES
        
         
         # Initialize DBF reader
-        DBFConnection.set_dll_path(self.config.dll_path)
-        self.reader = DBFReader(self.config.source_directory, self.config.encryption_password)
+        if self.config.backend == 'ads':
+            DBFConnection.set_dll_path(self.config.dll_path)
+        self.reader = DBFReader(self.config.source_directory, self.config.encryption_password, self.config.backend)
+        self.converter = DataConverter()
+        self._plans = {}
+        self._fields = {}
+        # One reader per table for the concurrent reads, see _reader_for
+        self._table_readers = {}
+        self._readers_lock = threading.Lock()
+
+    def _reader_for(self, dbf_name: str) -> DBFReader:
+        """Get the reader of a table.
+
+        With concurrent reads every table gets its own reader (and
+        connection), as the provider connections can't be shared between
+        threads. Otherwise all tables use self.reader.
+        """
+        if self.config.read_workers <= 1:
+            return self.reader
+        with self._readers_lock:
+            if dbf_name not in self._table_readers:
+                self._table_readers[dbf_name] = self.reader if dbf_name == self.venta_dbf else DBFReader(
+                    self.config.source_directory, self.config.encryption_password, self.config.backend
+                )
+            return self._table_readers[dbf_name]
+
+    # Records converted per batch
+    BATCH_SIZE = 1000
+
+    def get_plan(self, dbf_name: str, mapping_dbf: str = None) -> MappingPlan:
+        """Get the compiled mapping plan of a table, built on first use.
+
+        Args:
+            dbf_name: DBF table to read
+            mapping_dbf: DBF whose mappings are applied, dbf_name by default
+
+        Returns:
+            The plan from MappingManager.get_plan for the column types of the table
+        """
+        mapping_dbf = mapping_dbf or dbf_name
+        key = (dbf_name, mapping_dbf)
+        if key not in self._plans:
+            self._plans[key] = self.mapping_manager.get_plan(
+                mapping_dbf, self._reader_for(dbf_name).get_field_types(dbf_name)
+            )
+        return self._plans[key]
     
-    def get_sales_in_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def get_fields(self, dbf_name: str, mapping_dbf: str = None) -> List[str]:
+        """Get the columns to read from a table, checked once against its schema.
+
+        Args:
+            dbf_name: DBF table to read
+            mapping_dbf: DBF whose mappings are applied, dbf_name by default
+
+        Returns:
+            Mapped columns present in the table, for the reader projection
+        """
+        mapping_dbf = mapping_dbf or dbf_name
+        key = (dbf_name, mapping_dbf)
+        if key not in self._fields:
+            schema = self._reader_for(dbf_name).get_schema(dbf_name)
+            if schema is not None:
+                missing = self.mapping_manager.validate_fields(mapping_dbf, schema)
+                if missing:
+                    logging.warning(f"{dbf_name} has no columns {', '.join(missing)} used by the {mapping_dbf} mappings")
+            self._fields[key] = self.mapping_manager.get_dbf_fields(mapping_dbf, schema)
+        return self._fields[key]
+
+    def get_sales_in_range(self, start_date: datetime, end_date: datetime, folios: List[str] = None,
+                           receipt_range: tuple = None, receipt_index: Dict[str, List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Get sales data within the specified date range, including details.
         
         Args:
             start_date: Start date for data range
             end_date: End date for data range
+            folios: Optional folios (NO_REFEREN) to restrict the headers to,
+                e.g. the ones affected since the last sync (see get_changed_folios)
+            receipt_range: Optional (start, end) dates to look for receipts in
+                when the range is a chunk of a larger sync window, so receipts
+                dated outside the chunk are still found. Defaults to the
+                range of the headers
+            receipt_index: Optional receipts already read by
+                get_receipt_index, used instead of reading the receipt tables
             
         Returns:
             List of dictionaries containing the mapped data with nested details
         """
         start_time = time.time()
-        
-        # First get headers for the date range
-        headers_start = time.time()
 
-        headers = self._get_headers_in_range(start_date, end_date)
-        headers_time = time.time() - headers_start
+        if self.config.read_workers > 1:
+            headers, details_by_folio, receipts_by_ref = self._read_concurrently(start_date, end_date, folios, receipt_range, receipt_index)
+        else:
+            # One DBF session for the four tables of the run (VENTA, PARTVTA,
+            # FLUJORES, FLUJO01) instead of connecting once per read
+            with self.reader.session():
+                headers_start = time.time()
+                headers = self._get_headers_in_range(start_date, end_date, folios)
+                print(f"\nTime to get headers: {time.time() - headers_start:.2f} seconds")
 
-        print(f"\nTime to get headers: {headers_time:.2f} seconds")
+                details_start = time.time()
+                details_by_folio, receipts_by_ref = self._get_headers_related(headers, *(receipt_range or (start_date, end_date)), receipt_index)
+                print(f"Time to get filtered details: {time.time() - details_start:.2f} seconds")
 
-       
-        
-        
-        # Get folios to filter details
-        folios = [str(header['Folio']) for header in headers]
-        receipts_num = [{'ref_recibo': str(header['ref_recibo']), 'folio': str(header['Folio'])} for header in headers]
-
-        
-        # Then get details only for these folios
-        details_start = time.time()
-
-        logging.info(f'/// /// /// Total cabeceras found: {len(headers)}')
-
-        details_by_folio = self._get_details_for_folios(folios) if folios else {}
-        receipts_by_ref = self._get_receipts_for_folios(receipts_num, start_date, end_date) if receipts_num else {}
-        
-
-        
-
-        details_time = time.time() - details_start
-        print(f"Time to get filtered details: {details_time:.2f} seconds")
-        
         # Join headers with their details
         join_start = time.time()
         for header in headers:
@@ -85,6 +148,86 @@ class VentasController:
         
         return headers
         
+    def _get_headers_related(self, headers: List[Dict[str, Any]], start_date: date, end_date: date,
+                             receipt_index: Dict[str, List[Dict[str, Any]]] = None):
+        """Read the details and receipts of the headers, one table after another.
+
+        Args:
+            headers: Transformed headers
+            start_date: Start of the range to look for receipts in
+            end_date: End of the range to look for receipts in
+            receipt_index: Optional receipts from get_receipt_index, the
+                receipt tables aren't read then
+
+        Returns:
+            Tuple of (details by folio, receipts by folio)
+        """
+        # Get folios to filter details
+        folios = [str(header['Folio']) for header in headers]
+        receipts_num = [{'ref_recibo': str(header['ref_recibo']), 'folio': str(header['Folio'])} for header in headers]
+
+        logging.info(f'/// /// /// Total cabeceras found: {len(headers)}')
+
+        details_by_folio = self._get_details_for_folios(folios) if folios else {}
+        if receipt_index is not None:
+            receipts_by_ref = self._receipts_by_folio(receipts_num, receipt_index)
+        else:
+            receipts_by_ref = self._get_receipts_for_folios(receipts_num, start_date, end_date) if receipts_num else {}
+        return details_by_folio, receipts_by_ref
+
+    def _read_concurrently(self, start_date: date, end_date: date, folios: List[str] = None, receipt_range: tuple = None,
+                           receipt_index: Dict[str, List[Dict[str, Any]]] = None):
+        """Read the four tables with one worker (and reader) per table.
+
+        FLUJORES and FLUJO01 only depend on the date range, so they are read
+        while VENTA is scanned; PARTVTA starts as soon as the folios of the
+        headers are known. With a receipt_range (a chunk of a larger window)
+        the receipt tables are read once the headers are known instead, so
+        only the receipts they reference are kept. With a receipt_index
+        (see get_receipt_index) they aren't read at all.
+
+        Returns:
+            Tuple of (headers, details by folio, receipts by folio)
+        """
+        def in_session(dbf_name, read, *args):
+            with self._reader_for(dbf_name).session():
+                return read(*args)
+
+        read_start = time.time()
+        with ThreadPoolExecutor(max_workers=self.config.read_workers, thread_name_prefix='dbf-read') as pool:
+            headers_future = pool.submit(in_session, self.venta_dbf, self._get_headers_in_range, start_date, end_date, folios)
+            receipt_futures = []
+            if receipt_index is None and receipt_range is None:
+                receipt_futures = [
+                    pool.submit(in_session, dbf_name, self._read_receipts_table, dbf_name, start_date, end_date)
+                    for dbf_name in self.receipt_dbfs
+                ]
+
+            headers = headers_future.result()
+            print(f"\nTime to get headers: {time.time() - read_start:.2f} seconds")
+            logging.info(f'/// /// /// Total cabeceras found: {len(headers)}')
+
+            folios = [str(header['Folio']) for header in headers]
+            details_future = pool.submit(in_session, self.partvta_dbf, self._get_details_for_folios, folios) if folios else None
+
+            receipts_num = [{'ref_recibo': str(header['ref_recibo']), 'folio': str(header['Folio'])} for header in headers]
+            if receipt_index is None and receipt_range is not None:
+                refs = {ref['ref_recibo'] for ref in receipts_num}
+                receipt_futures = [
+                    pool.submit(in_session, dbf_name, self._read_receipts_table, dbf_name, *receipt_range, refs)
+                    for dbf_name in self.receipt_dbfs
+                ]
+            if receipt_index is not None:
+                receipts_by_ref = self._receipts_by_folio(receipts_num, receipt_index)
+            else:
+                receipt_tables = [future.result() for future in receipt_futures]
+                receipts_by_ref = self._match_receipts(receipts_num, receipt_tables)
+
+            details_by_folio = details_future.result() if details_future else {}
+
+        print(f"Time to read all tables concurrently: {time.time() - read_start:.2f} seconds")
+        return headers, details_by_folio, receipts_by_ref
+
     def _get_details_for_folios(self, folios: List[str]) -> Dict[str, List[Dict[str, Any]]]:
         """Get sales details for specific folios and organize them by folio number.
         
@@ -94,47 +237,35 @@ class VentasController:
         Returns:
             Dictionary mapping folio numbers to lists of detail records
         """
-        field_mappings = self.mapping_manager.get_field_mappings(self.partvta_dbf)
+        plan = self.get_plan(self.partvta_dbf)
         
-        # Create filter for specific folios using OR
-        filters = []
-        for folio in folios:
-            # Pad the folio with leading zeros to 6 digits to match DBF format
-            filter_dict = {
-                'field': 'NO_REFEREN',
-                'operator': '=',
-                'value': str(folio).zfill(6),  # Pad with leading zeros
-                'is_numeric': False  # Treat as string to preserve leading zeros
-            }
-            filters.append(filter_dict)
+        # Single set-membership filter for all folios
+        # Pad the folios with leading zeros to 6 digits to match DBF format
+        filters = [{
+            'field': 'NO_REFEREN',
+            'operator': 'in',
+            'values': [str(folio).zfill(6) for folio in folios],  # Pad with leading zeros
+            'is_numeric': False  # Treat as string to preserve leading zeros
+        }]
 
-        # Get filtered details
+        # Read filtered details and organize them by folio as they are scanned
         read_start = time.time()
 
-        raw_data_str = self.reader.to_json(self.partvta_dbf, 0, filters)
+        details_by_folio = {}
+        total_details = 0
+        for batch in self._reader_for(self.partvta_dbf).iter_table(self.partvta_dbf, filters, chunk_size=self.BATCH_SIZE,
+                                            fields=self.get_fields(self.partvta_dbf)):
+            total_details += len(batch)
+            for transformed in plan.apply_batch(batch):
+                if transformed:
+                    folio = transformed['Folio']  # Using the mapped name
+                    if folio not in details_by_folio:
+                        details_by_folio[folio] = []
+                    details_by_folio[folio].append(transformed)
 
         read_time = time.time() - read_start
         print(f"Time to read PARTVTA.DBF with filter: {read_time:.2f} seconds")
-        
-        parse_start = time.time()
-
-        raw_data = json.loads(raw_data_str)
-        logging.info(f'/// /// /// Total detalles found: {len(raw_data)}')
-        
-        
-        parse_time = time.time() - parse_start
-        print(f"Time to parse PARTVTA JSON: {parse_time:.2f} seconds")
-
-        # Organize details by folio
-        details_by_folio = {}
-        for record in raw_data:
-            print(f' RECORD PRE TRANSFORM {record}')
-            transformed = self.transform_record(record, field_mappings)
-            if transformed:
-                folio = transformed['Folio']  # Using the mapped name
-                if folio not in details_by_folio:
-                    details_by_folio[folio] = []
-                details_by_folio[folio].append(transformed)
+        logging.info(f'/// /// /// Total detalles found: {total_details}')
         
         return details_by_folio
 
@@ -148,89 +279,147 @@ class VentasController:
             Dictionary mapping folio numbers to lists of detail records
 
         """
+        # Get filtered details
+        read_start = time.time()
+
+        # Headers are known here, only keep the receipts they reference
+        refs = {str(ref.get('ref_recibo')) for ref in reference_records}
+        receipt_tables = [
+            self._read_receipts_table(dbf_name, start_date, end_date, refs) for dbf_name in self.receipt_dbfs
+        ]
+
+        read_time = time.time() - read_start
+        print(f"Time to read tables with filter: {read_time:.2f} seconds")
 
-        target_table = "FLUJORES.DBF"
-        target_table_2 = "FLUJO01.DBF"
+        return self._match_receipts(reference_records, receipt_tables)
 
-        field_mappings = self.mapping_manager.get_field_mappings(target_table)
-        field_mappings_2 = self.mapping_manager.get_field_mappings(target_table_2)
+    def _read_receipts_table(self, dbf_name: str, start_date: date, end_date: date, refs: set = None):
+        """Read the receipts of a receipt table (FLUJORES/FLUJO01) in the date range.
 
+        Args:
+            dbf_name: Receipt table to read
+            start_date: Start of the date range
+            end_date: End of the date range
+            refs: Optional REF_NUM values to keep, the others are dropped
+                while the table is scanned
+
+        Returns:
+            Tuple of (dbf_name, raw records)
+        """
         str_start = start_date.strftime("%m-%d-%Y")
         str_end = end_date.strftime("%m-%d-%Y")
-        
-        # Create filter for specific reference_records using OR
-        filters = []
-        
-        # for ref_rec in reference_records:
-            # Pad the folio with leading zeros to 6 digits to match DBF format
-        filter_dict = {
+
+        filters = [{
             'field': 'FECHA',
             'operator': 'range',
             'from_value': str_start,  # Format to match DBF M/D/Y
             'to_value':str_end,  # End of day
             'is_date': False  # F_
-        }
-        filters.append(filter_dict)
+        }]
 
-        # Get filtered details
+        # Both tables are transformed with the FLUJORES mappings, so project them the same way
+        fields = self.get_fields(dbf_name, self.receipt_dbfs[0])
+        records = self._reader_for(dbf_name).iter_table(dbf_name, filters, fields=fields)
+        if refs is not None:
+            records = (record for record in records if str(record.get('REF_NUM')) in refs)
+        raw_data = list(records)
+        print(f"Records from {dbf_name}: {len(raw_data)}")
+        return dbf_name, raw_data
+
+    def get_receipt_index(self, start_date: date, end_date: date) -> Dict[str, List[Dict[str, Any]]]:
+        """Read the receipts of a date range once, indexed by REF_NUM.
+
+        For a sync window processed in parts (chunks or shards): each part
+        takes the receipts of its headers from the index instead of reading
+        FLUJORES and FLUJO01 over the whole window again. Every receipt of
+        the window is transformed and kept, referenced or not, so this
+        trades memory (the receipts of the window) for the repeated scans.
+
+        Args:
+            start_date: Start of the date range
+            end_date: End of the date range
+
+        Returns:
+            Dictionary mapping REF_NUM to its transformed receipts
+        """
         read_start = time.time()
+        receipt_tables = []
+        for dbf_name in self.receipt_dbfs:
+            with self._reader_for(dbf_name).session():
+                receipt_tables.append(self._read_receipts_table(dbf_name, start_date, end_date))
+        receipt_index = self._index_receipts(receipt_tables)
+        print(f"Time to index receipts: {time.time() - read_start:.2f} seconds")
+        return receipt_index
 
-        raw_data_str = self.reader.to_json(target_table, 0, filters)
-        raw_data_2_str = self.reader.to_json(target_table_2, 0, filters)
+    def _index_receipts(self, receipt_tables: List, wanted: set = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Index the receipts of the receipt tables by REF_NUM.
 
-        read_time = time.time() - read_start
-        print(f"Time to read tables with filter: {read_time:.2f} seconds")
-        
-        parse_start = time.time()
+        Each receipt is transformed once with the plan of the table it comes
+        from.
 
-        # Parse both JSON strings
-        raw_data_1 = json.loads(raw_data_str)
-        raw_data_2 = json.loads(raw_data_2_str)
-        
-        # Combine the data from both tables
-        raw_data = raw_data_1 + raw_data_2
+        Args:
+            receipt_tables: List of (dbf_name, raw records) from _read_receipts_table
+            wanted: Optional REF_NUM values to keep, all of them by default
 
-        logging.info(f'/// /// /// Total recibos found: {len(raw_data)}')
-        
-        print(f"Records from {target_table}: {len(raw_data_1)}")
-        print(f"Records from {target_table_2}: {len(raw_data_2)}")
-        print(f"Total combined records: {len(raw_data)}")
-        
+        Returns:
+            Dictionary mapping REF_NUM to its transformed receipts
+        """
+        receipts_by_ref = {}
+        total_receipts = 0
+        for dbf_name, records in receipt_tables:
+            plan = self.get_plan(dbf_name, self.receipt_dbfs[0])
+            total_receipts += len(records)
+            for record in records:
+                if 'REF_NUM' not in record:
+                    continue
+                ref_num = str(record['REF_NUM'])
+                if wanted is not None and ref_num not in wanted:
+                    continue
+                transformed = plan.apply(record)
+                if transformed:
+                    receipts_by_ref.setdefault(ref_num, []).append(transformed)
 
-      
+        logging.info(f'/// /// /// Total recibos found: {total_receipts}')
+        print(f"Total combined records: {total_receipts}")
+        return receipts_by_ref
 
-        parse_time = time.time() - parse_start
-        print(f"Time to parse {target_table} JSON: {parse_time:.2f} seconds")
-        # print(raw_data_str)
+    def _match_receipts(self, reference_records: List[Dict[str, str]], receipt_tables: List) -> Dict[str, List[Dict[str, Any]]]:
+        """Match the receipts read from each receipt table to their folios.
 
-        # Create a dictionary to store matched receipts by folio
+        Args:
+            reference_records: List of {'ref_recibo', 'folio'} of the headers
+            receipt_tables: List of (dbf_name, raw records) from _read_receipts_table
+
+        Returns:
+            Dictionary mapping folio numbers to lists of receipt records
+        """
+        wanted = {str(ref['ref_recibo']) for ref in reference_records if ref.get('ref_recibo') and ref.get('folio')}
+        return self._receipts_by_folio(reference_records, self._index_receipts(receipt_tables, wanted))
+
+    def _receipts_by_folio(self, reference_records: List[Dict[str, str]],
+                           receipts_by_ref: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the receipts of each folio from the receipts indexed by REF_NUM.
+
+        Args:
+            reference_records: List of {'ref_recibo', 'folio'} of the headers
+            receipts_by_ref: Dictionary mapping REF_NUM to its receipts
+
+        Returns:
+            Dictionary mapping folio numbers to lists of receipt records
+        """
         receipts_by_folio = {}
-        
-        # Process each reference record
         for ref in reference_records:
-            ref_recibo = ref.get('ref_recibo')
-            folio = ref.get('folio')
-            
-            if ref_recibo and folio:
-                # Initialize an empty list for this folio if it doesn't exist
-                if folio not in receipts_by_folio:
-                    receipts_by_folio[folio] = []
-                
-                # Find all matching records in raw_data where REF_NUM equals ref_recibo
-                for record in raw_data:
-                    if 'REF_NUM' in record and str(record['REF_NUM']) == str(ref_recibo):
-                        # Transform the record and add it to the list for this folio
-                        transformed = self.transform_record(record, field_mappings)
-                        if transformed:
-                            receipts_by_folio[folio].append(transformed)
-
-        # print(f' receipts {receipts_by_folio}')
-        
+            ref_recibo, folio = ref.get('ref_recibo'), ref.get('folio')
+            if not ref_recibo or not folio:
+                continue
+            matched = receipts_by_folio.setdefault(folio, [])
+            # Copies, so folios sharing a receipt (or parts sharing an index) don't share its record
+            matched.extend(dict(receipt) for receipt in receipts_by_ref.get(str(ref_recibo), ()))
         return receipts_by_folio
         
-    def _get_headers_in_range(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
-        """Get sales headers within the specified date range."""
-        field_mappings = self.mapping_manager.get_field_mappings(self.venta_dbf)
+    def _get_headers_in_range(self, start_date: date, end_date: date, folios: List[str] = None) -> List[Dict[str, Any]]:
+        """Get sales headers within the specified date range, optionally only for some folios."""
+        plan = self.get_plan(self.venta_dbf)
         str_start = start_date.strftime("%m-%d-%Y")
         str_end = end_date.strftime("%m-%d-%Y")
         
@@ -242,31 +431,70 @@ class VentasController:
             'to_value':str_end,  # End of day
             'is_date': False  # F_EMISION is stored as string
         }]
+        if folios is not None:
+            # Listed first so the native reader seeks the folios through the index
+            filters.insert(0, {'field': 'NO_REFEREN', 'operator': 'in', 'values': list(folios)})
         print(f"\nSearching for date range: {start_date} to {end_date}")
         
         read_start = time.time()
-        raw_data_str = self.reader.to_json(self.venta_dbf, self.config.limit_rows, filters)
-        read_time = time.time() - read_start
-        print(f"Time to read VENTA.DBF: {read_time:.2f} seconds")
-        
-        parse_start = time.time()
-        raw_data = json.loads(raw_data_str)
-        parse_time = time.time() - parse_start
-        print(f"Time to parse VENTA JSON: {parse_time:.2f} seconds")
 
         transformed_data = []
-        for record in raw_data:
-           
-            if record.get('TIPO_DOC') == 'DV':#only add DV records
-              
-                transformed = self.transform_record(record, field_mappings)
-                if transformed:
-                    transformed_data.append(transformed)
+        for batch in self._reader_for(self.venta_dbf).iter_table(self.venta_dbf, filters, self.config.limit_rows, chunk_size=self.BATCH_SIZE,
+                                            fields=self.get_fields(self.venta_dbf)):
+            batch = [record for record in batch if record.get('TIPO_DOC') == 'DV']#only add DV records
+            transformed_data.extend(t for t in plan.apply_batch(batch) if t)
+
+        read_time = time.time() - read_start
+        print(f"Time to read VENTA.DBF: {read_time:.2f} seconds")
         # print(f' {transformed_data}')
         # sys.exit()            
         
         return transformed_data
 
+    def get_changed_folios(self, changes: Dict[str, List[int]], start_date: date, end_date: date) -> set:
+        """Resolve the records changed since the last sync to the folios they belong to.
+
+        Changed VENTA and PARTVTA records give their NO_REFEREN directly;
+        changed receipts give their REF_NUM, matched to the headers of the
+        date range through ref_recibo. Deleted records are included so their
+        folios get compared too. Only the native backend can read records by
+        number.
+
+        Args:
+            changes: Table name -> changed record numbers (see ChangeCapture.detect)
+            start_date: Start date for data range
+            end_date: End date for data range
+
+        Returns:
+            Set of folios (NO_REFEREN) to sync again
+        """
+        backend = NativeBackend(self.config.source_directory)
+        folios = set()
+        for dbf_name in (self.venta_dbf, self.partvta_dbf):
+            if changes.get(dbf_name):
+                records = backend.read_records_at(dbf_name, changes[dbf_name], ['NO_REFEREN'])
+                folios.update(record['NO_REFEREN'] for record in records if record.get('NO_REFEREN'))
+
+        refs = set()
+        for dbf_name in self.receipt_dbfs:
+            if changes.get(dbf_name):
+                records = backend.read_records_at(dbf_name, changes[dbf_name], ['REF_NUM'])
+                refs.update(str(record['REF_NUM']) for record in records if record.get('REF_NUM'))
+        if refs:
+            ref_field = next(
+                (m['dbf'] for m in self.mapping_manager.get_field_mappings(self.venta_dbf).values()
+                 if m['velneo_table'] == 'ref_recibo'),
+                None
+            )
+            if ref_field:
+                filters = [
+                    {'field': ref_field, 'operator': 'in', 'values': sorted(refs)},
+                    {'field': 'F_EMISION', 'operator': 'range',
+                     'from_value': start_date.strftime("%m-%d-%Y"), 'to_value': end_date.strftime("%m-%d-%Y")},
+                ]
+                folios.update(r['NO_REFEREN'] for r in backend.iter_table(self.venta_dbf, None, filters, ['NO_REFEREN']))
+        return folios
+
     def sanitize_string(self, text):
         """
         Sanitize a string value to prevent issues with special characters.
@@ -288,6 +516,9 @@ class VentasController:
         """
         Transform a DBF record using the field mappings.
         
+        Reads go through the plans compiled by get_plan; this is kept for
+        single records mapped outside of a read.
+        
         Args:
             record: Raw record from DBF
             field_mappings: Field mapping configuration
@@ -295,32 +526,4 @@ class VentasController:
         Returns:
             Transformed record with mapped field names and types
         """
-        transformed = {}
-        for target_field, mapping in field_mappings.items():
-            dbf_field = mapping['dbf']
-            if dbf_field in record:
-                value = record[dbf_field]
-                
-                # Sanitize string values to handle special characters
-                if isinstance(value, str):
-                    value = self.sanitize_string(value)
-                    
-                if mapping['type'] == 'number':
-                    try:
-                        # Check if this is a reference number that needs to preserve leading zeros
-                        if dbf_field.startswith('NO_REFEREN') or dbf_field.startswith('NUMERO_A') :
-                            # Keep it as string to preserve leading zeros
-                            pass
-                        else:
-                            value = float(value) if '.' in str(value) else int(value)
-                    except (ValueError, TypeError):
-                        value = 0
-                
-                transformed[mapping['velneo_table']] = value
-                
-        # Print first record for debugging
-        if not hasattr(VentasController, '_printed_transform'):
-            print("\nTransformed record example:", transformed)
-            setattr(VentasController, '_printed_transform', True)
-                
-        return transformed
+        return self.converter.convert_record(record, self.converter.compile_converters(field_mappings))
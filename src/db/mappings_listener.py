@@ -0,0 +1,186 @@
+import json
+import logging
+import select
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from src.db.velneo_mappings import ARTICULOS_TABLE, REFERENCE_TABLES
+
+# Channel the invalidation triggers notify on
+CHANNEL = 'velneo_cache'
+
+NOTIFY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION velneo_cache_notify() RETURNS trigger AS $$
+DECLARE
+    keys jsonb := '[]'::jsonb;
+    row_key jsonb;
+    i integer;
+BEGIN
+    -- The key columns of the table come as the trigger arguments
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'keys', NULL)::text);
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        row_key := '[]'::jsonb;
+        FOR i IN 0 .. TG_NARGS - 1 LOOP
+            row_key := row_key || jsonb_build_array(to_jsonb(OLD) -> TG_ARGV[i]);
+        END LOOP;
+        keys := keys || jsonb_build_array(row_key);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        row_key := '[]'::jsonb;
+        FOR i IN 0 .. TG_NARGS - 1 LOOP
+            row_key := row_key || jsonb_build_array(to_jsonb(NEW) -> TG_ARGV[i]);
+        END LOOP;
+        keys := keys || jsonb_build_array(row_key);
+    END IF;
+    PERFORM pg_notify('{CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'keys', keys)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def cached_tables() -> Dict[str, tuple]:
+    """Get the layout of every table VelneoMappings caches, by name."""
+    return {**REFERENCE_TABLES, ARTICULOS_TABLE[0]: ARTICULOS_TABLE}
+
+
+def install_invalidation_triggers(conn: Any, tables: Optional[Iterable[str]] = None) -> None:
+    """
+    Create the triggers notifying the changes of the cached tables.
+
+    Safe to run again, the function and the triggers are replaced.
+
+    Args:
+        conn: Open psycopg2 connection, committed here
+        tables: Names of the tables (see cached_tables), all of them by default
+    """
+    layouts = cached_tables()
+    with conn.cursor() as cursor:
+        cursor.execute(NOTIFY_FUNCTION)
+        for table in tables or layouts:
+            relation, key_columns, _ = layouts[table]
+            arguments = ', '.join(f"'{column}'" for column in key_columns)
+            cursor.execute(f"DROP TRIGGER IF EXISTS velneo_cache_notify ON {relation}")
+            cursor.execute(f"""
+                CREATE TRIGGER velneo_cache_notify
+                AFTER INSERT OR UPDATE OR DELETE ON {relation}
+                FOR EACH ROW EXECUTE PROCEDURE velneo_cache_notify({arguments})
+            """)
+            cursor.execute(f"DROP TRIGGER IF EXISTS velneo_cache_notify_truncate ON {relation}")
+            cursor.execute(f"""
+                CREATE TRIGGER velneo_cache_notify_truncate
+                AFTER TRUNCATE ON {relation}
+                FOR EACH STATEMENT EXECUTE PROCEDURE velneo_cache_notify()
+            """)
+    conn.commit()
+
+
+class MappingsListener:
+    """Keep the cache of a VelneoMappings up to date from the trigger notifications.
+
+    LISTENs on its own connection, outside the pool, and hands every
+    notification to VelneoMappings.apply_invalidation from a daemon thread.
+    When the connection is lost the whole cache is dropped, since the
+    notifications sent meanwhile are lost too.
+
+    Usage:
+        listener = MappingsListener(mappings, db_config)
+        listener.start()
+        ...
+        listener.stop()
+    """
+
+    def __init__(self, mappings: Any, db_config: Dict[str, Any], poll_interval: float = 5.0,
+                 retry_interval: float = 10.0):
+        """
+        Args:
+            mappings: VelneoMappings whose cache is kept up to date
+            db_config: Connection parameters, as for psycopg2.connect
+            poll_interval: Seconds between checks of the stop request
+            retry_interval: Seconds to wait before reconnecting
+        """
+        self.mappings = mappings
+        self.db_config = db_config
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self) -> None:
+        self._conn = psycopg2.connect(**self.db_config)
+        self._conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def start(self) -> None:
+        """Start listening.
+
+        The LISTEN is issued before returning, so no change made after
+        start() is missed by the cache.
+        """
+        if self._thread is not None:
+            return
+        self._connect()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='velneo-cache-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop listening and wait for the thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.poll_interval * 2)
+            self._thread = None
+        self._close()
+
+    def handle(self, payload: str) -> None:
+        """Apply one notification to the cache."""
+        try:
+            message = json.loads(payload)
+            self.mappings.apply_invalidation(message['table'], message.get('keys'))
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Invalid cache notification {payload!r}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._conn is None:
+                    self._connect()
+                    # Whatever changed while disconnected wasn't notified
+                    self.mappings.invalidate()
+                    logging.info("Velneo cache listener reconnected, cache dropped")
+
+                if select.select([self._conn], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                self._conn.poll()
+                while self._conn.notifies:
+                    self.handle(self._conn.notifies.pop(0).payload)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logging.error(f"Velneo cache listener error: {e}")
+                self._close()
+                self._stop.wait(self.retry_interval)
+
+
+if __name__ == "__main__":
+    from src.config.db_config import PostgresConnection
+
+    with psycopg2.connect(**PostgresConnection.get_db_config()) as connection:
+        install_invalidation_triggers(connection)
+    print("Velneo cache invalidation triggers installed")
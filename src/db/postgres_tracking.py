@@ -314,6 +314,127 @@ class PostgresTracking:
             logging.error(f"Error de conexión: {e}")
             return False
 
+    def _ensure_day_hash_table(self, cursor) -> None:
+        """Crea la tabla hash_dia si no existe.
+
+        Guarda por día la raíz de los hashes de sus folios (ver
+        record_hash.day_root) cuando DBF y estado_factura_venta coinciden.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS hash_dia (
+                fecha_referencia DATE PRIMARY KEY,
+                hash_raiz VARCHAR(32) NOT NULL,
+                total_folios INTEGER NOT NULL,
+                fecha_actualizacion TIMESTAMP WITH TIME ZONE NOT NULL
+            )
+        """)
+
+    def get_day_roots(self, start_date: date, end_date: date) -> Dict[date, str]:
+        """
+        Obtiene las raíces guardadas de los días del rango
+
+        Args:
+            start_date: Fecha inicial
+            end_date: Fecha final
+
+        Returns:
+            Diccionario de fecha a hash raíz, vacío si hay error
+        """
+        try:
+            with psycopg2.connect(
+                host=self.config['host'],
+                database=self.config['database'],
+                user=self.config['user'],
+                password=self.config['password'],
+                port=self.config['port']
+            ) as conn:
+                with conn.cursor() as cursor:
+                    self._ensure_day_hash_table(cursor)
+                    cursor.execute("""
+                        SELECT fecha_referencia, hash_raiz
+                        FROM hash_dia
+                        WHERE fecha_referencia BETWEEN %s AND %s
+                    """, (start_date, end_date))
+                    return {row[0]: row[1] for row in cursor.fetchall()}
+        except Exception as e:
+            logging.error(f"Error obteniendo hash_dia: {e}")
+            return {}
+
+    def save_day_roots(self, roots: Dict[date, tuple], stale_dates: List[date] = ()) -> bool:
+        """
+        Guarda las raíces de los días que coinciden y borra las de los que no
+
+        Args:
+            roots: Diccionario de fecha a (hash raíz, total de folios)
+            stale_dates: Fechas con operaciones pendientes, su raíz ya no vale
+        """
+        if not roots and not stale_dates:
+            return True
+        try:
+            with psycopg2.connect(
+                host=self.config['host'],
+                database=self.config['database'],
+                user=self.config['user'],
+                password=self.config['password'],
+                port=self.config['port']
+            ) as conn:
+                with conn.cursor() as cursor:
+                    self._ensure_day_hash_table(cursor)
+                    now = datetime.now(pytz.utc)
+                    for fecha, (hash_raiz, total_folios) in roots.items():
+                        cursor.execute("""
+                            INSERT INTO hash_dia (
+                                fecha_referencia, hash_raiz, total_folios, fecha_actualizacion
+                            ) VALUES (%s, %s, %s, %s)
+                            ON CONFLICT (fecha_referencia) DO UPDATE SET
+                                hash_raiz = EXCLUDED.hash_raiz,
+                                total_folios = EXCLUDED.total_folios,
+                                fecha_actualizacion = EXCLUDED.fecha_actualizacion
+                        """, (fecha, hash_raiz, total_folios, now))
+                    if stale_dates:
+                        cursor.execute("DELETE FROM hash_dia WHERE fecha_referencia = ANY(%s)", (list(stale_dates),))
+                    conn.commit()
+                    return True
+        except Exception as e:
+            logging.error(f"Error guardando hash_dia: {e}")
+            return False
+
+    def get_records_by_dates(self, dates: List[date]) -> List[Dict]:
+        """
+        Obtiene los registros de estado_factura_venta de unas fechas
+
+        Args:
+            dates: Fechas de emisión a consultar
+
+        Returns:
+            Lista de registros con las mismas columnas que get_records_by_date_range
+        """
+        if not dates:
+            return []
+        try:
+            with psycopg2.connect(
+                host=self.config['host'],
+                database=self.config['database'],
+                user=self.config['user'],
+                password=self.config['password'],
+                port=self.config['port']
+            ) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT id, folio, total_partidas,
+                               hash, fecha_procesamiento,estado, fecha_emision
+                        FROM estado_factura_venta
+                        WHERE fecha_emision = ANY(%s)
+                        ORDER BY fecha_emision
+                    """, (list(dates),))
+                    columns = [desc[0] for desc in cursor.description]
+                    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    print(f"Query found {len(results)} records in {len(dates)} days")
+                    return results
+        except Exception as e:
+            logging.error(f"Error obteniendo registros: {e}")
+            return []
+
     def _ensure_indexes(self):
         """Create required indexes if missing"""
         try:
@@ -0,0 +1,126 @@
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Bump when the layout of the stored tables changes, older snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+
+class ReferenceSnapshot:
+    """Local SQLite copy of the Velneo reference tables (see VelneoMappings).
+
+    Each table is stored as the JSON of its lookup dictionary, together with
+    the change marker Postgres had when it was read. A run whose marker
+    still matches starts from the snapshot instead of querying the tables.
+
+    Usage:
+        snapshot = ReferenceSnapshot(path)
+        tables = snapshot.load(marker)   # None if missing, stale or another version
+        ...
+        snapshot.save(tables, marker)
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file, created on the first save
+        """
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS tables (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        return conn
+
+    def load(self, marker: Optional[str] = None) -> Optional[Dict[str, Dict[Any, Any]]]:
+        """
+        Read the stored tables.
+
+        Args:
+            marker: Current change marker, None to accept any stored marker
+
+        Returns:
+            Dictionary of table name to lookup dictionary, or None if there
+            is no snapshot, it is of another version or its marker differs
+        """
+        if not self.path.exists():
+            return None
+        try:
+            conn = self._connect()
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+                if meta.get('version') != str(SNAPSHOT_VERSION):
+                    return None
+                if marker is not None and meta.get('marker') != marker:
+                    return None
+                return {
+                    name: self._decode(data)
+                    for name, data in conn.execute("SELECT name, data FROM tables").fetchall()
+                }
+            finally:
+                conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Reference snapshot {self.path} not readable: {e}")
+            return None
+
+    def save(self, tables: Dict[str, Dict[Any, Any]], marker: str) -> bool:
+        """
+        Replace the stored tables in one transaction.
+
+        Args:
+            tables: Dictionary of table name to lookup dictionary
+            marker: Change marker the tables were read under
+
+        Returns:
+            True if the snapshot was written
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM tables")
+                    conn.executemany(
+                        "INSERT INTO tables (name, data) VALUES (?, ?)",
+                        [(name, self._encode(table_map)) for name, table_map in tables.items()]
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [
+                            ('version', str(SNAPSHOT_VERSION)),
+                            ('marker', marker),
+                            ('saved_at', datetime.now().isoformat()),
+                        ]
+                    )
+                return True
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logging.warning(f"Reference snapshot {self.path} not written: {e}")
+            return False
+
+    @staticmethod
+    def _encode(table_map: Dict[Any, Any]) -> str:
+        # Tuple keys (several key columns) are stored as lists
+        return json.dumps([[list(key) if isinstance(key, tuple) else key, value] for key, value in table_map.items()])
+
+    @staticmethod
+    def _decode(data: str) -> Dict[Any, Any]:
+        return {tuple(key) if isinstance(key, list) else key: value for key, value in json.loads(data)}
+
+
+def change_marker(counters: Dict[str, Tuple[int, ...]]) -> str:
+    """
+    Build the change marker of the reference tables from their statistics.
+
+    Args:
+        counters: Dictionary of table name to its pg_stat_user_tables counters
+
+    Returns:
+        Marker string, different whenever a counter moved
+    """
+    return json.dumps({name: list(counters[name]) for name in sorted(counters)})
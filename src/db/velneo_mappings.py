@@ -1,24 +1,164 @@
 import psycopg2
 from psycopg2 import sql
+from collections import OrderedDict
 from datetime import datetime, date
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import logging
+import threading
 import pytz
 from src.db.db_connection_pool import DBConnectionPool
+from src.db.reference_snapshot import ReferenceSnapshot, change_marker
 
 
+# Small dimension tables loaded whole on first use:
+# name -> (relation, key columns the lookups filter on, value column)
+REFERENCE_TABLES = {
+    'clientes': ('clientes', ('pvsi_clave',), 'velneo'),
+    'almacen': ('public.almacen', ('tienda', 'plaza'), 'velneo'),
+    'general_misc': ('general_misc', ('title',), 'id_velneo'),
+    'metodo_pago': ('metodo_pago', ('pvsi',), 'velneo'),
+    'vendedores': ('vendedores', ('pvsi_clave',), 'velneo'),
+    'pais': ('pais', ('description',), 'id'),
+    'iva': ('iva', ('pvsi',), 'velneo'),
+    'caja_banco': ('caja_banco', ('pvsi',), 'velneo'),
+    'forma_pago': ('forma_pago', ('pvsi',), 'velneo'),
+    'forma_pago_caja_banco': ('forma_pago_caja_banco', ('caja_banco',), 'forma_pago'),
+}
+
+# Looked up one articulo at a time (see get_articulo), same layout
+ARTICULOS_TABLE = ('articulos', ('pvsi_clave',), 'velneo_id')
+
+# Articulos kept in memory, least recently used first out
+ARTICULO_CACHE_SIZE = 4096
+
+_MISSING = object()
+
+
+def _key(value: Any) -> Optional[str]:
+    """Normalize a lookup value the way the column comparison sees it.
+
+    The reference columns are varchar/text, compared exactly as the
+    WHERE col = %s queries did: padding is significant, 'A1' and 'A1 '
+    are different keys.
+    """
+    return None if value is None else str(value)
+
+
+def _row_key(values: Tuple, key_count: int) -> Any:
+    """Get the lookup key of a row (or of the key values of a notification)."""
+    if key_count == 1:
+        return _key(values[0])
+    return tuple(_key(value) for value in values[:key_count])
+
+
+class LRUCache:
+    """Bounded mapping dropping the least recently used entries."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 class VelneoMappings:
-    """Seleccion de bases de datos"""
+    """Seleccion de bases de datos
+
+    The lookups on the small reference tables (REFERENCE_TABLES) are served
+    from memory: each table is loaded with one query the first time it is
+    used and kept for the life of the instance, one sync run. Articulos are
+    too many to load, they go through a bounded LRU of the single-row
+    queries instead.
+
+    With a snapshot file the reference tables also survive the run: a new
+    instance starts from the snapshot while the pg_stat_user_tables
+    counters of the tables haven't moved, otherwise it reads them from
+    Postgres as usual and rewrites the snapshot in the background.
+
+    With listen=True the cached keys are refreshed as the invalidation
+    triggers notify their changes, so a long-running process can keep its
+    cache indefinitely.
+    """
     
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, articulo_cache_size: int = ARTICULO_CACHE_SIZE, pool: Any = None,
+                 snapshot_path: Optional[str] = None, listen: bool = False):
         self.config = db_config
         # Initialize the connection pool
-        self.pool = DBConnectionPool(db_config, min_conn=2, max_conn=10)
-    
+        self.pool = pool or DBConnectionPool(db_config, min_conn=2, max_conn=10)
+        self._reference = {}
+        # Held while a table loads, so a notification for it waits and applies after
+        self._reference_lock = threading.RLock()
+        self._articulos = LRUCache(articulo_cache_size)
+        # Articulos resolved by prefetch_articulos for this run, None for the missing ones
+        self._articulo_ids = {}
+        # Held from the articulo queries to their write-back, same as _reference_lock
+        self._articulo_lock = threading.Lock()
 
-    def get_cliente(self):
+        # Listening before anything is cached, so no change is missed
+        self.listener = None
+        if listen:
+            self.start_listener()
+
+        self.snapshot = ReferenceSnapshot(snapshot_path) if snapshot_path else None
+        self._snapshot_thread = None
+        if self.snapshot:
+            self.load_snapshot()
+
+    def start_listener(self) -> bool:
+        """Keep the cache up to date from the invalidation triggers (see mappings_listener).
+
+        Returns:
+            True if the listener is running
+        """
+        from src.db.mappings_listener import MappingsListener
+
+        if self.listener is not None:
+            return True
+        listener = MappingsListener(self, self.config)
+        try:
+            listener.start()
+        except Exception as e:
+            logging.error(f"Velneo cache listener not started: {e}")
+            return False
+        self.listener = listener
+        return True
+
+    def close(self) -> None:
+        """Stop the cache listener, if any."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _fetch_all(self, query: str, params: Tuple = ()) -> Optional[List[Tuple]]:
+        """Run a query on a pooled connection.
+
+        Returns:
+            The rows, or None if the query failed
+        """
         conn = None
         cursor = None
         try:
@@ -27,21 +167,13 @@ class VelneoMappings:
             if not conn:
                 logging.error("Could not get database connection from pool")
                 return None
-                
+
             cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM clientes 
-            WHERE pvsi_clave = 'VTPUB'
-            """
-            
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
         except Exception as e:
-            logging.error(f"Error retrieving cliente Velneo ID: {e}")
+            logging.error(f"Error running reference query: {e}")
             return None
         finally:
             if cursor:
@@ -50,6 +182,215 @@ class VelneoMappings:
                 # Return connection to pool instead of closing
                 self.pool.release_connection(conn)
 
+    def _fetch_value(self, layout: Tuple, key_values: Tuple) -> Any:
+        """Query the value of one key of a table, the first row if it repeats.
+
+        Args:
+            layout: (relation, key columns, value column) of the table
+            key_values: Value of each key column
+
+        Returns:
+            The value, None if there is no row, _MISSING if the query failed
+        """
+        relation, key_columns, value_column = layout
+        condition = ' AND '.join(f"{column} = %s" for column in key_columns)
+        rows = self._fetch_all(
+            f"SELECT {value_column} FROM {relation} WHERE {condition} LIMIT 1", tuple(key_values)
+        )
+        if rows is None:
+            return _MISSING
+        return rows[0][0] if rows else None
+
+    def get_reference_table(self, table: str) -> Optional[Dict[Any, Any]]:
+        """Get a reference table as a dictionary of its lookup key to its value.
+
+        Loaded on first use. Like the LIMIT 1 queries it replaces, the first
+        row of a repeated key wins. A failed load isn't cached, the next
+        lookup tries again.
+
+        Args:
+            table: Name in REFERENCE_TABLES
+
+        Returns:
+            Dictionary keyed by the normalized key column (a tuple for
+            several), or None if the table couldn't be loaded
+        """
+        table_map = self._reference.get(table)
+        if table_map is not None:
+            return table_map
+
+        with self._reference_lock:
+            if table in self._reference:
+                return self._reference[table]
+            relation, key_columns, value_column = REFERENCE_TABLES[table]
+            rows = self._fetch_all(f"SELECT {', '.join(key_columns)}, {value_column} FROM {relation}")
+            if rows is None:
+                logging.error(f"Error loading reference table {table}")
+                return None
+            table_map = {}
+            for row in rows:
+                table_map.setdefault(_row_key(row, len(key_columns)), row[-1])
+            self._reference[table] = table_map
+            logging.info(f"Reference table {table} cached: {len(table_map)} keys")
+            return table_map
+
+    def lookup(self, table: str, *values: Any) -> Any:
+        """Look up the value of a key in a reference table.
+
+        Returns:
+            The value, or None if not found or the table couldn't be loaded
+        """
+        table_map = self.get_reference_table(table)
+        if table_map is None:
+            return None
+        return table_map.get(_row_key(values, len(values)))
+
+    def get_change_marker(self) -> Optional[str]:
+        """Get the change marker of the reference tables.
+
+        Built from the insert/update/delete counters Postgres keeps for every
+        table, one cheap query instead of reading the tables.
+
+        Returns:
+            Marker string, or None if the statistics couldn't be read
+        """
+        rows = self._fetch_all("""
+            SELECT relname, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relname = ANY(%s)
+            """, (sorted(REFERENCE_TABLES),))
+        if rows is None:
+            return None
+        return change_marker({row[0]: tuple(row[1:]) for row in rows})
+
+    def load_snapshot(self) -> bool:
+        """Start from the snapshot if the reference tables haven't changed since.
+
+        Otherwise the tables are loaded from Postgres on first use, and a
+        background thread reads all of them and rewrites the snapshot.
+
+        Returns:
+            True if the reference tables came from the snapshot
+        """
+        marker = self.get_change_marker()
+        if marker is None:
+            logging.warning("Reference tables change marker not available, snapshot not used")
+            return False
+
+        tables = self.snapshot.load(marker)
+        if tables is not None:
+            with self._reference_lock:
+                for table, table_map in tables.items():
+                    if table in REFERENCE_TABLES:
+                        self._reference.setdefault(table, table_map)
+            logging.info(f"Reference tables loaded from snapshot {self.snapshot.path}")
+            return True
+
+        self._snapshot_thread = threading.Thread(
+            target=self.refresh_snapshot, args=(marker,), name='velneo-snapshot', daemon=True
+        )
+        self._snapshot_thread.start()
+        return False
+
+    def refresh_snapshot(self, marker: Optional[str] = None) -> bool:
+        """Read every reference table and rewrite the snapshot.
+
+        Args:
+            marker: Change marker read before the tables, read now if None
+
+        Returns:
+            True if the snapshot was written
+        """
+        if not self.snapshot:
+            return False
+        marker = marker or self.get_change_marker()
+        if marker is None:
+            return False
+
+        tables = {}
+        for table in REFERENCE_TABLES:
+            table_map = self.get_reference_table(table)
+            if table_map is None:
+                return False
+            tables[table] = table_map
+
+        saved = self.snapshot.save(tables, marker)
+        if saved:
+            logging.info(f"Reference snapshot {self.snapshot.path} refreshed")
+        return saved
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Drop the cached reference data, all of it when no table is given.
+
+        Args:
+            table: Name in REFERENCE_TABLES or 'articulos'
+        """
+        if table is None or table == 'articulos':
+            with self._articulo_lock:
+                self._articulos.clear()
+                self._articulo_ids.clear()
+        if table != 'articulos':
+            with self._reference_lock:
+                if table is None:
+                    self._reference.clear()
+                else:
+                    self._reference.pop(table, None)
+
+    def apply_invalidation(self, table: str, keys: Optional[List[List[Any]]] = None) -> None:
+        """Bring the cached rows of some keys of a table up to date.
+
+        Called for the notifications of the invalidation triggers (see
+        mappings_listener). Articulos are evicted and queried again on their
+        next lookup. The keys of a loaded reference table are queried again
+        right away, since a missing key there means there is no row.
+
+        A notification for a table or articulos being loaded waits for the
+        load, so the change is applied over the rows it read and never
+        overwritten by them.
+
+        Args:
+            table: Name in REFERENCE_TABLES or 'articulos'
+            keys: Values of the key columns of each changed row, None when
+                the whole table changed (TRUNCATE)
+        """
+        if table == ARTICULOS_TABLE[0]:
+            if keys is None:
+                self.invalidate('articulos')
+                return
+            with self._articulo_lock:
+                for key_values in keys:
+                    key = _row_key(key_values, 1)
+                    self._articulos.pop(key)
+                    self._articulo_ids.pop(key, None)
+            return
+
+        if table not in REFERENCE_TABLES:
+            return
+        layout = REFERENCE_TABLES[table]
+        with self._reference_lock:
+            table_map = self._reference.get(table)
+            if table_map is None:
+                # Not loaded yet, read fresh on first use
+                return
+            if keys is None:
+                self.invalidate(table)
+                return
+            for key_values in keys:
+                value = self._fetch_value(layout, key_values)
+                if value is _MISSING:
+                    # The key can't be refreshed, reload the whole table on next use
+                    self.invalidate(table)
+                    return
+                key = _row_key(key_values, len(layout[1]))
+                if value is None:
+                    table_map.pop(key, None)
+                else:
+                    table_map[key] = value
+    
+
+    def get_cliente(self):
+        return self.lookup('clientes', 'VTPUB')
+
     def get_from_general_alm(self, store, plaza):
         """Get the Velneo ID for an almacen (warehouse) from general_misc table
         
@@ -60,156 +401,31 @@ class VelneoMappings:
         Returns:
             int: The Velneo ID (id_velneo) if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM public.almacen
-            WHERE tienda = %s and plaza = %s LIMIT 1; 
-            """
-            
-            cursor.execute(query, (store, plaza))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving almacen Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('almacen', store, plaza)
 
     def get_from_general_serie(self):
         """Get the Velneo ID for a serie from general_misc table
         
-        Args:
-            reference: The reference to look for (id_psi)
-            
         Returns:
             int: The Velneo ID (id_velneo) if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT id_velneo FROM general_misc 
-            WHERE title = 'serie'
-            """
-            
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving serie Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('general_misc', 'serie')
 
     def get_from_general_emp(self):
         """Get the Velneo ID for an empresa (company) from general_misc table
         
-        Args:
-            reference: The reference to look for (id_psi)
-            
         Returns:
             int: The Velneo ID (id_velneo) if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT id_velneo FROM general_misc 
-            WHERE title = 'empresa'
-            """
-            
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving empresa Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
-    
+        return self.lookup('general_misc', 'empresa')
+
     def get_from_general_div(self):
         """Get the Velneo ID for an division (company) from general_misc table
         
-        Args:
-            reference: The reference to look for (id_psi)
-            
         Returns:
             int: The Velneo ID (id_velneo) if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT id_velneo FROM general_misc 
-            WHERE title = 'division'
-            """
-            
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving division Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('general_misc', 'division')
 
     def get_metodo_pago(self, reference):
         """Get the Velneo ID for a payment method from metodo_pago table
@@ -220,106 +436,14 @@ class VelneoMappings:
         Returns:
             int: The velneo value if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM metodo_pago 
-            WHERE pvsi = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving payment method Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('metodo_pago', reference)
 
     def get_vendedor(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            # Convert reference to string to match the character varying column
-            str_reference = str(reference) if reference is not None else None
-            
-            query = """
-            SELECT velneo FROM vendedores 
-            WHERE pvsi_clave = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (str_reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving vendedor Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        # The reference is matched as a string, like the character varying column
+        return self.lookup('vendedores', reference)
 
     def get_pais(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT id FROM pais 
-            WHERE description = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving pais ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('pais', reference)
 
     def get_tipo_mov(self, reference):
         conn = None
@@ -354,217 +478,119 @@ class VelneoMappings:
                 # Return connection to pool instead of closing
                 self.pool.release_connection(conn)
 
+    def prefetch_articulos(self, references) -> int:
+        """Resolve the Velneo ID of many articulos with a single query.
+
+        The results are kept for the rest of the run and served by
+        get_articulo. The references without an articulo are reported once
+        here instead of on every detail line.
+
+        Args:
+            references: pvsi_clave values, repeated or empty ones are ignored
+
+        Returns:
+            Number of references resolved by the query
+        """
+        with self._articulo_lock:
+            wanted = {_key(reference) for reference in references if reference} - set(self._articulo_ids)
+            wanted.discard('')
+            if not wanted:
+                return 0
+
+            relation, (key_column,), value_column = ARTICULOS_TABLE
+            rows = self._fetch_all(
+                f"SELECT {key_column}, {value_column} FROM {relation} WHERE {key_column} = ANY(%s)", (sorted(wanted),)
+            )
+            if rows is None:
+                # get_articulo falls back to the single-row queries
+                logging.error(f"Error prefetching {len(wanted)} articulos")
+                return 0
+
+            found = {}
+            for pvsi_clave, velneo_id in rows:
+                found.setdefault(_key(pvsi_clave), velneo_id)
+            for reference in wanted:
+                self._articulo_ids[reference] = found.get(reference)
+
+        missing = sorted(wanted - found.keys())
+        if missing:
+            sample = ', '.join(missing[:20]) + (', ...' if len(missing) > 20 else '')
+            logging.warning(f"{len(missing)} articulos without a Velneo ID: {sample}")
+        return len(wanted) - len(missing)
+
     def get_articulo(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
+        prefetched = self._articulo_ids.get(_key(reference), _MISSING)
+        if prefetched is not _MISSING:
+            return prefetched
+
+        reference = _key(reference)
+        cached = self._articulos.get(reference, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        with self._articulo_lock:
+            value = self._fetch_value(ARTICULOS_TABLE, (reference,))
+            if value is _MISSING:
+                # Not cached, the next lookup queries again
+                logging.error(f"Error retrieving articulo Velneo ID for {reference}")
                 return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo_id FROM articulos 
-            WHERE pvsi_clave = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving articulo Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+            self._articulos.put(reference, value)
+        return value
 
-    
     def get_tipo_iva(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM iva 
-            WHERE pvsi = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving tipo_iva Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('iva', reference)
 
     def get_from_general_plaza(self):
         """Get the Velneo ID for an plaza (company) from general_misc table
         
-        Args:
-            reference: The reference to look for (id_psi)
-            
         Returns:
             int: The Velneo ID (id_velneo) if found, None otherwise
         """
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT id_velneo FROM general_misc 
-            WHERE title = 'plaza'
-            """
-            
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            logging.error(f"Error retrieving plaza Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('general_misc', 'plaza')
 
     def get_caja_banco(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM caja_banco 
-            WHERE pvsi = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving caja_banco Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('caja_banco', reference)
 
     def get_forma_pago(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT velneo FROM forma_pago 
-            WHERE pvsi = %s
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving forma_pago Velneo ID: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        return self.lookup('forma_pago', reference)
 
     def get_forma_pago_caja_banco(self, reference):
-        conn = None
-        cursor = None
-        try:
-            # Get connection from pool
-            conn = self.pool.get_connection()
-            if not conn:
-                logging.error("Could not get database connection from pool")
-                return None
-                
-            cursor = conn.cursor()
-           
-            # Single query with a fallback to default_value if no match found
-            query = """
-            SELECT forma_pago FROM forma_pago_caja_banco 
-            WHERE caja_banco = %s
-            UNION ALL
-            SELECT forma_pago FROM forma_pago_caja_banco 
-            WHERE caja_banco = 'default_value'
-            LIMIT 1
-            """
-            
-            cursor.execute(query, (reference,))
-            result = cursor.fetchone()
-            
-            return result[0] if result else None
-        
-        except Exception as e:
-            logging.error(f"Error retrieving forma_pago Velneo ID: {e}")
+        table_map = self.get_reference_table('forma_pago_caja_banco')
+        if table_map is None:
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                # Return connection to pool instead of closing
-                self.pool.release_connection(conn)
+        # Falls back to the 'default_value' row when the caja_banco has none
+        value = table_map.get(_key(reference), _MISSING)
+        if value is _MISSING:
+            value = table_map.get('default_value')
+        return value
+
+    def get_fac_ids(self, references) -> Dict[Any, Any]:
+        """Get the estado_factura_venta id of many folios with a single query.
+
+        Args:
+            references: Folios, repeated or empty ones are ignored
+
+        Returns:
+            Dictionary of folio to id, 0 for the folios not found (as
+            get_fac_id), or None if the query failed
+        """
+        wanted = {reference for reference in references if reference}
+        if not wanted:
+            return {}
+
+        rows = self._fetch_all("""
+            SELECT folio, id FROM estado_factura_venta
+            WHERE folio = ANY(%s)
+            """, ([str(reference) for reference in wanted],))
+        if rows is None:
+            logging.error(f"Error retrieving the ids of {len(wanted)} folios")
+            return None
+
+        found = {}
+        for folio, fac_id in rows:
+            found.setdefault(str(folio), fac_id)
+        return {reference: found.get(str(reference), 0) for reference in wanted}
 
-            
     def get_fac_id(self, reference):
         conn = None
         cursor = None
@@ -0,0 +1,178 @@
+import struct
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from .backends import ReaderBackend
+from .connection import DBFConnection
+from .converters import DataConverter, CLR_FIELD_TYPES
+from .filters import build_aof_expression, membership_filters
+from .schema import TableSchema, resolve_table_path, schema_cache
+
+
+class AdsBackend(ReaderBackend):
+    """Backend reading tables through the Advantage .NET data provider."""
+
+    name = 'ads'
+
+    def __init__(self, data_source: str, encryption_password: str):
+        """
+        Initialize the Advantage backend.
+
+        Args:
+            data_source: Path to the DBF file
+            encryption_password: Password for encrypted DBF
+        """
+        self.connection = DBFConnection(data_source, encryption_password)
+        self.converter = DataConverter()
+        self._session_depth = 0
+
+    def open_session(self) -> None:
+        if self._session_depth == 0:
+            self.connection.connect()
+        self._session_depth += 1
+
+    def close_session(self) -> None:
+        self._session_depth -= 1
+        if self._session_depth == 0:
+            self.connection.close()
+
+    @contextmanager
+    def _connect(self):
+        """Get an open connection: the session one if there is a session,
+        otherwise one that is closed after the read."""
+        if self._session_depth:
+            yield self.connection.ensure_open()
+        else:
+            with self.connection as conn:
+                yield conn
+
+    def _execute(self, conn: DBFConnection, table_name: str) -> Any:
+        from System.Data import CommandType
+
+        # Create command with TableDirect for better performance
+        cmd = conn.conn.CreateCommand()
+        cmd.CommandType = CommandType.TableDirect
+        cmd.CommandText = table_name
+        cmd.AdsOptimizedFilters = True  # Enable AOF for better performance
+        return cmd.ExecuteExtendedReader()
+
+    def _open_reader(self, conn: DBFConnection, table_name: str) -> Any:
+        try:
+            return self._execute(conn, table_name)
+        except Exception as e:
+            if not self._session_depth:
+                raise
+            # The shared connection may have gone stale since the last read
+            print(f"Read of {table_name} failed on the session connection, reconnecting: {str(e)}")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn.connect()
+            return self._execute(conn, table_name)
+
+    def iter_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                   fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        # The connection stays open while the caller consumes the generator
+        with self._connect() as conn:
+            reader = self._open_reader(conn, table_name)
+            try:
+                yield from self._read(table_name, reader, limit, filters, fields)
+            finally:
+                # The connection may outlive the read, release the table now
+                reader.Close()
+
+    def get_schema(self, table_name: str) -> Optional[TableSchema]:
+        try:
+            return schema_cache.get(resolve_table_path(self.connection.data_source, table_name))
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Schema of {table_name} not cached: {str(e)}")
+            return None
+
+    def _provider_columns(self, table_name: str, reader: Any) -> List[Tuple[int, str, Optional[str]]]:
+        """Get the ordinal, name and type letter of the columns of an open reader.
+
+        Resolved once per version of the table file (see SchemaCache)
+        instead of calling GetName/GetFieldType on every read.
+        """
+        def build():
+            return [
+                (i, reader.GetName(i), CLR_FIELD_TYPES.get(reader.GetFieldType(i).Name))
+                for i in range(reader.FieldCount)
+            ]
+        schema = self.get_schema(table_name)
+        return schema.derived('ads_columns', build) if schema else build()
+
+    def _cached_columns(self, table_name: str) -> List[Tuple[int, str, Optional[str]]]:
+        """Get the provider columns of a table, opening it only if they aren't cached."""
+        schema = self.get_schema(table_name)
+        columns = schema.get_derived('ads_columns') if schema else None
+        if columns is not None:
+            return columns
+        with self._connect() as conn:
+            reader = conn.get_reader(table_name)
+            try:
+                return self._provider_columns(table_name, reader)
+            finally:
+                reader.Close()
+
+    def _read(self, table_name: str, reader: Any, limit: Optional[int], filters: Optional[List[Dict[str, Any]]],
+              fields: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+        # Apply filters if any
+        if filters:
+            filter_expr = build_aof_expression(filters)
+            if filter_expr:
+                try:
+                    reader.Filter = filter_expr
+                except Exception as e:
+                    print(f"\nFilter error: {str(e)}")
+                    print(f"Filter expression: {filter_expr}")
+                    raise
+
+        # Resolve the ordinals and converters of the projected columns once per read
+        columns = self._provider_columns(table_name, reader)
+        if fields:
+            wanted = {name.upper() for name in fields}
+            columns = [column for column in columns if column[1].upper() in wanted]
+        columns = [
+            (i, name, self.converter.column_converter(field_type))
+            for i, name, field_type in columns
+        ]
+
+        # 'in' conditions only narrow the AOF to a key range, check the
+        # exact membership against a hash set here
+        membership = [
+            (reader.GetOrdinal(field), values) for field, values in membership_filters(filters)
+        ]
+        if any(not values for _, values in membership):
+            return
+
+        # Process results
+        count = 0
+        while reader.Read():
+
+            if limit and count >= limit:
+                break
+
+            if membership and not all(
+                str(self.converter.convert_value(reader.GetValue(i))).strip() in values
+                for i, values in membership
+            ):
+                continue
+
+            record = {}
+            for i, field_name, convert in columns:
+                record[field_name] = convert(reader.GetValue(i))
+
+            yield record
+            count += 1
+
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        columns = self._cached_columns(table_name)
+        return {
+            'field_count': len(columns),
+            'columns': [name for _, name, _ in columns]
+        }
+
+    def get_field_types(self, table_name: str) -> Dict[str, str]:
+        return {name: field_type for _, name, field_type in self._cached_columns(table_name) if field_type}
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Optional, Iterator
+
+
+class ReaderBackend:
+    """Interface for the table access layer used by DBFReader."""
+
+    name = None
+
+    def open_session(self) -> None:
+        """Start a session: resources stay open and are shared by the reads
+        until close_session. Sessions may be nested."""
+
+    def close_session(self) -> None:
+        """End a session started with open_session."""
+
+    def iter_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                   fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the records of a table with optional filters.
+
+        Args:
+            table_name: Name of the table to read
+            limit: Optional limit on number of records to read
+            filters: Optional list of filter conditions
+            fields: Optional list of columns to fetch, all columns by default.
+                Columns missing from the table are ignored
+
+        Yields:
+            Records as dictionaries
+        """
+        raise NotImplementedError
+
+    def read_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                   fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Read records from a table with optional filters.
+
+        Args:
+            table_name: Name of the table to read
+            limit: Optional limit on number of records to read
+            filters: Optional list of filter conditions
+            fields: Optional list of columns to fetch, all columns by default
+
+        Returns:
+            List of records as dictionaries
+        """
+        return list(self.iter_table(table_name, limit, filters, fields))
+
+    def read_columns(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                     fields: Optional[List[str]] = None, strings: str = 'object') -> Any:
+        """Read records from a table into one NumPy array per column.
+
+        Args:
+            table_name: Name of the table to read
+            limit: Optional limit on number of records to read
+            filters: Optional list of filter conditions
+            fields: Optional list of columns to fetch, all columns by default
+            strings: 'object' for str arrays or 'bytes' for fixed-width byte arrays
+
+        Returns:
+            ColumnarBatch with the matching records
+        """
+        from .columnar import ColumnarBatch
+        records = list(self.iter_table(table_name, limit, filters, fields))
+        return ColumnarBatch.from_records(records, self.get_field_types(table_name), fields, strings)
+
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        """Get information about table structure.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            Dictionary containing table metadata
+        """
+        raise NotImplementedError
+
+    def get_schema(self, table_name: str) -> Any:
+        """Get the cached header layout of a table (see schema.SchemaCache).
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            TableSchema with the field names, types, offsets and record
+            length, or None if the table file can't be read directly
+        """
+        return None
+
+    def get_field_types(self, table_name: str) -> Dict[str, str]:
+        """Get the DBF type letter (C, N, D, L, T, ...) of each column.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            Dictionary of column name to type letter. Columns whose type
+            can't be determined are left out
+        """
+        return {}
+
+
+def get_backend(name: str, data_source: str, encryption_password: str) -> ReaderBackend:
+    """Create a reader backend by name.
+
+    Args:
+        name: Backend name ('ads' or 'native')
+        data_source: Path to the DBF files
+        encryption_password: Password for encrypted DBF
+
+    Returns:
+        The backend instance
+    """
+    name = (name or 'ads').lower()
+    # Imported here so each backend only pulls in its own dependencies
+    if name == 'ads':
+        from .ads import AdsBackend
+        return AdsBackend(data_source, encryption_password)
+    if name == 'native':
+        from .native import NativeBackend
+        return NativeBackend(data_source, encryption_password)
+    raise ValueError(f"Unknown DBF backend '{name}'. Use 'ads' or 'native'")
@@ -0,0 +1,259 @@
+import mmap
+import re
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+NODE_SIZE = 512
+TAG_HEADER_SIZE = 1024
+NO_NODE = 0xFFFFFFFF
+
+# Node attribute bits
+NODE_ROOT = 0x01
+NODE_LEAF = 0x02
+
+# Index option bits of a tag header
+OPTION_FOR_CLAUSE = 0x08
+
+# Offset between a Python date ordinal and a Julian day number
+JULIAN_DAY_OFFSET = 1721425
+
+DTOS_EXPRESSION = re.compile(r'^DTOS\(\s*(\w+)\s*\)$')
+
+
+def encode_double(value: float) -> bytes:
+    """Encode a number the way FoxPro stores numeric/date keys.
+
+    The big-endian IEEE double is adjusted so that the byte order of the
+    keys matches the numeric order.
+
+    Args:
+        value: Number to encode
+
+    Returns:
+        8 byte key
+    """
+    raw = bytearray(struct.pack('>d', float(value)))
+    if value >= 0:
+        raw[0] ^= 0x80
+    else:
+        raw = bytearray(b ^ 0xFF for b in raw)
+    return bytes(raw)
+
+
+class CDXTag:
+    """A tag (single index order) inside a compound CDX file."""
+
+    def __init__(self, index: 'CDXIndex', name: str, header_offset: int):
+        self.index = index
+        self.name = name
+        self.header_offset = header_offset
+
+        header = index.buffer[header_offset:header_offset + TAG_HEADER_SIZE]
+        self.root = struct.unpack('<I', header[0:4])[0]
+        self.key_length = struct.unpack('<H', header[12:14])[0]
+        self.options = header[14]
+        self.descending = struct.unpack('<H', header[502:504])[0] != 0
+        for_length = struct.unpack('<H', header[506:508])[0]
+        expression_length = struct.unpack('<H', header[510:512])[0]
+        pool = header[512:TAG_HEADER_SIZE]
+        self.expression = pool[:expression_length].split(b'\x00', 1)[0].decode('ascii', errors='replace').strip()
+        self.for_expression = pool[expression_length:expression_length + for_length].split(b'\x00', 1)[0].decode('ascii', errors='replace').strip()
+
+        # Set by CDXIndex.tag_for_field
+        self.key_kind = None
+        self.encoding = None
+
+    @property
+    def trail_byte(self) -> bytes:
+        return b' ' if self.key_kind in ('char', 'dtos', None) else b'\x00'
+
+    def make_key(self, value: Any) -> bytes:
+        """Build the key bytes for a comparable value of the indexed field.
+
+        Args:
+            value: str for character tags, date for date/DTOS tags, number for numeric tags
+
+        Returns:
+            Key bytes of key_length
+        """
+        if self.key_kind == 'char':
+            key = str(value).encode(self.encoding, errors='replace')
+            return key[:self.key_length].ljust(self.key_length, b' ')
+        if self.key_kind == 'dtos':
+            return value.strftime('%Y%m%d').encode('ascii').ljust(self.key_length, b' ')
+        if self.key_kind == 'date':
+            return encode_double(value.toordinal() + JULIAN_DAY_OFFSET)
+        if self.key_kind == 'number':
+            return encode_double(value)
+        raise ValueError(f"Tag {self.name} can't be used for seeks")
+
+    def iter_from(self, key: Optional[bytes] = None) -> Iterator[Tuple[bytes, int]]:
+        """Iterate over the index entries in key order, starting at the first key >= key.
+
+        Args:
+            key: Key to seek, the first entry when None
+
+        Yields:
+            Tuples of (key bytes, record number)
+        """
+        node_offset = self._find_leaf(key)
+        while node_offset != NO_NODE:
+            node = self.index.node(node_offset)
+            for entry_key, recno in self._leaf_entries(node):
+                if key is None or entry_key >= key:
+                    yield entry_key, recno
+            node_offset = struct.unpack('<I', node[8:12])[0]
+
+    def range_recnos(self, low: bytes, high: bytes) -> List[int]:
+        """Record numbers with low <= key <= high."""
+        recnos = []
+        for entry_key, recno in self.iter_from(low):
+            if entry_key > high:
+                break
+            recnos.append(recno)
+        return recnos
+
+    def seek_recnos(self, key: bytes) -> List[int]:
+        """Record numbers with key equal to key."""
+        return self.range_recnos(key, key)
+
+    def _find_leaf(self, key: Optional[bytes]) -> int:
+        node_offset = self.root
+        entry_length = self.key_length + 8
+        while True:
+            node = self.index.node(node_offset)
+            attributes, count = struct.unpack('<HH', node[0:4])
+            if attributes & NODE_LEAF or count == 0:
+                return node_offset
+
+            # Interior keys hold the highest key of their child; descend into
+            # the first child that may contain keys >= key
+            child = None
+            for i in range(count):
+                position = 12 + i * entry_length
+                child = struct.unpack('>I', node[position + self.key_length + 4:position + entry_length])[0]
+                if key is None or node[position:position + self.key_length] >= key:
+                    break
+            node_offset = child
+
+    def _leaf_entries(self, node: bytes) -> Iterator[Tuple[bytes, int]]:
+        count = struct.unpack('<H', node[2:4])[0]
+        recno_mask = struct.unpack('<I', node[14:18])[0]
+        dup_mask = node[18]
+        trail_mask = node[19]
+        recno_bits = node[20]
+        dup_bits = node[21]
+        entry_bytes = node[23]
+        key_length = self.key_length
+        trail_byte = self.trail_byte
+
+        key = b''
+        key_position = NODE_SIZE
+        for i in range(count):
+            position = 24 + i * entry_bytes
+            info = int.from_bytes(node[position:position + entry_bytes], 'little')
+            recno = info & recno_mask
+            duplicates = (info >> recno_bits) & dup_mask
+            trailing = (info >> (recno_bits + dup_bits)) & trail_mask
+            new_bytes = key_length - duplicates - trailing
+            key_position -= new_bytes
+            key = key[:duplicates] + node[key_position:key_position + new_bytes] + trail_byte * trailing
+            yield key, recno
+
+
+class CDXIndex:
+    """Read-only access to a FoxPro/Advantage compound (CDX) index file."""
+
+    def __init__(self, path: str):
+        """
+        Open the index and read its tag directory.
+
+        Args:
+            path: Path to the CDX file
+        """
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+
+        # The file starts with a tag whose keys are the tag names and whose
+        # record numbers are the offsets of the tag headers
+        directory = CDXTag(self, '', 0)
+        self.tags: Dict[str, CDXTag] = {}
+        for key, header_offset in directory.iter_from():
+            name = key.rstrip(b' \x00').decode('ascii', errors='replace').upper()
+            self.tags[name] = CDXTag(self, name, header_offset)
+
+    def node(self, offset: int) -> bytes:
+        """Get the bytes of the node at offset."""
+        return self.buffer[offset:offset + NODE_SIZE]
+
+    def tag_for_field(self, table: Any, field: Any) -> Optional[CDXTag]:
+        """Find a tag usable for seeks on a table field.
+
+        A tag qualifies when its expression is the bare field (or DTOS() of a
+        date field), it is ascending, has no FOR clause and its first key
+        matches the record it points to, which rules out collations that
+        don't store the raw field bytes.
+
+        Args:
+            table: DBFTableFile the index belongs to
+            field: DBFField to seek on
+
+        Returns:
+            The usable tag or None
+        """
+        for tag in self.tags.values():
+            if tag.descending or tag.for_expression or tag.options & OPTION_FOR_CLAUSE:
+                continue
+
+            expression = tag.expression.upper().replace(' ', '')
+            dtos = DTOS_EXPRESSION.match(expression)
+            if expression == field.name.upper():
+                if field.type == 'C' and tag.key_length == field.length:
+                    tag.key_kind = 'char'
+                elif field.type == 'D' and tag.key_length == 8:
+                    tag.key_kind = 'date'
+                elif field.type in ('N', 'F') and tag.key_length == 8:
+                    tag.key_kind = 'number'
+                else:
+                    continue
+            elif dtos and dtos.group(1) == field.name.upper() and field.type == 'D':
+                tag.key_kind = 'dtos'
+            else:
+                continue
+
+            tag.encoding = table.encoding
+            if self._verify(tag, table, field):
+                return tag
+        return None
+
+    def _verify(self, tag: CDXTag, table: Any, field: Any) -> bool:
+        first = next(tag.iter_from(), None)
+        if first is None:
+            return True
+        key, recno = first
+        view = table.record_at(recno)
+        if view is None:
+            return False
+        value = view.comparable(field)
+        if value is None:
+            return key.strip(b' \x00') == b'' or tag.key_kind in ('date', 'number')
+        try:
+            return tag.make_key(value) == key
+        except (ValueError, AttributeError):
+            return False
+
+    def close(self) -> None:
+        """Release the mapping and the file handle."""
+        self.buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
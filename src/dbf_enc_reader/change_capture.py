@@ -0,0 +1,238 @@
+import json
+import mmap
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .native import NativeBackend
+
+# Records covered by each CRC32 of a table mark
+BLOCK_RECORDS = 1024
+
+STATE_VERSION = 1
+
+
+class TableMark:
+    """High-water mark of a DBF table after a sync.
+
+    Keeps the header geometry, the file size/mtime, the last record number
+    and a CRC32 per block of BLOCK_RECORDS records, so the next run can tell
+    appended records from modified ones without decoding the table.
+    """
+
+    def __init__(self, record_count: int, header_length: int, record_length: int,
+                 size: int, mtime_ns: int, block_crcs: List[int]):
+        self.record_count = record_count
+        self.header_length = header_length
+        self.record_length = record_length
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.block_crcs = block_crcs
+        # CRC32 of the records of the previous mark's last (partial) block,
+        # set by capture(previous=...) and not persisted
+        self.previous_tail_crc: Optional[int] = None
+
+    @property
+    def last_recno(self) -> int:
+        return self.record_count
+
+    @classmethod
+    def capture(cls, table: Any, previous: Optional['TableMark'] = None) -> 'TableMark':
+        """Take the mark of a table as it is on disk now.
+
+        Args:
+            table: DBFTableFile to mark
+            previous: Mark of the last sync. When its last block was partial,
+                the same records are checksummed again so appending to that
+                block doesn't flag the records already synced
+
+        Returns:
+            The table mark
+        """
+        stat = os.stat(table.path)
+        record_count = table.available_records()
+        record_length = table.record_length
+        block_crcs = []
+        tail_crc = None
+        if record_count:
+            block_size = BLOCK_RECORDS * record_length
+            end = table.header_length + record_count * record_length
+            with open(table.path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    view = memoryview(buffer)
+                    try:
+                        for start in range(table.header_length, end, block_size):
+                            block_crcs.append(zlib.crc32(view[start:min(start + block_size, end)]))
+                        if previous and previous.record_count % BLOCK_RECORDS and previous.record_count <= record_count:
+                            tail_start = table.header_length + (previous.record_count // BLOCK_RECORDS) * block_size
+                            tail_end = table.header_length + previous.record_count * record_length
+                            tail_crc = zlib.crc32(view[tail_start:tail_end])
+                    finally:
+                        view.release()
+        mark = cls(record_count, table.header_length, record_length,
+                   stat.st_size, stat.st_mtime_ns, block_crcs)
+        mark.previous_tail_crc = tail_crc
+        return mark
+
+    def changed_recnos(self, previous: Optional['TableMark']) -> Optional[List[int]]:
+        """Get the records appended or modified since a previous mark.
+
+        Args:
+            previous: Mark of the last sync
+
+        Returns:
+            Sorted record numbers to read again, or None when the table must
+            be scanned in full (no previous mark, restructured, packed or
+            truncated table)
+        """
+        if previous is None:
+            return None
+        if (self.header_length, self.record_length) != (previous.header_length, previous.record_length):
+            return None
+        if self.record_count < previous.record_count or self.size < previous.size:
+            # Records were removed (PACK/ZAP) or the file was truncated
+            return None
+        if (self.record_count, self.size, self.mtime_ns) == (previous.record_count, previous.size, previous.mtime_ns):
+            return []
+
+        recnos = []
+        tail_block = len(previous.block_crcs) - 1 if previous.record_count % BLOCK_RECORDS else -1
+        for i, crc in enumerate(previous.block_crcs):
+            current = self.block_crcs[i] if i < len(self.block_crcs) else None
+            if i == tail_block and self.previous_tail_crc is not None:
+                current = self.previous_tail_crc
+            if current != crc:
+                first = i * BLOCK_RECORDS + 1
+                recnos.extend(range(first, min(first + BLOCK_RECORDS, previous.record_count + 1)))
+        recnos.extend(range(previous.record_count + 1, self.record_count + 1))
+        return recnos
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'record_count': self.record_count,
+            'header_length': self.header_length,
+            'record_length': self.record_length,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'block_crcs': self.block_crcs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TableMark':
+        return cls(data['record_count'], data['header_length'], data['record_length'],
+                   data['size'], data['mtime_ns'], data['block_crcs'])
+
+
+class ChangeStateStore:
+    """Local JSON file with the table marks of the last successful sync."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path to the state file, created on the first save
+        """
+        self.path = Path(path)
+
+    def load(self) -> Dict[str, Any]:
+        """Load the saved state.
+
+        Returns:
+            The state, or an empty dict if there is none or it can't be read
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable change state {self.path}: {str(e)}")
+            return {}
+        return state if state.get('version') == STATE_VERSION else {}
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """Save the state, replacing the file atomically."""
+        state = dict(state, version=STATE_VERSION)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+
+
+class ChangeCapture:
+    """Incremental change capture over the DBF tables of a sync.
+
+    Usage:
+        capture = ChangeCapture(source_directory, tables, store)
+        changes = capture.detect(start_date, end_date)   # before reading the tables
+        ...sync...
+        capture.commit(pending_folios)                    # after the sync succeeded
+    """
+
+    def __init__(self, data_source: str, tables: List[str], store: ChangeStateStore):
+        """
+        Args:
+            data_source: Directory containing the DBF files
+            tables: Tables to track
+            store: Where the marks are kept between runs
+        """
+        self.backend = NativeBackend(data_source)
+        self.tables = tables
+        self.store = store
+        self._pending: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _window(start_date: Any, end_date: Any) -> List[str]:
+        return [str(start_date), str(end_date)]
+
+    def detect(self, start_date: Any, end_date: Any) -> Optional[Dict[str, Any]]:
+        """Take the current marks and compare them with the last sync.
+
+        Args:
+            start_date: Start of the sync window
+            end_date: End of the sync window
+
+        Returns:
+            None when a full scan is needed (first run, different window, a
+            table packed/truncated/restructured), otherwise a dictionary with
+            'tables' (table -> changed record numbers) and 'pending_folios'
+            (folios left with actions by the last sync)
+        """
+        state = self.store.load()
+        previous_marks = state.get('tables', {})
+        marks = {}
+        for table in self.tables:
+            previous = previous_marks.get(table)
+            marks[table] = TableMark.capture(
+                self.backend.open_table(table), TableMark.from_dict(previous) if previous else None
+            )
+        window = self._window(start_date, end_date)
+        self._pending = {'window': window, 'tables': {t: m.to_dict() for t, m in marks.items()}}
+
+        if state.get('window') != window:
+            print("Change capture: no marks for this date window, full scan")
+            return None
+
+        changes = {}
+        for table, mark in marks.items():
+            previous = previous_marks.get(table)
+            recnos = mark.changed_recnos(TableMark.from_dict(previous) if previous else None)
+            if recnos is None:
+                print(f"Change capture: {table} was packed, truncated or not marked, full scan")
+                return None
+            changes[table] = recnos
+            print(f"Change capture: {len(recnos)} records to check in {table}")
+        return {'tables': changes, 'pending_folios': state.get('pending_folios', [])}
+
+    def commit(self, pending_folios: Optional[List[str]] = None) -> None:
+        """Save the marks taken by detect once the sync succeeded.
+
+        Args:
+            pending_folios: Folios that still needed actions, checked again
+                on the next run
+        """
+        if self._pending is None:
+            return
+        self.store.save(dict(self._pending, pending_folios=sorted(set(pending_folios or []))))
+        self._pending = None
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+NUMERIC_TYPES = ('N', 'F', 'B', 'Y')
+DATE_TYPES = ('D', 'T')
+
+
+def import_numpy():
+    """Import NumPy, which is only needed for columnar reads.
+
+    Returns:
+        The numpy module
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for columnar reads (output='columns'). Install it with: pip install numpy")
+    return numpy
+
+
+def _parse_reader_datetime(value: Any) -> Optional[datetime]:
+    """Parse a date as rendered by the readers ("30/04/2025 12:00:00 a. m.")."""
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip() if value is not None else ''
+    if not text:
+        return None
+    text = text.replace('a. m.', 'AM').replace('p. m.', 'PM')
+    for fmt in ('%d/%m/%Y %I:%M:%S %p', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def column_from_values(values: List[Any], dbf_type: Optional[str], strings: str = 'object') -> Any:
+    """Build the array of a column from decoded reader values.
+
+    Args:
+        values: Values of the column, as yielded by iter_table
+        dbf_type: DBF type letter of the column
+        strings: 'object' for arrays of str or 'bytes' for fixed-width
+            UTF-8 byte arrays
+
+    Returns:
+        float64 array for numeric columns (NaN for blanks), int64 for integer
+        columns, bool for logical columns, datetime64 for date columns (NaT
+        for blanks) and a string array otherwise
+    """
+    np = import_numpy()
+    if dbf_type in NUMERIC_TYPES:
+        column = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except (TypeError, ValueError):
+                column[i] = np.nan
+        return column
+    if dbf_type == 'I':
+        return np.array([int(v) if v not in ('', None) else 0 for v in values], dtype=np.int64)
+    if dbf_type == 'L':
+        return np.array([v is True for v in values], dtype=bool)
+    if dbf_type in DATE_TYPES:
+        unit = 'datetime64[D]' if dbf_type == 'D' else 'datetime64[ms]'
+        stamps = [_parse_reader_datetime(v) for v in values]
+        return np.array([s if s is not None else 'NaT' for s in stamps], dtype=unit)
+    if strings == 'bytes':
+        return np.array([(v if v is not None else '').encode('utf-8') for v in values], dtype=bytes)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+class ColumnarBatch:
+    """Result of a columnar read: one NumPy array per column.
+
+    Numeric columns are float64 (NaN for blanks) or int64, dates are
+    datetime64 and strings are object arrays, or fixed-width bytes arrays
+    when read with strings='bytes'.
+    """
+
+    def __init__(self, columns: Dict[str, Any], field_types: Optional[Dict[str, str]] = None):
+        """
+        Wrap the arrays of a read.
+
+        Args:
+            columns: Dictionary of column name to array, all of the same length
+            field_types: DBF type letter of each column
+        """
+        self.columns = columns
+        self.field_types = field_types or {}
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], field_types: Dict[str, str],
+                     fields: Optional[List[str]] = None, strings: str = 'object') -> 'ColumnarBatch':
+        """Build a batch from dictionary records.
+
+        Args:
+            records: Records as yielded by iter_table
+            field_types: DBF type letter of each column
+            fields: Columns the read was projected to, used when there are no records
+            strings: 'object' or 'bytes', see column_from_values
+
+        Returns:
+            The columnar batch
+        """
+        if records:
+            names = list(records[0])
+        else:
+            wanted = {name.upper() for name in fields or field_types}
+            names = [name for name in field_types if name.upper() in wanted]
+
+        columns = {
+            name: column_from_values([record.get(name) for record in records], field_types.get(name), strings)
+            for name in names
+        }
+        return cls(columns, {name: field_types.get(name) for name in names})
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Convert the batch back to a list of dictionaries of NumPy scalars.
+
+        Returns:
+            List of records
+        """
+        names = self.names
+        return [dict(zip(names, values)) for values in zip(*(self.columns[name] for name in names))]
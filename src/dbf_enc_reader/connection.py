@@ -1,4 +1,3 @@
-import clr
 import os
 from pathlib import Path
 from typing import Optional
@@ -15,6 +14,8 @@ class DBFConnection:
             path: Full path to Advantage.Data.Provider.dll
         """
         try:
+            # Imported here so pythonnet is only required by the Advantage backend
+            import clr
             clr.AddReference(path)
             cls._dll_loaded = True
         except Exception as e:
@@ -87,7 +88,7 @@ class DBFConnection:
         Returns:
             Data reader object
         """
-        if not self.conn or not hasattr(self.conn, 'State') or self.conn.State != 'Open':
+        if not self.is_open():
             self.connect()
 
         try:
@@ -108,6 +109,40 @@ class DBFConnection:
         except Exception as e:
             raise RuntimeError(f"Failed to execute query: {str(e)}")
 
+    def is_open(self) -> bool:
+        """Check if the connection is open and usable.
+
+        Returns:
+            True if the provider reports the connection as open
+        """
+        if not self.conn or not hasattr(self.conn, 'State'):
+            return False
+        try:
+            from System.Data import ConnectionState
+            return self.conn.State == ConnectionState.Open
+        except ImportError:
+            return str(self.conn.State) == 'Open'
+        except Exception:
+            # A broken connection may fail even to report its state
+            return False
+
+    def ensure_open(self) -> 'DBFConnection':
+        """Health-check the connection and reopen it when it was lost.
+
+        Returns:
+            self, connected
+        """
+        if not self.is_open():
+            if self.conn is not None:
+                print("DBF connection lost, reconnecting")
+                try:
+                    self.close()
+                except Exception:
+                    pass
+                self.reader = None
+            self.connect()
+        return self
+
     def close(self) -> None:
         """Close all connections and readers."""
         if self.reader:
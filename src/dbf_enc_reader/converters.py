@@ -1,5 +1,41 @@
 from decimal import Decimal
-from typing import Any
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Reference numbers mapped as 'number' that must keep their leading zeros
+KEEP_AS_STRING_PREFIXES = ('NO_REFEREN', 'NUMERO_A')
+
+# .NET type names reported by the Advantage provider -> DBF type letter
+CLR_FIELD_TYPES = {
+    'String': 'C',
+    'Decimal': 'N',
+    'Double': 'N',
+    'DateTime': 'D',
+    'Boolean': 'L',
+    'Int16': 'I',
+    'Int32': 'I',
+    'Int64': 'I',
+}
+
+
+def _keep_value(value: Any) -> Any:
+    return value
+
+
+def _to_number(value: Any) -> Any:
+    try:
+        if value.__class__ is str:
+            return float(value) if '.' in value else int(value)
+        return float(value) if '.' in str(value) else int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _to_int(value: Any) -> Any:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
 
 class DataConverter:
     def smart_trim(self, value: Any) -> Any:
@@ -39,3 +75,126 @@ class DataConverter:
             
         # Apply smart trimming after conversion
         return self.smart_trim(value)
+
+    def column_converter(self, dbf_type: Optional[str] = None) -> Callable[[Any], Any]:
+        """
+        Get the converter for the raw values of a column read through the provider.
+        
+        Character columns come back as Python strings and only need trimming,
+        so convert_value (and its .NET checks) is kept for NULLs and the
+        other types.
+        
+        Args:
+            dbf_type: DBF type letter of the column (see CLR_FIELD_TYPES)
+            
+        Returns:
+            Callable converting one value
+        """
+        if dbf_type != 'C':
+            return self.convert_value
+        convert_value = self.convert_value
+
+        def convert_text(value):
+            if value.__class__ is str:
+                return value.strip()
+            return convert_value(value)
+        return convert_text
+
+    def field_converter(self, dbf_field: str, mapping_type: str, dbf_type: Optional[str] = None) -> Callable[[Any], Any]:
+        """
+        Get the converter from a reader value to the mapped value of a field.
+        
+        'number' mappings become int, or float when the value has decimals,
+        and 0 when it can't be parsed; reference numbers (NO_REFEREN,
+        NUMERO_A) keep their leading zeros as strings. Any other mapping keeps
+        the value as the reader produced it (strings are already trimmed).
+        
+        Args:
+            dbf_field: DBF column name
+            mapping_type: 'type' of the field in the mappings file
+            dbf_type: DBF type letter of the column, if known
+            
+        Returns:
+            Callable converting one value
+        """
+        if mapping_type != 'number' or dbf_field.startswith(KEEP_AS_STRING_PREFIXES):
+            return _keep_value
+        if dbf_type == 'I':
+            return _to_int
+        return _to_number
+
+    def compile_converters(self, field_mappings: Dict[str, Dict[str, str]],
+                           field_types: Optional[Dict[str, str]] = None) -> List[Tuple[str, str, Callable[[Any], Any]]]:
+        """
+        Compile the field mappings of a table into per-column converters.
+        
+        Args:
+            field_mappings: Field mappings from MappingManager.get_field_mappings
+            field_types: DBF type letter of each column (see DBFReader.get_field_types)
+            
+        Returns:
+            List of (DBF column, target field, converter)
+        """
+        field_types = field_types or {}
+        return [
+            (mapping['dbf'], mapping['velneo_table'],
+             self.field_converter(mapping['dbf'], mapping['type'], field_types.get(mapping['dbf'])))
+            for mapping in field_mappings.values()
+        ]
+
+    def convert_record(self, record: Dict[str, Any], converters: List[Tuple[str, str, Callable[[Any], Any]]]) -> Dict[str, Any]:
+        """
+        Map a reader record with compiled converters.
+        
+        Args:
+            record: Record from the reader
+            converters: Converters from compile_converters
+            
+        Returns:
+            Record with the target field names and converted values. Columns
+            missing from the record are left out
+        """
+        return {
+            target: convert(record[source])
+            for source, target, convert in converters if source in record
+        }
+
+    def convert_batch(self, records: List[Dict[str, Any]], converters: List[Tuple[str, str, Callable[[Any], Any]]]) -> List[Dict[str, Any]]:
+        """
+        Map a batch of reader records with compiled converters.
+        
+        Args:
+            records: Records from the same read (all with the same columns)
+            converters: Converters from compile_converters
+            
+        Returns:
+            List of converted records, see convert_record
+        """
+        if not records:
+            return []
+        # Records of one read share their columns, resolve the present ones once
+        present = [c for c in converters if c[0] in records[0]]
+        return [
+            {target: convert(record[source]) for source, target, convert in present}
+            for record in records
+        ]
+
+    def format_datetime(self, value: datetime) -> str:
+        """
+        Format a date/datetime the way the Advantage provider values render.
+        
+        The .NET DateTime values are stringified with the es-MX culture
+        (e.g. "30/04/2025 12:00:00 a. m."), which is the format the rest of
+        the pipeline parses and hashes.
+        
+        Args:
+            value: date or datetime to format
+            
+        Returns:
+            Formatted string
+        """
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        hour = value.hour % 12 or 12
+        meridiem = 'a. m.' if value.hour < 12 else 'p. m.'
+        return f"{value.day:02d}/{value.month:02d}/{value.year:04d} {hour:02d}:{value.minute:02d}:{value.second:02d} {meridiem}"
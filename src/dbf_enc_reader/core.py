@@ -1,106 +1,114 @@
-import clr
 import json
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Union, Iterator
 from pathlib import Path
 
-from .connection import DBFConnection
-from .converters import DataConverter
+from .backends import ReaderBackend, get_backend
+from src.utils.get_enc import EncEnv
 
 class DBFReader:
-    def __init__(self, data_source: str, encryption_password: str):
+    def __init__(self, data_source: str, encryption_password: str, backend: Optional[Union[str, ReaderBackend]] = None):
         """
         Initialize DBF reader with connection parameters.
-        
+
         Args:
             data_source: Path to the DBF file
             encryption_password: Password for encrypted DBF
+            backend: Backend name ('ads' or 'native') or instance. Defaults to
+                DBF_BACKEND from .env, falling back to 'ads'
+        """
+        if isinstance(backend, ReaderBackend):
+            self.backend = backend
+        else:
+            backend_name = backend or EncEnv().get('DBF_BACKEND', 'ads')
+            self.backend = get_backend(backend_name, data_source, encryption_password)
+
+    @contextmanager
+    def session(self):
+        """Keep the backend resources open for several reads.
+
+        Within the session the ADS backend shares one connection (health
+        checked and reopened before each read) and the native backend reuses
+        the parsed table headers, instead of paying the setup on every read.
+
+        Usage:
+            with reader.session():
+                headers = reader.read_table('VENTA.DBF', ...)
+                details = reader.read_table('PARTVTA.DBF', ...)
+        """
+        self.backend.open_session()
+        try:
+            yield self
+        finally:
+            self.backend.close_session()
+
+    def iter_table(self, table_name: str, filters: Optional[List[Dict[str, Any]]] = None, limit: Optional[int] = None,
+                   chunk_size: Optional[int] = None, fields: Optional[List[str]] = None) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Stream records from a table with optional filters.
+
+        Records are produced while the table is scanned, nothing is buffered
+        besides the current chunk.
+
+        Args:
+            table_name: Name of the table to read
+            filters: Optional list of filter conditions
+            limit: Optional limit on number of records to read
+            chunk_size: Optional size of the lists to yield instead of single records
+            fields: Optional list of columns to fetch (see MappingManager.get_dbf_fields),
+                all columns by default
+
+        Yields:
+            Records as dictionaries, or lists of up to chunk_size records
         """
-        self.connection = DBFConnection(data_source, encryption_password)
-        self.converter = DataConverter()
+        records = self.backend.iter_table(table_name, limit, filters, fields)
+        if not chunk_size:
+            yield from records
+            return
+
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
 
-    def read_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    def read_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                   fields: Optional[List[str]] = None, output: str = 'rows', strings: str = 'object') -> Union[List[Dict[str, Any]], Any]:
         """Read records from a table with optional filters.
-        
+
         Args:
             table_name: Name of the table to read
             limit: Optional limit on number of records to read
             filters: Optional list of filter conditions
-            
+            fields: Optional list of columns to fetch, all columns by default
+            output: 'rows' for a list of dictionaries or 'columns' for a
+                ColumnarBatch with one NumPy array per column (requires numpy)
+            strings: With output='columns', 'object' for str arrays or
+                'bytes' for fixed-width byte arrays
+
         Returns:
-            List of records as dictionaries
+            List of records as dictionaries, or a ColumnarBatch
         """
-        results = []
-        with self.connection as conn:
-            from System.Data import CommandType
-            
-            # Create command with TableDirect for better performance
-            cmd = conn.conn.CreateCommand()
-            cmd.CommandType = CommandType.TableDirect
-            cmd.CommandText = table_name
-            cmd.AdsOptimizedFilters = True  # Enable AOF for better performance
-            
-            # Get reader
-            reader = cmd.ExecuteExtendedReader()
-            
-            # Apply filters if any
-            if filters:
-                filter_conditions = []
-                use_or = len(filters) > 1 and all(f['field'] == filters[0]['field'] for f in filters)
-                
-                for f in filters:
-                    # print(f' filter ////// {f}')
-                    if f['operator'] == 'range':
-                        filter_conditions.append(
-                            f"{f['field']} >= '{f['from_value']}' AND "
-                            f"{f['field']} <= '{f['to_value']}'"
-                        )
-                    else:
-                        filter_conditions.append(
-                            f"{f['field']}{f['operator']} '{f['value']}'"
-                        )
-
-                # print(f'HERE ------ {filter_conditions}')        
-                
-                if filter_conditions:
-                    join_op = " OR " if use_or else " AND "
-                    filter_expr = join_op.join(filter_conditions)
-                    # print(f"\nApplying AOF filter: {filter_expr}")
-                    
-                    try:
-                        reader.Filter = filter_expr
-                    except Exception as e:
-                        print(f"\nFilter error: {str(e)}")
-                        print(f"Filter expression: {filter_expr}")
-                        raise
-            
-            # Process results
-            count = 0
-            while reader.Read():
-               
-                if limit and count >= limit:
-                    break
-                    
-                record = {}
-                for i in range(reader.FieldCount):
-                    field_name = reader.GetName(i)
-                    value = reader.GetValue(i)
-                    record[field_name] = self.converter.convert_value(value)
-                 
-                results.append(record)
-                count += 1
-            
-            return results
-            
+        if output == 'rows':
+            return self.backend.read_table(table_name, limit, filters, fields)
+        if output == 'columns':
+            if strings not in ('object', 'bytes'):
+                raise ValueError(f"Unknown string layout '{strings}'. Use 'object' or 'bytes'")
+            return self.backend.read_columns(table_name, limit, filters, fields, strings)
+        raise ValueError(f"Unknown output '{output}'. Use 'rows' or 'columns'")
+
 
     def to_json(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Convert table records to JSON string.
-        
+
         Args:
             table_name: Name of the table to convert
             limit: Optional limit on number of records to convert
             filters: Optional list of filter conditions
-            
+
         Returns:
             JSON string representation of the records
         """
@@ -108,22 +116,42 @@ class DBFReader:
         #print(self.get_table_info(table_name))
 
         # print(f' records  {records}')
-        
+
         return json.dumps(records, indent=4, ensure_ascii=False)
 
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """
         Get information about table structure.
-        
+
         Args:
             table_name: Name of the table
-            
+
         Returns:
             Dictionary containing table metadata
         """
-        with self.connection as conn:
-            reader = conn.get_reader(table_name)
-            return {
-                'field_count': reader.FieldCount,
-                'columns': [reader.GetName(i) for i in range(reader.FieldCount)]
-            }
+        return self.backend.get_table_info(table_name)
+
+    def get_schema(self, table_name: str) -> Any:
+        """
+        Get the header layout of a table, cached until the file changes.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            TableSchema (field names, types, offsets, record length) or None
+            if the backend can't read the table header
+        """
+        return self.backend.get_schema(table_name)
+
+    def get_field_types(self, table_name: str) -> Dict[str, str]:
+        """
+        Get the DBF type letter of each column of a table.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            Dictionary of column name to type letter (C, N, D, L, T, ...)
+        """
+        return self.backend.get_field_types(table_name)
@@ -0,0 +1,148 @@
+import operator
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Date literals used by the controllers ("%m-%d-%Y") plus a few common variants
+DATE_LITERAL_FORMATS = ('%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d', '%Y%m%d')
+
+COMPARISON_OPERATORS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def uses_or(filters: List[Dict[str, Any]]) -> bool:
+    """Check if the filter conditions must be joined with OR.
+
+    Several conditions over the same field are alternatives (e.g. one condition
+    per folio), any other combination is joined with AND.
+
+    Args:
+        filters: List of filter conditions
+
+    Returns:
+        True if the conditions are joined with OR
+    """
+    return len(filters) > 1 and all(f['field'] == filters[0]['field'] for f in filters)
+
+
+def build_aof_expression(filters: List[Dict[str, Any]]) -> str:
+    """Build an Advantage Optimized Filter expression from filter conditions.
+
+    An 'in' condition is turned into a range over its smallest and largest
+    value, which the server can resolve with the index; the exact membership
+    is checked by the caller against a hash set (see membership_filters).
+    When the conditions are joined with OR it is expanded into equalities.
+
+    Args:
+        filters: List of filter conditions
+
+    Returns:
+        AOF expression string
+    """
+    join_with_or = uses_or(filters)
+    filter_conditions = []
+    for f in filters:
+        if f['operator'] == 'in':
+            values = sorted({str(v) for v in f['values']})
+            if not values:
+                filter_conditions.append(".F.")
+            elif join_with_or:
+                filter_conditions.extend(f"{f['field']} = '{v}'" for v in values)
+            else:
+                filter_conditions.append(
+                    f"{f['field']} >= '{values[0]}' AND "
+                    f"{f['field']} <= '{values[-1]}'"
+                )
+        elif f['operator'] == 'range':
+            filter_conditions.append(
+                f"{f['field']} >= '{f['from_value']}' AND "
+                f"{f['field']} <= '{f['to_value']}'"
+            )
+        else:
+            filter_conditions.append(
+                f"{f['field']}{f['operator']} '{f['value']}'"
+            )
+
+    join_op = " OR " if join_with_or else " AND "
+    return join_op.join(filter_conditions)
+
+
+def membership_filters(filters: List[Dict[str, Any]]) -> List[Tuple[str, set]]:
+    """Get the 'in' conditions that must be checked outside the AOF.
+
+    Args:
+        filters: List of filter conditions
+
+    Returns:
+        List of (field, set of trimmed string values). Empty when the
+        conditions are joined with OR, as build_aof_expression expands them.
+    """
+    if not filters or uses_or(filters):
+        return []
+    return [
+        (f['field'], {str(v).strip() for v in f['values']})
+        for f in filters if f['operator'] == 'in'
+    ]
+
+
+def parse_date_literal(value: Any) -> Optional[date]:
+    """Parse a filter literal into a date.
+
+    Args:
+        value: Date, datetime or string in one of DATE_LITERAL_FORMATS
+
+    Returns:
+        The parsed date or None if it can't be parsed
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_LITERAL_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def compile_predicate(filters: List[Dict[str, Any]],
+                      coerce_literal: Callable[[str, Any], Any]) -> Tuple[List[Tuple[str, Callable[[Any], bool]]], bool]:
+    """Compile filter conditions into per-field tests.
+
+    Args:
+        filters: List of filter conditions
+        coerce_literal: Callable converting a filter literal to the comparable
+            type of the given field
+
+    Returns:
+        Tuple of (list of (field, test) pairs, join with OR flag). Each test
+        receives the comparable value of its field and returns a bool.
+    """
+    tests = []
+    for f in filters:
+        field = f['field']
+        if f['operator'] == 'in':
+            # Hash set lookup, cost doesn't grow with the number of values
+            values = frozenset(coerce_literal(field, v) for v in f['values'])
+            tests.append((field, lambda v, values=values: v in values))
+        elif f['operator'] == 'range':
+            low = coerce_literal(field, f['from_value'])
+            high = coerce_literal(field, f['to_value'])
+            tests.append((field, lambda v, low=low, high=high: v is not None and low <= v <= high))
+        else:
+            compare = COMPARISON_OPERATORS.get(f['operator'].strip())
+            if compare is None:
+                raise ValueError(f"Unsupported filter operator: {f['operator']}")
+            literal = coerce_literal(field, f['value'])
+            tests.append((field, lambda v, compare=compare, literal=literal: v is not None and compare(v, literal)))
+
+    return tests, uses_or(filters)
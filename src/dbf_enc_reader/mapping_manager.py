@@ -1,8 +1,48 @@
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+from .converters import DataConverter
+
+
+class MappingPlan:
+    """Mappings of a DBF table compiled into (DBF column, target field, converter) steps.
+
+    Built by MappingManager.get_plan; applying it only looks up, converts
+    and renames the mapped columns of each record.
+    """
+
+    __slots__ = ('dbf_name', 'steps')
+
+    def __init__(self, dbf_name: str, steps: Tuple[Tuple[str, str, Callable[[Any], Any]], ...]):
+        self.dbf_name = dbf_name
+        self.steps = steps
+
+    def apply(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Map one reader record, see DataConverter.convert_record."""
+        return {target: convert(record[source]) for source, target, convert in self.steps if source in record}
+
+    def apply_batch(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Map records of the same read, see DataConverter.convert_batch."""
+        if not records:
+            return []
+        present = [step for step in self.steps if step[0] in records[0]]
+        return [
+            {target: convert(record[source]) for source, target, convert in present}
+            for record in records
+        ]
+
 
 class MappingManager:
+    # Parsed mapping files and compiled plans, shared by every instance so
+    # each sync run doesn't load and compile the same file again. Keyed by
+    # the file path and its size/mtime, so an edited file is picked up.
+    _mappings_cache: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+    _plan_cache: Dict[Tuple[Any, ...], MappingPlan] = {}
+    _cache_lock = threading.Lock()
+
     def __init__(self, mapping_file_path: str):
         """Initialize the mapping manager with the path to mappings.json.
         
@@ -11,17 +51,57 @@ class MappingManager:
         """
         self.mapping_file_path = Path(mapping_file_path)
         self.mappings: Dict[str, Any] = {}
+        self._file_key: Optional[Tuple[str, int, int]] = None
+        self.converter = DataConverter()
         self.load_mappings()
 
     def load_mappings(self) -> None:
         """Load the mappings from the JSON file."""
         try:
-            with open(self.mapping_file_path, 'r', encoding='utf-8') as f:
-                self.mappings = json.load(f)
+            stat = os.stat(self.mapping_file_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"Mapping file not found at {self.mapping_file_path}")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON format in mapping file {self.mapping_file_path}")
+        file_key = (str(self.mapping_file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+        with self._cache_lock:
+            cached = self._mappings_cache.get(file_key)
+        if cached is None:
+            try:
+                with open(self.mapping_file_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Mapping file not found at {self.mapping_file_path}")
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON format in mapping file {self.mapping_file_path}")
+            with self._cache_lock:
+                self._mappings_cache[file_key] = cached
+        self.mappings = cached
+        self._file_key = file_key
+
+    def get_plan(self, dbf_name: str, field_types: Optional[Dict[str, str]] = None) -> MappingPlan:
+        """Get the compiled mapping plan of a DBF file.
+        
+        The plan is compiled once per version of the mappings file, table and
+        column types (see DataConverter.compile_converters) and reused by
+        later instances.
+        
+        Args:
+            dbf_name: Name of the DBF file whose mappings are applied
+            field_types: DBF type letter of each column of the table read
+            
+        Returns:
+            The mapping plan
+        """
+        field_types = field_types or {}
+        key = (self._file_key, dbf_name, tuple(sorted(field_types.items())))
+        with self._cache_lock:
+            plan = self._plan_cache.get(key)
+        if plan is None:
+            steps = self.converter.compile_converters(self.get_field_mappings(dbf_name), field_types)
+            plan = MappingPlan(dbf_name, tuple(steps))
+            with self._cache_lock:
+                self._plan_cache[key] = plan
+        return plan
 
     def get_dbf_mappings(self, dbf_name: str) -> Optional[Dict[str, Any]]:
         """Get the mappings for a specific DBF file.
@@ -58,6 +138,40 @@ class MappingManager:
         dbf_config = self.get_dbf_mappings(dbf_name)
         return dbf_config.get('fields', {}) if dbf_config else {}
 
+    def get_dbf_fields(self, dbf_name: str, schema: Optional[Any] = None) -> List[str]:
+        """Get the DBF columns used by the mappings of a DBF file.
+        
+        Used as column projection for the reader so unmapped columns are
+        never fetched.
+        
+        Args:
+            dbf_name: Name of the DBF file
+            schema: Optional TableSchema of the table read (see
+                DBFReader.get_schema), columns missing from it are left out
+            
+        Returns:
+            List of DBF column names, in mapping order and without duplicates
+        """
+        columns = []
+        for mapping in self.get_field_mappings(dbf_name).values():
+            if mapping['dbf'] not in columns:
+                columns.append(mapping['dbf'])
+        if schema is not None:
+            columns = [column for column in columns if schema.has_field(column)]
+        return columns
+
+    def validate_fields(self, dbf_name: str, schema: Any) -> List[str]:
+        """Check the mappings of a DBF file against the layout of a table.
+        
+        Args:
+            dbf_name: Name of the DBF file whose mappings are checked
+            schema: TableSchema of the table read
+            
+        Returns:
+            DBF columns used by the mappings that the table doesn't have
+        """
+        return [column for column in self.get_dbf_fields(dbf_name) if not schema.has_field(column)]
+
 # Usage example:
 if __name__ == "__main__":
     mapper = MappingManager("mappings.json")
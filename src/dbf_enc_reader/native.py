@@ -0,0 +1,782 @@
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Callable, Tuple
+
+from .backends import ReaderBackend
+from .converters import DataConverter
+from .cdx import CDXIndex
+from .filters import compile_predicate, parse_date_literal, uses_or
+from .schema import TableSchema, resolve_table_path, schema_cache
+
+# Language driver id (header byte 29) -> Python codec
+CODEPAGES = {
+    0x01: 'cp437',
+    0x02: 'cp850',
+    0x03: 'cp1252',
+    0x57: 'cp1252',
+    0x64: 'cp852',
+    0x65: 'cp866',
+    0x7D: 'cp1255',
+    0x7E: 'cp1256',
+    0xC8: 'cp1250',
+    0xC9: 'cp1251',
+    0xCA: 'cp1254',
+    0xCB: 'cp1253',
+}
+DEFAULT_ENCODING = 'cp1252'
+
+# Offset between a Julian day number and a Python date ordinal
+JULIAN_DAY_OFFSET = 1721425
+
+NUMERIC_TYPES = ('N', 'F', 'I', 'B', 'Y')
+
+# Records decoded per read() call when scanning a table without mmap
+READ_BLOCK_RECORDS = 1024
+
+DELETED_FLAG = 0x2A  # '*'
+
+
+def _decode_number(raw: bytes) -> str:
+    text = raw.strip()
+    if not text:
+        return ''
+    try:
+        # Decimal keeps the stored scale, like the provider's System.Decimal
+        return str(Decimal(text.decode('ascii')))
+    except (InvalidOperation, UnicodeDecodeError):
+        return ''
+
+
+def _decode_logical(raw: bytes) -> Any:
+    flag = raw[:1]
+    if flag in (b'T', b't', b'Y', b'y'):
+        return True
+    if flag in (b'F', b'f', b'N', b'n'):
+        return False
+    return ''
+
+
+def _decode_column(np: Any, matrix: Any, field: 'DBFField', encoding: str, strings: str) -> Any:
+    """Decode one column of a record matrix (one row of bytes per record) into an array.
+
+    See columnar.column_from_values for the resulting dtypes.
+    """
+    rows = matrix.shape[0]
+    block = np.ascontiguousarray(matrix[:, field.offset:field.offset + field.length])
+    field_type = field.type
+
+    if field_type in ('N', 'F'):
+        text = np.char.strip(block.view(f'S{field.length}').reshape(rows))
+        blank = text == b''
+        text[blank] = b'nan'
+        try:
+            return text.astype(np.float64)
+        except ValueError:
+            # Garbage in some record, parse value by value
+            return np.array([_parse_float(value) for value in text], dtype=np.float64)
+    if field_type == 'I':
+        return block.view('<i4').reshape(rows).astype(np.int64)
+    if field_type == 'B':
+        return block.view('<f8').reshape(rows).copy()
+    if field_type == 'Y':
+        return block.view('<i8').reshape(rows) / 10000
+    if field_type == 'L':
+        return np.isin(block[:, 0], np.frombuffer(b'TtYy', dtype=np.uint8))
+    if field_type == 'D':
+        digits = block.astype(np.int64) - ord('0')
+        valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        digits[~valid] = 0
+        weights = 10 ** np.arange(3, -1, -1)
+        year = digits[:, 0:4] @ weights
+        month = digits[:, 4:6] @ weights[2:]
+        day = digits[:, 6:8] @ weights[2:]
+        valid &= (year > 0) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+        column = np.full(rows, np.datetime64('NaT', 'D'), dtype='datetime64[D]')
+        column[valid] = (
+            (year[valid] - 1970).astype('datetime64[Y]')
+            + (month[valid] - 1).astype('timedelta64[M]')
+        ).astype('datetime64[D]') + (day[valid] - 1).astype('timedelta64[D]')
+        return column
+    if field_type == 'T':
+        pairs = block.view('<i4').reshape(rows, 2).astype(np.int64)
+        julian_day, millis = pairs[:, 0], pairs[:, 1]
+        valid = julian_day > 0
+        column = np.full(rows, np.datetime64('NaT', 'ms'), dtype='datetime64[ms]')
+        epoch_days = julian_day[valid] - JULIAN_DAY_OFFSET - date(1970, 1, 1).toordinal()
+        column[valid] = (epoch_days * 86400000 + millis[valid]).astype('datetime64[ms]')
+        return column
+    if field_type == 'C':
+        raw = block.view(f'S{field.length}').reshape(rows)
+        if strings == 'bytes':
+            return np.char.strip(raw)
+        column = np.empty(rows, dtype=object)
+        column[:] = [value.decode(encoding, errors='replace').strip() for value in raw]
+        return column
+    # Memo and binary fields live in the memo file, which is not read here
+    return np.full(rows, None, dtype=object)
+
+
+def _parse_float(value: bytes) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+
+class DBFField:
+    """Field descriptor of a DBF table."""
+
+    __slots__ = ('name', 'type', 'offset', 'length', 'decimals')
+
+    def __init__(self, name: str, field_type: str, offset: int, length: int, decimals: int):
+        self.name = name
+        self.type = field_type
+        self.offset = offset
+        self.length = length
+        self.decimals = decimals
+
+    def decode(self, raw: bytes, encoding: str, converter: DataConverter) -> Any:
+        """Decode the raw field bytes into the value the Advantage reader yields.
+
+        Args:
+            raw: Field bytes from the record buffer
+            encoding: Codec of the table
+            converter: Converter used to format dates
+
+        Returns:
+            Decoded value
+        """
+        return self.decoder(encoding, converter)(raw)
+
+    def decoder(self, encoding: str, converter: DataConverter) -> Callable[[bytes], Any]:
+        """Compile the decoding of this field into a single callable.
+
+        The field type is resolved here once, so decoding a column of values
+        doesn't go through the type dispatch for every record.
+
+        Args:
+            encoding: Codec of the table
+            converter: Converter used to format dates
+
+        Returns:
+            Callable taking the raw field bytes and returning the decoded value
+        """
+        field_type = self.type
+        if field_type == 'C':
+            return lambda raw: raw.decode(encoding, errors='replace').strip()
+        if field_type in ('N', 'F'):
+            return _decode_number
+        if field_type == 'D':
+            parse_date = self._parse_date
+            format_datetime = converter.format_datetime
+
+            def decode_date(raw):
+                day = parse_date(raw)
+                return format_datetime(day) if day else ''
+            return decode_date
+        if field_type == 'L':
+            return _decode_logical
+        if field_type == 'I':
+            return lambda raw: struct.unpack('<i', raw)[0]
+        if field_type == 'B':
+            return lambda raw: struct.unpack('<d', raw)[0]
+        if field_type == 'Y':
+            return lambda raw: str(Decimal(struct.unpack('<q', raw)[0]).scaleb(-4))
+        if field_type == 'T':
+            parse_datetime = self._parse_datetime
+            format_datetime = converter.format_datetime
+
+            def decode_datetime(raw):
+                stamp = parse_datetime(raw)
+                return format_datetime(stamp) if stamp else ''
+            return decode_datetime
+        # Memo and binary fields live in the memo file, which is not read here
+        return lambda raw: None
+
+    def comparable(self, raw: bytes, encoding: str) -> Any:
+        """Decode the raw field bytes into a value suitable for filter comparisons.
+
+        Args:
+            raw: Field bytes from the record buffer
+            encoding: Codec of the table
+
+        Returns:
+            Comparable value or None for blank/unsupported values
+        """
+        field_type = self.type
+        if field_type == 'C':
+            return raw.decode(encoding, errors='replace').rstrip()
+        if field_type == 'D':
+            return self._parse_date(raw)
+        if field_type == 'T':
+            return self._parse_datetime(raw)
+        if field_type in NUMERIC_TYPES:
+            if field_type == 'I':
+                return struct.unpack('<i', raw)[0]
+            if field_type == 'B':
+                return struct.unpack('<d', raw)[0]
+            if field_type == 'Y':
+                return struct.unpack('<q', raw)[0] / 10000
+            try:
+                return float(raw)
+            except ValueError:
+                return None
+        if field_type == 'L':
+            return raw[:1] in (b'T', b't', b'Y', b'y')
+        return None
+
+    def coerce_literal(self, value: Any) -> Any:
+        """Convert a filter literal to the comparable type of this field.
+
+        Args:
+            value: Literal from a filter condition
+
+        Returns:
+            Converted literal
+        """
+        field_type = self.type
+        if field_type in ('D', 'T'):
+            day = parse_date_literal(value)
+            if day is None:
+                raise ValueError(f"Invalid date literal '{value}' for field {self.name}")
+            if field_type == 'T':
+                return datetime(day.year, day.month, day.day)
+            return day
+        if field_type in NUMERIC_TYPES:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid numeric literal '{value}' for field {self.name}")
+        if field_type == 'L':
+            return str(value).strip().upper() in ('T', 'Y', '.T.', 'TRUE')
+        return str(value).rstrip()
+
+    @staticmethod
+    def _parse_date(raw: bytes) -> Optional[date]:
+        text = raw.strip()
+        if len(text) != 8:
+            return None
+        try:
+            return date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_datetime(raw: bytes) -> Optional[datetime]:
+        julian_day, millis = struct.unpack('<ii', raw)
+        if julian_day <= 0:
+            return None
+        day = date.fromordinal(julian_day - JULIAN_DAY_OFFSET)
+        return datetime(day.year, day.month, day.day) + timedelta(milliseconds=millis)
+
+
+class DBFTableFile:
+    """Header and record access for a DBF file read directly from disk."""
+
+    def __init__(self, path: str, encoding: Optional[str] = None):
+        """
+        Load the table header and field descriptors.
+
+        Args:
+            path: Path to the DBF file
+            encoding: Optional codec overriding the header language driver
+        """
+        self.path = str(path)
+        # The header layout comes from the shared schema cache, parsed once
+        # per version of the file
+        schema = schema_cache.get(self.path)
+        self.schema = schema
+        self.version = schema.version
+        self.record_count = schema.record_count
+        self.header_length = schema.header_length
+        self.record_length = schema.record_length
+        self.encrypted = schema.encrypted
+        self.table_flags = schema.table_flags
+        self.encoding = encoding or CODEPAGES.get(schema.language_driver, DEFAULT_ENCODING)
+        self.converter = DataConverter()
+
+        self.fields: List[DBFField] = [
+            DBFField(field.name, field.type, field.offset, field.length, field.decimals) for field in schema.fields
+        ]
+
+        self.field_map = {field.name.upper(): field for field in self.fields}
+        self.decoders = {
+            field.name.upper(): field.decoder(self.encoding, self.converter) for field in self.fields
+        }
+
+    def get_field(self, name: str) -> DBFField:
+        """Get a field descriptor by name.
+
+        Args:
+            name: Field name (case insensitive)
+
+        Returns:
+            The field descriptor
+        """
+        field = self.field_map.get(name.upper())
+        if field is None:
+            raise KeyError(f"Field {name} not found in {self.path}")
+        return field
+
+    def project(self, names: Optional[List[str]] = None) -> List[DBFField]:
+        """Get the descriptors of the requested columns, in table order.
+
+        Args:
+            names: Column names, all columns when empty. Unknown names are ignored
+
+        Returns:
+            List of field descriptors
+        """
+        if not names:
+            return self.fields
+        wanted = {name.upper() for name in names}
+        return [field for field in self.fields if field.name.upper() in wanted]
+
+    def column_decoders(self, fields: Optional[List[DBFField]] = None) -> List[Tuple[str, int, int, Callable[[bytes], Any]]]:
+        """Get the compiled decoders of some columns.
+
+        Args:
+            fields: Fields to decode, all table fields by default
+
+        Returns:
+            List of (name, offset, end offset, decoder) within a record
+        """
+        return [
+            (field.name, field.offset, field.offset + field.length, self.decoders[field.name.upper()])
+            for field in (fields or self.fields)
+        ]
+
+    def available_records(self) -> int:
+        """Number of complete records, bounded by the header and the file size."""
+        size = os.path.getsize(self.path)
+        on_disk = max(0, (size - self.header_length) // self.record_length)
+        return min(self.record_count, on_disk)
+
+    def iter_records(self, show_deleted: bool = False, use_mmap: bool = True) -> Iterator['RecordView']:
+        """Iterate over the records in natural order as lazy views.
+
+        With use_mmap the file is memory-mapped and every view points into the
+        mapping, so no record is copied; otherwise records are read in blocks
+        of READ_BLOCK_RECORDS and the views point into each block.
+
+        Args:
+            show_deleted: Include records flagged as deleted
+            use_mmap: Memory-map the table instead of reading it in blocks
+
+        Yields:
+            RecordView for each record. A view is only valid until the
+            iteration advances past it (blocks are reused/unmapped).
+        """
+        total = self.available_records()
+        if total == 0:
+            return
+        if use_mmap:
+            yield from self._iter_mapped(total, show_deleted)
+        else:
+            yield from self._iter_buffered(total, show_deleted)
+
+    def record_at(self, recno: int) -> Optional['RecordView']:
+        """Read a single record by its record number.
+
+        Args:
+            recno: 1-based record number
+
+        Returns:
+            RecordView over a copy of the record or None if out of range
+        """
+        if recno < 1 or recno > self.available_records():
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.header_length + (recno - 1) * self.record_length)
+            record = f.read(self.record_length)
+        if len(record) < self.record_length:
+            return None
+        return RecordView(self, record, 0, recno)
+
+    def iter_records_at(self, recnos: List[int], show_deleted: bool = False, use_mmap: bool = True) -> Iterator['RecordView']:
+        """Iterate over the given records (e.g. located through an index).
+
+        Args:
+            recnos: Sorted 1-based record numbers
+            show_deleted: Include records flagged as deleted
+            use_mmap: Memory-map the table instead of reading each record
+
+        Yields:
+            RecordView for each existing record, valid until the iteration advances
+        """
+        total = self.available_records()
+        recnos = [recno for recno in recnos if 1 <= recno <= total]
+        if not recnos:
+            return
+        record_length = self.record_length
+        with open(self.path, 'rb') as f:
+            if use_mmap:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    view = RecordView(self, buffer, 0, 0)
+                    for recno in recnos:
+                        start = self.header_length + (recno - 1) * record_length
+                        if show_deleted or buffer[start] != DELETED_FLAG:
+                            view.start = start
+                            view.recno = recno
+                            yield view
+            else:
+                for recno in recnos:
+                    f.seek(self.header_length + (recno - 1) * record_length)
+                    view = RecordView(self, f.read(record_length), 0, recno)
+                    if show_deleted or not view.deleted:
+                        yield view
+
+    def _iter_mapped(self, total: int, show_deleted: bool) -> Iterator['RecordView']:
+        record_length = self.record_length
+        with open(self.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                view = RecordView(self, buffer, 0, 0)
+                start = self.header_length
+                for recno in range(1, total + 1):
+                    if show_deleted or buffer[start] != DELETED_FLAG:
+                        view.start = start
+                        view.recno = recno
+                        yield view
+                    start += record_length
+
+    def _iter_buffered(self, total: int, show_deleted: bool) -> Iterator['RecordView']:
+        record_length = self.record_length
+        with open(self.path, 'rb') as f:
+            f.seek(self.header_length)
+            recno = 0
+            while recno < total:
+                batch = min(READ_BLOCK_RECORDS, total - recno)
+                block = f.read(batch * record_length)
+                view = RecordView(self, block, 0, 0)
+                for start in range(0, len(block) - record_length + 1, record_length):
+                    recno += 1
+                    if show_deleted or block[start] != DELETED_FLAG:
+                        view.start = start
+                        view.recno = recno
+                        yield view
+                if len(block) < batch * record_length:
+                    break
+
+
+class RecordView:
+    """Lightweight view of one record inside a table buffer.
+
+    Fields are decoded only when accessed; the record is never copied as a
+    whole. Views are reused by DBFTableFile.iter_records, call to_dict() to
+    keep the values of a record.
+    """
+
+    __slots__ = ('table', 'buffer', 'start', 'recno')
+
+    def __init__(self, table: DBFTableFile, buffer: Any, start: int, recno: int):
+        self.table = table
+        self.buffer = buffer
+        self.start = start
+        self.recno = recno
+
+    def raw(self, field: DBFField) -> bytes:
+        """Get the raw bytes of a field."""
+        offset = self.start + field.offset
+        return self.buffer[offset:offset + field.length]
+
+    def comparable(self, field: DBFField) -> Any:
+        """Get the filter comparable value of a field."""
+        return field.comparable(self.raw(field), self.table.encoding)
+
+    def __getitem__(self, name: str) -> Any:
+        field = self.table.get_field(name)
+        return self.table.decoders[field.name.upper()](self.raw(field))
+
+    @property
+    def deleted(self) -> bool:
+        return self.buffer[self.start] == DELETED_FLAG
+
+    def to_dict(self, fields: Optional[List[DBFField]] = None,
+                decoders: Optional[List[Tuple[str, int, int, Callable[[bytes], Any]]]] = None) -> Dict[str, Any]:
+        """Materialise the record as a dictionary.
+
+        Args:
+            fields: Fields to decode, all table fields by default
+            decoders: Compiled decoders from DBFTableFile.column_decoders,
+                used instead of fields when given
+
+        Returns:
+            Dictionary of field name to decoded value
+        """
+        buffer = self.buffer
+        start = self.start
+        if decoders is None:
+            decoders = self.table.column_decoders(fields)
+        return {
+            name: decode(buffer[start + offset:start + end])
+            for name, offset, end, decode in decoders
+        }
+
+
+class NativeBackend(ReaderBackend):
+    """Backend parsing DBF files directly, without the Advantage provider.
+
+    Only unencrypted tables can be read (ENCRYPTED=False); Advantage encrypted
+    tables still require the 'ads' backend.
+    """
+
+    name = 'native'
+
+    def __init__(self, data_source: str, encryption_password: Optional[str] = None,
+                 encoding: Optional[str] = None, show_deleted: bool = False, scan_mode: str = 'mmap',
+                 use_index: bool = True):
+        """
+        Initialize the native backend.
+
+        Args:
+            data_source: Directory containing the DBF files
+            encryption_password: Unused, kept for interface compatibility
+            encoding: Optional codec overriding the table language driver
+            show_deleted: Include records flagged as deleted
+            scan_mode: 'mmap' to scan a memory-mapped file or 'buffered' to
+                read it in blocks
+            use_index: Seek through the table's CDX tags when a filter allows it
+        """
+        if scan_mode not in ('mmap', 'buffered'):
+            raise ValueError(f"Unknown scan mode '{scan_mode}'. Use 'mmap' or 'buffered'")
+        self.data_source = Path(data_source).resolve()
+        self.encoding = encoding
+        self.show_deleted = show_deleted
+        self.scan_mode = scan_mode
+        self.use_index = use_index
+        # Tables and indexes kept open during a session, by path
+        self._session_depth = 0
+        self._session_tables: Dict[str, Tuple[Tuple[int, int], DBFTableFile]] = {}
+        self._session_indexes: Dict[str, Tuple[Tuple[int, int], CDXIndex]] = {}
+
+    def open_session(self) -> None:
+        self._session_depth += 1
+
+    def close_session(self) -> None:
+        self._session_depth -= 1
+        if self._session_depth == 0:
+            for _, index in self._session_indexes.values():
+                index.close()
+            self._session_indexes.clear()
+            self._session_tables.clear()
+
+    @staticmethod
+    def _file_signature(path: Any) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get_table_path(self, table_name: str) -> Path:
+        """Resolve the DBF file of a table, ignoring case on case sensitive filesystems.
+
+        Args:
+            table_name: Table name with or without the .DBF extension
+
+        Returns:
+            Path to the DBF file
+        """
+        return resolve_table_path(self.data_source, table_name)
+
+    def open_table(self, table_name: str) -> DBFTableFile:
+        """Open a table and validate it can be read natively.
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            The parsed table file
+        """
+        path = self.get_table_path(table_name)
+        if self._session_depth:
+            # Reuse the parsed header while the file is unchanged
+            signature = self._file_signature(path)
+            cached = self._session_tables.get(str(path))
+            if cached and cached[0] == signature:
+                return cached[1]
+        table = DBFTableFile(path, self.encoding)
+        if self._session_depth:
+            self._session_tables[str(path)] = (signature, table)
+        if table.encrypted:
+            raise RuntimeError(
+                f"{table.path} is encrypted. Use the 'ads' backend to read encrypted tables"
+            )
+        return table
+
+    def iter_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                   fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        table = self.open_table(table_name)
+        columns = table.column_decoders(table.project(fields))
+        for view in self._iter_matches(table, limit, filters):
+            yield view.to_dict(decoders=columns)
+
+    def read_records_at(self, table_name: str, recnos: List[int],
+                        fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Read records by record number, deleted ones included.
+
+        Used by the change capture to decode only appended/modified records.
+
+        Args:
+            table_name: Name of the table to read
+            recnos: Sorted 1-based record numbers
+            fields: Optional list of columns to fetch, all columns by default
+
+        Returns:
+            Records as dictionaries
+        """
+        table = self.open_table(table_name)
+        columns = table.column_decoders(table.project(fields))
+        return [
+            view.to_dict(decoders=columns)
+            for view in table.iter_records_at(recnos, True, self.scan_mode == 'mmap')
+        ]
+
+    def read_columns(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None,
+                     fields: Optional[List[str]] = None, strings: str = 'object') -> Any:
+        from .columnar import ColumnarBatch, import_numpy
+        np = import_numpy()
+
+        table = self.open_table(table_name)
+        columns = table.project(fields)
+        record_length = table.record_length
+
+        # Copy the matching records into one buffer and decode every column
+        # from a 2D byte matrix, without building a dict per record
+        chunks = [bytes(view.buffer[view.start:view.start + record_length])
+                  for view in self._iter_matches(table, limit, filters)]
+        matrix = np.frombuffer(b''.join(chunks), dtype=np.uint8).reshape(len(chunks), record_length)
+
+        return ColumnarBatch(
+            {field.name: _decode_column(np, matrix, field, table.encoding, strings) for field in columns},
+            {field.name: field.type for field in columns}
+        )
+
+    def _iter_matches(self, table: DBFTableFile, limit: Optional[int],
+                      filters: Optional[List[Dict[str, Any]]]) -> Iterator['RecordView']:
+        tests = []
+        join_or = False
+        if filters:
+            tests, join_or = compile_predicate(
+                filters, lambda name, value: table.get_field(name).coerce_literal(value)
+            )
+            tests = [(table.get_field(name), test) for name, test in tests]
+
+        use_mmap = self.scan_mode == 'mmap'
+        recnos = self._index_candidates(table, filters)
+        if recnos is None:
+            records = table.iter_records(self.show_deleted, use_mmap)
+        else:
+            # Candidates still go through the filter tests below
+            records = table.iter_records_at(recnos, self.show_deleted, use_mmap)
+
+        count = 0
+        # Only the filter fields are decoded until a record matches
+        for view in records:
+            if limit and count >= limit:
+                break
+
+            if tests:
+                checks = (test(view.comparable(field)) for field, test in tests)
+                if not (any(checks) if join_or else all(checks)):
+                    continue
+
+            yield view
+            count += 1
+
+    def get_index_path(self, table: DBFTableFile) -> Optional[Path]:
+        """Find the structural CDX index of a table.
+
+        Args:
+            table: The table file
+
+        Returns:
+            Path to the CDX file or None if there is none
+        """
+        table_path = Path(table.path)
+        target = f"{table_path.stem}.cdx".lower()
+        for candidate in table_path.parent.iterdir():
+            if candidate.name.lower() == target:
+                return candidate
+        return None
+
+    def _index_candidates(self, table: DBFTableFile, filters: Optional[List[Dict[str, Any]]]) -> Optional[List[int]]:
+        """Locate the records matching an indexed filter condition.
+
+        Uses the first 'range', 'in' or '=' condition on a field with a usable
+        CDX tag (e.g. F_EMISION in VENTA, FECHA in FLUJORES/FLUJO01,
+        NO_REFEREN in PARTVTA) to seek the lower bound and stop past the
+        upper bound instead of walking the whole table.
+
+        Args:
+            table: The table file
+            filters: Filter conditions of the read
+
+        Returns:
+            Sorted record numbers to visit, or None to scan the table
+        """
+        if not self.use_index or not filters or uses_or(filters):
+            return None
+        index_path = self.get_index_path(table)
+        if index_path is None:
+            return None
+
+        try:
+            with self._open_index(index_path) as index:
+                for f in filters:
+                    if f['operator'] not in ('range', 'in', '=', '=='):
+                        continue
+                    field = table.field_map.get(f['field'].upper())
+                    if field is None:
+                        continue
+                    tag = index.tag_for_field(table, field)
+                    if tag is None:
+                        continue
+
+                    if f['operator'] == 'range':
+                        recnos = tag.range_recnos(
+                            tag.make_key(field.coerce_literal(f['from_value'])),
+                            tag.make_key(field.coerce_literal(f['to_value']))
+                        )
+                    else:
+                        values = f['values'] if f['operator'] == 'in' else [f['value']]
+                        recnos = []
+                        for key in sorted({tag.make_key(field.coerce_literal(v)) for v in values}):
+                            recnos.extend(tag.seek_recnos(key))
+                    return sorted(set(recnos))
+        except (OSError, ValueError, AttributeError, struct.error) as e:
+            # A missing, locked or unreadable index only costs a full scan
+            print(f"Index not used for {table.path}: {str(e)}")
+        return None
+
+    @contextmanager
+    def _open_index(self, index_path: Path):
+        """Open an index for one read, or reuse the session one while the file is unchanged."""
+        if not self._session_depth:
+            with CDXIndex(index_path) as index:
+                yield index
+            return
+
+        signature = self._file_signature(index_path)
+        cached = self._session_indexes.pop(str(index_path), None)
+        if cached and cached[0] != signature:
+            cached[1].close()
+            cached = None
+        index = cached[1] if cached else CDXIndex(index_path)
+        self._session_indexes[str(index_path)] = (signature, index)
+        yield index
+
+    def get_schema(self, table_name: str) -> TableSchema:
+        return schema_cache.get(self.get_table_path(table_name))
+
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        schema = self.get_schema(table_name)
+        return {
+            'field_count': len(schema.fields),
+            'columns': schema.names
+        }
+
+    def get_field_types(self, table_name: str) -> Dict[str, str]:
+        return self.get_schema(table_name).field_types
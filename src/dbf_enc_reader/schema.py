@@ -0,0 +1,190 @@
+import os
+import struct
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Field descriptor of a table header. offset is within a record, after the
+# deletion flag byte
+SchemaField = namedtuple('SchemaField', ['name', 'type', 'offset', 'length', 'decimals'])
+
+
+def resolve_table_path(data_source: Any, table_name: str) -> Path:
+    """Resolve the DBF file of a table, ignoring case on case sensitive filesystems.
+
+    Args:
+        data_source: Directory containing the DBF files
+        table_name: Table name with or without the .DBF extension
+
+    Returns:
+        Path to the DBF file
+    """
+    file_name = table_name if Path(table_name).suffix else f"{table_name}.DBF"
+    path = Path(data_source) / file_name
+    if path.exists():
+        return path
+
+    target = file_name.lower()
+    for candidate in Path(data_source).iterdir():
+        if candidate.name.lower() == target:
+            return candidate
+    raise FileNotFoundError(f"DBF table not found: {path}")
+
+
+class TableSchema:
+    """Layout of a DBF table as described by its header."""
+
+    def __init__(self, path: str, version: int, record_count: int, header_length: int, record_length: int,
+                 encrypted: bool, table_flags: int, language_driver: int, fields: List[SchemaField]):
+        self.path = path
+        self.version = version
+        self.record_count = record_count
+        self.header_length = header_length
+        self.record_length = record_length
+        self.encrypted = encrypted
+        self.table_flags = table_flags
+        self.language_driver = language_driver
+        self.fields = fields
+        self.field_map = {field.name.upper(): field for field in fields}
+        # Values derived from the layout (e.g. the provider column ordinals),
+        # dropped together with the schema when the file changes
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def read(cls, path: Any) -> 'TableSchema':
+        """Parse the header and field descriptors of a DBF file.
+
+        Args:
+            path: Path to the DBF file
+
+        Returns:
+            The table schema
+        """
+        path = str(path)
+        with open(path, 'rb') as f:
+            header = f.read(32)
+            if len(header) < 32:
+                raise ValueError(f"Invalid DBF header in {path}")
+            record_count, header_length, record_length = struct.unpack('<IHH', header[4:12])
+            descriptors = f.read(header_length - 32)
+
+        version = header[0]
+        fields = []
+        offset = 1  # First byte of every record is the deletion flag
+        for i in range(0, len(descriptors) - 31, 32):
+            descriptor = descriptors[i:i + 32]
+            if descriptor[0] == 0x0D:
+                break
+            name = descriptor[:11].split(b'\x00', 1)[0].decode('ascii', errors='replace').strip()
+            field_type = chr(descriptor[11]).upper()
+            length = descriptor[16]
+            decimals = descriptor[17]
+            if field_type == 'C' and version not in (0x30, 0x31, 0x32):
+                # Clipper style character fields use the decimals byte as high length byte
+                length += decimals * 256
+                decimals = 0
+            field = SchemaField(name, field_type, offset, length, decimals)
+            offset += length
+            # Visual FoxPro system column with the null flags, hidden by the provider
+            if field_type != '0':
+                fields.append(field)
+
+        return cls(path, version, record_count, header_length, record_length,
+                   header[15] != 0, header[28], header[29], fields)
+
+    @property
+    def names(self) -> List[str]:
+        return [field.name for field in self.fields]
+
+    @property
+    def field_types(self) -> Dict[str, str]:
+        """DBF type letter of each column."""
+        return {field.name: field.type for field in self.fields}
+
+    def has_field(self, name: str) -> bool:
+        return name.upper() in self.field_map
+
+    def project(self, names: Optional[List[str]] = None) -> List[SchemaField]:
+        """Get the descriptors of the requested columns, in table order.
+
+        Args:
+            names: Column names, all columns when empty. Unknown names are ignored
+
+        Returns:
+            List of field descriptors
+        """
+        if not names:
+            return self.fields
+        wanted = {name.upper() for name in names}
+        return [field for field in self.fields if field.name.upper() in wanted]
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """Get a value computed from this layout, building it on first use.
+
+        Args:
+            key: Name of the value
+            build: Callable computing it
+
+        Returns:
+            The cached value
+        """
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    def get_derived(self, key: str) -> Any:
+        """Get a derived value if it was already built, None otherwise."""
+        return self._derived.get(key)
+
+
+class SchemaCache:
+    """Table schemas by path, invalidated when the file size or mtime changes.
+
+    Header parsing (and anything derived with TableSchema.derived) is done
+    once per version of the file instead of on every read.
+    """
+
+    def __init__(self):
+        self._schemas: Dict[str, Tuple[Tuple[int, int], TableSchema]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(path: Any) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, path: Any) -> TableSchema:
+        """Get the schema of a DBF file, parsing its header if it changed.
+
+        Args:
+            path: Path to the DBF file
+
+        Returns:
+            The table schema
+        """
+        key = str(Path(path).resolve())
+        signature = self.signature(key)
+        with self._lock:
+            cached = self._schemas.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        schema = TableSchema.read(key)
+        with self._lock:
+            self._schemas[key] = (signature, schema)
+        return schema
+
+    def invalidate(self, path: Optional[Any] = None) -> None:
+        """Drop the schema of a file, or all of them."""
+        with self._lock:
+            if path is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(str(Path(path).resolve()), None)
+
+
+# Shared by the readers, the mapping validation and the column projection
+schema_cache = SchemaCache()
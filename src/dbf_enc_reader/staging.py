@@ -0,0 +1,144 @@
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Files that belong to a table: the table itself, its structural index and memos
+TABLE_EXTENSIONS = ('.dbf', '.cdx', '.fpt')
+
+# Copies of a table retried when the POS writes to it while it is being copied
+COPY_ATTEMPTS = 3
+
+# ioctl(FICLONE) from linux/fs.h
+FICLONE = 0x40049409
+
+
+def clone_file(source: Path, target: Path) -> bool:
+    """Copy a file, sharing its blocks (reflink) when the filesystem allows it.
+
+    Reflinks are made with ioctl(FICLONE) (Btrfs, XFS, ...). Everywhere
+    else, or when source and target are on different filesystems, the file
+    is copied.
+
+    Args:
+        source: File to copy
+        target: Path of the copy, replaced if it exists
+
+    Returns:
+        True if the copy is a reflink, False if the data was copied
+    """
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                cloned = True
+            except OSError:
+                cloned = False
+        if cloned:
+            shutil.copystat(source, target)
+            return True
+    shutil.copy2(source, target)
+    return False
+
+
+class StagingArea:
+    """Scratch directory with consistent copies of the DBF tables of a sync.
+
+    Scanning the copies instead of the live files keeps the reads away from
+    the POS locks and from records being written during the scan. Copies
+    keep the size and mtime of their source, so a table that didn't change
+    since the last staging is not copied again.
+
+    Usage:
+        staging = StagingArea(source_directory, staging_directory)
+        data_source = staging.stage(["VENTA.DBF", "PARTVTA.DBF"])
+    """
+
+    def __init__(self, source_directory: str, staging_directory: str):
+        """
+        Args:
+            source_directory: Directory with the live DBF files
+            staging_directory: Scratch directory for the copies, created if needed
+        """
+        self.source_directory = Path(source_directory)
+        self.staging_directory = Path(staging_directory)
+
+    def table_files(self, table_name: str) -> List[Path]:
+        """Get the files of a table (DBF, CDX, FPT) in the source directory.
+
+        Args:
+            table_name: Name of the DBF table, e.g. VENTA.DBF
+
+        Returns:
+            Paths of the files found, matched case-insensitively
+        """
+        stem = Path(table_name).stem.lower()
+        return sorted(
+            path for path in self.source_directory.iterdir()
+            if path.stem.lower() == stem and path.suffix.lower() in TABLE_EXTENSIONS
+        )
+
+    @staticmethod
+    def _signature(path: Path) -> tuple:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def _is_current(self, source: Path, target: Path) -> bool:
+        try:
+            return self._signature(source) == self._signature(target)
+        except FileNotFoundError:
+            return False
+
+    def stage_table(self, table_name: str) -> Dict[str, str]:
+        """Copy the files of a table to the staging directory.
+
+        The table is copied again if one of its files changed while being
+        copied, so the DBF and its CDX are taken at the same point.
+
+        Args:
+            table_name: Name of the DBF table
+
+        Returns:
+            Dictionary of file name to how it was staged ('reflink', 'copy'
+            or 'unchanged')
+        """
+        files = self.table_files(table_name)
+        if not files:
+            raise FileNotFoundError(f"DBF file not found: {self.source_directory / table_name}")
+
+        for attempt in range(COPY_ATTEMPTS):
+            before = {path: self._signature(path) for path in files}
+            staged = {}
+            for path in files:
+                target = self.staging_directory / path.name
+                if attempt == 0 and self._is_current(path, target):
+                    staged[path.name] = 'unchanged'
+                else:
+                    staged[path.name] = 'reflink' if clone_file(path, target) else 'copy'
+            if all(self._signature(path) == signature for path, signature in before.items()):
+                return staged
+            print(f"{table_name} changed while staging it, copying again ({attempt + 1}/{COPY_ATTEMPTS})")
+
+        # Don't leave a torn copy that looks current to the next run
+        for path in files:
+            (self.staging_directory / path.name).unlink(missing_ok=True)
+        raise RuntimeError(f"{table_name} kept changing while staging it")
+
+    def stage(self, tables: List[str]) -> str:
+        """Copy the files of the tables to the staging directory.
+
+        Args:
+            tables: Names of the DBF tables to stage
+
+        Returns:
+            The staging directory, to be used as the data source of the readers
+        """
+        self.staging_directory.mkdir(parents=True, exist_ok=True)
+        if self.staging_directory.resolve() == self.source_directory.resolve():
+            raise ValueError("The staging directory can't be the DBF source directory")
+
+        for table_name in tables:
+            staged = self.stage_table(table_name)
+            print(f"Staged {table_name}: " + ", ".join(f"{name} ({how})" for name, how in staged.items()))
+        return str(self.staging_directory)
@@ -0,0 +1,98 @@
+"""
+Memory utilities for keeping long sync runs under a resident memory ceiling.
+"""
+import gc
+import logging
+import sys
+from typing import Optional
+
+
+def get_rss_mb() -> Optional[float]:
+    """
+    Get the resident memory (RSS / working set) of this process.
+
+    Read from /proc on Linux and through GetProcessMemoryInfo on Windows.
+
+    Returns:
+        Resident memory in MB, or None if it can't be read on this platform
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/status', 'r', encoding='ascii') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError, IndexError):
+            return None
+        return None
+
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        get_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_process.restype = wintypes.HANDLE
+        try:
+            ok = ctypes.windll.psapi.GetProcessMemoryInfo(get_process(), ctypes.byref(counters), counters.cb)
+        except (AttributeError, OSError):
+            return None
+        return counters.WorkingSetSize / (1024 * 1024) if ok else None
+
+    return None
+
+
+class MemoryGuard:
+    """
+    Resident memory ceiling checked between the chunks of a run.
+
+    Usage:
+        guard = MemoryGuard(max_rss_mb)
+        ...process a chunk...
+        if guard.exceeded():
+            ...process smaller chunks or stop...
+    """
+
+    def __init__(self, max_rss_mb: Optional[float] = None):
+        """
+        Args:
+            max_rss_mb: Ceiling in MB, None or 0 to disable the checks
+        """
+        self.max_rss_mb = max_rss_mb or None
+        if self.max_rss_mb and get_rss_mb() is None:
+            logging.warning("Resident memory can't be read on this platform, MAX_RSS_MB is ignored")
+            self.max_rss_mb = None
+
+    def exceeded(self) -> bool:
+        """
+        Check the ceiling, collecting garbage first when it is over.
+
+        Returns:
+            True if the process is still over the ceiling after a collection
+        """
+        if not self.max_rss_mb:
+            return False
+        if get_rss_mb() <= self.max_rss_mb:
+            return False
+        gc.collect()
+        rss = get_rss_mb()
+        if rss > self.max_rss_mb:
+            logging.warning(f"Resident memory {rss:.0f} MB is over MAX_RSS_MB={self.max_rss_mb:.0f}")
+            return True
+        return False
+
@@ -1,11 +1,30 @@
 
 
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional
 import logging
+import os
 import sys
 from src.db.velneo_mappings import VelneoMappings
 from src.config.db_config import PostgresConnection
+from src.utils.get_enc import EncEnv
+
+class RunContext(NamedTuple):
+    """Mappings that are the same for every record of a run
+    
+    Resolved once by DataMap.get_run_context and passed to the
+    process_record_* methods, which then only map per-record values.
+    """
+    store: str
+    plaza: str
+    ser: Optional[int]
+    clt: Optional[int]
+    cmr: Optional[int]
+    pai: Optional[int]
+    emp: Optional[int]
+    emp_div: Optional[int]
+    alm: Optional[int]
+
 
 class DataMap:
     """Class for mapping DBF data to API format using database lookups
@@ -14,15 +33,26 @@ class DataMap:
     to the appropriate IDs needed for the API by querying the database.
     """
 
-    def __init__(self, db_config: Optional[Dict[str, Any]] = None):
+    def __init__(self, db_config: Optional[Dict[str, Any]] = None, velneo_mappings: Optional[VelneoMappings] = None):
         """Initialize the DataMap with database configuration
         
         Args:
             db_config: Optional database configuration dictionary. If not provided, 
                        config from PostgresConnection will be used.
+            velneo_mappings: Optional lookups to use instead of a new VelneoMappings
         """
+        if velneo_mappings is not None:
+            self.db_config = db_config
+            self.velneo_mappings = velneo_mappings
+            return
+
         self.db_config = db_config or PostgresConnection.get_db_config()
-        self.velneo_mappings = VelneoMappings(self.db_config)
+        env = EncEnv()
+        # Local copy of the reference tables kept between runs, off when not set
+        snapshot_path = env.get('VELNEO_SNAPSHOT_FILE') or None
+        # Refresh the cached lookups from the invalidation triggers (needs them installed)
+        listen = env.get('VELNEO_LISTEN', 'False').lower() == 'true'
+        self.velneo_mappings = VelneoMappings(self.db_config, snapshot_path=snapshot_path, listen=listen)
     
     def apply_map_serie(self) -> Optional[int]:
         """Get the Velneo ID for serie from the database
@@ -182,6 +212,21 @@ class DataMap:
             logging.error(f"Error mapping articulo with ref {ref}: {e}")
             return None
 
+    def prefetch_articulos(self, refs: Iterable[str]) -> int:
+        """Resolve the Velneo ID of every articulo of a run in one query
+        
+        Args:
+            refs: The REF of the detail records, repeated ones are fine
+            
+        Returns:
+            int: Number of articulos found
+        """
+        try:
+            return self.velneo_mappings.prefetch_articulos(refs)
+        except Exception as e:
+            logging.error(f"Error prefetching articulos: {e}")
+            return 0
+
     def apply_map_tipo_iva(self, ref: str) -> Optional[int]:
         """Get the Velneo ID for iva from the database
         
@@ -270,6 +315,26 @@ class DataMap:
             logging.error(f"Error mapping forma pago x caja banco with ref {ref}: {e}")
             return None
 
+    def apply_map_fac_ids(self, refs: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get the Velneo ID for map_fac_id of many references at once
+        
+        Args:
+            refs: The reference codes from the DBF records
+            
+        Returns:
+            Dict[str, Optional[int]]: The mapped ID of each non-empty reference
+        """
+        refs = {ref for ref in refs if ref}
+        try:
+            fac_ids = self.velneo_mappings.get_fac_ids(refs)
+        except Exception as e:
+            logging.error(f"Error mapping map_fac_id of {len(refs)} references: {e}")
+            fac_ids = None
+        if fac_ids is None:
+            # One query per reference, as apply_map_fac_id
+            fac_ids = {ref: self.apply_map_fac_id(ref) for ref in refs}
+        return fac_ids
+
     def apply_map_fac_id(self, ref: str) -> Optional[int]:
         """Get the Velneo ID for map_fac_id from the database
         
@@ -291,34 +356,60 @@ class DataMap:
     
     
     
-    def process_record_fac(self, record: Dict[str, Any], store, plaza) -> Dict[str, Any]:
+    def get_run_context(self, store: Optional[str] = None, plaza: Optional[str] = None) -> RunContext:
+        """Resolve the mappings shared by every record of a run
+        
+        Args:
+            store: Store code, CLAVE_SUCURSAL from the environment by default
+            plaza: Plaza code, CLAVE_PLAZA from the environment by default
+            
+        Returns:
+            RunContext: The resolved values, None for the ones not found
+        """
+        store = store or os.environ.get("CLAVE_SUCURSAL", "ROTON")  # Get from environment variable with fallback
+        plaza = plaza or os.environ.get("CLAVE_PLAZA", "XALAP")  # Get from environment variable with fallback
+        return RunContext(
+            store=store,
+            plaza=plaza,
+            ser=self.apply_map_serie(),
+            clt=self.apply_map_cliente(),
+            cmr=self.apply_map_vendedor(1),
+            pai=self.apply_map_pais('México'),
+            emp=self.apply_map_emp(),
+            emp_div=self.apply_map_div(),
+            alm=self.apply_map_alm(store, plaza),
+        )
+    
+    def process_record_fac(self, record: Dict[str, Any], store, plaza, context: Optional[RunContext] = None) -> Dict[str, Any]:
         """Process a complete record by applying all relevant mappings
         
         Args:
             record: Dictionary containing the DBF record data
+            context: Mappings of the run, resolved here if not given
             
         Returns:
             Dict[str, Any]: The processed record with mapped values
         """
+        context = context or self.get_run_context(store, plaza)
         result = record.copy()
         # print(f' MAP FAC BEFORE {record}')
         # Apply mappings based on available fields in the record
 
-        result['ser'] = self.apply_map_serie()
+        result['ser'] = context.ser
             
-        result['clt'] = self.apply_map_cliente()
+        result['clt'] = context.clt
             
         result['fpg'] = self.apply_map_metodo_pago(record['fpg'])
             
-        result['cmr'] = self.apply_map_vendedor(1)
+        result['cmr'] = context.cmr
             
-        result['pai'] = self.apply_map_pais('México')
+        result['pai'] = context.pai
 
-        result['emp_div'] = self.apply_map_div()
+        result['emp_div'] = context.emp_div
 
-        result['emp'] = self.apply_map_emp()
+        result['emp'] = context.emp
 
-        result['alm'] = self.apply_map_alm(store, plaza)
+        result['alm'] = context.alm
 
         result['vta_fac_g'] = self.apply_map_fac_id(record['og_folio'])
 
@@ -326,47 +417,50 @@ class DataMap:
       
         return result
 
-    def process_record_det(self, record: Dict[str, Any],store, plaza) -> Dict[str, Any]:
+    def process_record_det(self, record: Dict[str, Any], store, plaza, context: Optional[RunContext] = None) -> Dict[str, Any]:
         """Process a complete record by applying all relevant mappings
         
         Args:
             record: Dictionary containing the DBF record data
+            context: Mappings of the run, resolved here if not given
             
         Returns:
             Dict[str, Any]: The processed record with mapped values
         """
+        context = context or self.get_run_context(store, plaza)
         result = record.copy()
         # print(f' MAP DETAIL BEFORE {record}')
         
         # Apply mappings based on available fields in the record
-        result['alm'] = self.apply_map_alm(store, plaza)
+        result['alm'] = context.alm
 
-        result['emp_div'] = self.apply_map_div()
+        result['emp_div'] = context.emp_div
 
-        result['emp'] = self.apply_map_emp()
+        result['emp'] = context.emp
 
         result['art'] = self.apply_map_articulo(record['REF'])
      
             
-        result['ser_vta'] = self.apply_map_serie()
+        result['ser_vta'] = context.ser
      
         #result['mov_tip'] = self.apply_map_tipo_mov(record['tipo_mov'])
         result['mov_tip'] = 'V'
 
         result['reg_iva_vta'] = self.apply_map_tipo_iva(record['iva_vta'])
 
-        result['clt'] = self.apply_map_cliente()
+        result['clt'] = context.clt
 
         # print(f' MAP DETAIL AFTER {result}')
    
         return result
     
 
-    def process_record_rec(self, record: Dict[str, Any], store, plaza) -> Dict[str, Any]:
+    def process_record_rec(self, record: Dict[str, Any], store, plaza, context: Optional[RunContext] = None) -> Dict[str, Any]:
         """Process a complete record by applying all relevant mappings
         
         Args:
             record: Dictionary containing the DBF record data
+            context: Mappings of the run, only its plaza is used here
             
         Returns:
             Dict[str, Any]: The processed record with mapped values
@@ -378,7 +472,7 @@ class DataMap:
         
         result['caja_bco'] = self.apply_map_caja_banco(record['caja_bco'])
 
-        result['plaza'] = plaza
+        result['plaza'] = context.plaza if context else plaza
 
         result['fpg'] = self.apply_map_forma_pago_caja_banco(record['caja_bco'])
 
@@ -386,4 +480,68 @@ class DataMap:
    
         return result
 
-
+    def process_batch_fac(self, records: List[Dict[str, Any]], context: RunContext) -> None:
+        """Apply the header mappings to a list of records, in place
+        
+        Each distinct reference is mapped once, and the folios of the
+        original invoices are resolved with a single query.
+        
+        Args:
+            records: Dictionaries containing the DBF header data
+            context: Mappings of the run (see get_run_context)
+        """
+        fpg_map = {ref: self.apply_map_metodo_pago(ref) for ref in {record.get('fpg') for record in records}}
+        fac_ids = self.apply_map_fac_ids(record.get('og_folio') for record in records)
+
+        for record in records:
+            record['ser'] = context.ser
+            record['clt'] = context.clt
+            record['fpg'] = fpg_map[record.get('fpg')]
+            record['cmr'] = context.cmr
+            record['pai'] = context.pai
+            record['emp_div'] = context.emp_div
+            record['emp'] = context.emp
+            record['alm'] = context.alm
+            record['vta_fac_g'] = fac_ids.get(record.get('og_folio'))
+
+    def process_batch_det(self, records: List[Dict[str, Any]], context: RunContext) -> None:
+        """Apply the detail mappings to a list of records, in place
+        
+        The articulos of all the records are resolved with a single query,
+        and each distinct iva reference is mapped once.
+        
+        Args:
+            records: Dictionaries containing the DBF detail data
+            context: Mappings of the run (see get_run_context)
+        """
+        self.prefetch_articulos(record.get('REF') for record in records)
+        art_map = {ref: self.apply_map_articulo(ref) for ref in {record.get('REF') for record in records}}
+        iva_map = {ref: self.apply_map_tipo_iva(ref) for ref in {record.get('iva_vta') for record in records}}
+
+        for record in records:
+            record['alm'] = context.alm
+            record['emp_div'] = context.emp_div
+            record['emp'] = context.emp
+            record['art'] = art_map[record.get('REF')]
+            record['ser_vta'] = context.ser
+            record['mov_tip'] = 'V'
+            record['reg_iva_vta'] = iva_map[record.get('iva_vta')]
+            record['clt'] = context.clt
+
+    def process_batch_rec(self, records: List[Dict[str, Any]], context: RunContext) -> None:
+        """Apply the receipt mappings to a list of records, in place
+        
+        Args:
+            records: Dictionaries containing the DBF receipt data
+            context: Mappings of the run (see get_run_context)
+        """
+        refs = {record.get('caja_bco') for record in records}
+        caja_map = {ref: self.apply_map_caja_banco(ref) for ref in refs}
+        fpg_map = {ref: self.apply_map_forma_pago_caja_banco(ref) for ref in refs}
+
+        for record in records:
+            # Both mapped from the DBF caja_bco, before it is replaced
+            ref = record.get('caja_bco')
+            record['caja_bco'] = caja_map[ref]
+            record['plaza'] = context.plaza
+            record['fpg'] = fpg_map[ref]
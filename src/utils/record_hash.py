@@ -0,0 +1,147 @@
+"""
+Hashes of the sale records compared against estado_factura_venta.hash.
+
+Version 1 is the original hash: MD5 of json.dumps of the record with sorted
+keys, and MD5 of the whole dataset dumped again.
+Version 2 hashes a compact canonical encoding with BLAKE2b, truncated to 16
+bytes so it keeps the 32 hex characters of the stored hashes, and derives the
+dataset hash from the record hashes instead of serializing everything twice.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+LEGACY_VERSION = 1
+CURRENT_VERSION = 2
+HASH_VERSIONS = (LEGACY_VERSION, CURRENT_VERSION)
+
+DIGEST_SIZE = 16
+
+
+def canonical_bytes(record: Dict[str, Any]) -> bytes:
+    """
+    Encode a record the same way whatever the key order.
+
+    Compact sorted JSON through the C encoder, which is faster than
+    walking the record in Python. Values JSON can't encode (dates,
+    decimals) are encoded through str.
+
+    Args:
+        record: Record to encode
+
+    Returns:
+        UTF-8 bytes of the encoding
+    """
+    return json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def legacy_record_hash(record: Dict[str, Any]) -> str:
+    """
+    Get the version 1 hash of a record, as stored before version 2.
+
+    Args:
+        record: Record without the hash keys
+
+    Returns:
+        MD5 hex digest
+    """
+    return hashlib.md5(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def record_hash(record: Dict[str, Any], version: int = CURRENT_VERSION) -> str:
+    """
+    Get the hash of a record.
+
+    Args:
+        record: Record without the hash keys
+        version: Hash version (see HASH_VERSIONS)
+
+    Returns:
+        32 character hex digest
+    """
+    if version == LEGACY_VERSION:
+        return legacy_record_hash(record)
+    if version == CURRENT_VERSION:
+        return hashlib.blake2b(canonical_bytes(record), digest_size=DIGEST_SIZE).hexdigest()
+    raise ValueError(f"Unknown hash version {version}. Use one of {HASH_VERSIONS}")
+
+
+def dataset_hash(records: List[Dict[str, Any]], version: int = CURRENT_VERSION) -> str:
+    """
+    Get the hash of a whole dataset.
+
+    Version 2 hashes the 'md5_hash' of each record in order, so the records
+    must have been hashed first (see hash_records).
+
+    Args:
+        records: Records of the dataset
+        version: Hash version (see HASH_VERSIONS)
+
+    Returns:
+        32 character hex digest
+    """
+    if version == LEGACY_VERSION:
+        return hashlib.md5(json.dumps(records, sort_keys=True).encode('utf-8')).hexdigest()
+    if version == CURRENT_VERSION:
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        for record in records:
+            digest.update(record['md5_hash'].encode('ascii'))
+        return digest.hexdigest()
+    raise ValueError(f"Unknown hash version {version}. Use one of {HASH_VERSIONS}")
+
+
+def hash_records(records: Iterable[Dict[str, Any]], version: int = CURRENT_VERSION,
+                 keep_legacy: bool = False) -> None:
+    """
+    Add the hash of each record under 'md5_hash'.
+
+    The key keeps its name whatever the version, the rest of the sync and
+    the stored hashes rely on it.
+
+    Args:
+        records: Records to hash, updated in place
+        version: Hash version (see HASH_VERSIONS)
+        keep_legacy: Also add the version 1 hash under 'legacy_hash', so the
+            records still match the hashes stored before a version change
+    """
+    keep_legacy = keep_legacy and version != LEGACY_VERSION
+    for record in records:
+        legacy = legacy_record_hash(record) if keep_legacy else None
+        record['md5_hash'] = record_hash(record, version)
+        if legacy:
+            record['legacy_hash'] = legacy
+
+
+def matches_stored(record: Dict[str, Any], stored_hash: Optional[str]) -> bool:
+    """
+    Check a hashed record against the hash stored for its folio.
+
+    Args:
+        record: Record hashed by hash_records
+        stored_hash: Hash stored in estado_factura_venta
+
+    Returns:
+        True if the stored hash is the record hash of either version
+    """
+    if not stored_hash:
+        return False
+    return stored_hash in (record.get('md5_hash'), record.get('legacy_hash'))
+
+
+def day_root(folio_hashes: Dict[str, str]) -> str:
+    """
+    Get the root hash of a day from the hashes of its folios.
+
+    The folio hashes are the leaves stored in estado_factura_venta, so a
+    day whose root is unchanged has the same folios with the same hashes.
+
+    Args:
+        folio_hashes: Dictionary of folio to record hash
+
+    Returns:
+        32 character hex digest, independent of the order of the folios
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for folio in sorted(folio_hashes):
+        digest.update(f"{folio}:{folio_hashes[folio]}\n".encode('utf-8'))
+    return digest.hexdigest()
@@ -0,0 +1,92 @@
+"""Benchmark of the per-record mapping of DataMap (headers and details).
+
+Compares resolving the run-wide mappings (serie, cliente, emp, div, alm,
+pais, vendedor) on every record with resolving them once in a RunContext,
+and with the batch mapping of whole lists of headers and details. The lookups run on in-memory tables, so only the mapping work is timed.
+Run it directly:
+
+    python tests/bench_data_map.py
+
+Results are printed and written to bench_output.txt in the project root.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.db.velneo_mappings import VelneoMappings
+from src.utils.post_data_map import DataMap
+from tests.test_reference_cache import FakePool
+
+# (headers, details per header) of the runs
+SIZES = [(500, 4), (2000, 4), (8000, 4)]
+
+
+def make_records(headers, details):
+    return [
+        (
+            {'Cabecera': 'DV', 'Folio': f"{i:06d}", 'fpg': 'EF', 'og_folio': None},
+            [{'REF': 'A1', 'iva_vta': '16'} for _ in range(details)],
+        )
+        for i in range(headers)
+    ]
+
+
+def run(data_mapper, records, context):
+    header_time = detail_time = 0.0
+    detail_count = 0
+    for header, details in records:
+        start = time.perf_counter()
+        data_mapper.process_record_fac(header, 'ROTON', 'XALAPA', context)
+        header_time += time.perf_counter() - start
+        for detail in details:
+            start = time.perf_counter()
+            data_mapper.process_record_det(detail, 'ROTON', 'XALAPA', context)
+            detail_time += time.perf_counter() - start
+            detail_count += 1
+    return header_time / len(records), detail_time / detail_count
+
+
+def run_batch(data_mapper, records, context):
+    headers = [header for header, _ in records]
+    details = [detail for _, header_details in records for detail in header_details]
+    start = time.perf_counter()
+    data_mapper.process_batch_fac(headers, context)
+    header_time = time.perf_counter() - start
+    start = time.perf_counter()
+    data_mapper.process_batch_det(details, context)
+    detail_time = time.perf_counter() - start
+    return header_time / len(headers), detail_time / len(details)
+
+
+def main():
+    data_mapper = DataMap(velneo_mappings=VelneoMappings({}, pool=FakePool()))
+    # Warm the lookups so both runs map from memory
+    data_mapper.get_run_context('ROTON', 'XALAPA')
+    data_mapper.apply_map_articulo('A1')
+
+    lines = [f"{'headers':>8} {'details':>8} {'per record hdr/det (us)':>24} {'run context hdr/det (us)':>25} {'batch hdr/det (us)':>19}"]
+    for headers, details in SIZES:
+        records = make_records(headers, details)
+        per_record = run(data_mapper, records, None)
+        context = data_mapper.get_run_context('ROTON', 'XALAPA')
+        with_context = run(data_mapper, records, context)
+        batch = run_batch(data_mapper, make_records(headers, details), context)
+        lines.append(
+            f"{headers:>8} {headers * details:>8} "
+            f"{per_record[0] * 1e6:>11.1f} / {per_record[1] * 1e6:>10.1f} "
+            f"{with_context[0] * 1e6:>12.1f} / {with_context[1] * 1e6:>10.1f} "
+            f"{batch[0] * 1e6:>8.1f} / {batch[1] * 1e6:>8.1f}"
+        )
+
+    output = "\n".join(lines)
+    print("\n" + output)
+    with open(Path(project_root) / "bench_output.txt", "w", encoding="utf-8") as f:
+        f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
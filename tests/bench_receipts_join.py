@@ -0,0 +1,130 @@
+"""Benchmark of the receipt join of VentasController (headers x FLUJORES/FLUJO01).
+
+Compares the previous nested-loop join with the REF_NUM index on synthetic
+month-sized data. Run it directly:
+
+    python tests/bench_receipts_join.py
+
+Results are printed and written to bench_output.txt in the project root.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.controllers.ventas_controller import VentasController
+from src.dbf_enc_reader.mapping_manager import MappingManager
+from tests.test_native_reader import write_dbf
+
+# (headers, receipts per table) of the runs, from a small day to a busy month
+SIZES = [(250, 150), (1000, 600), (4000, 2400), (16000, 9600)]
+
+# The nested loop is quadratic, don't wait for it on the larger runs
+LEGACY_MAX_HEADERS = 4000
+
+
+class BenchConfig:
+    backend = 'native'
+    encryption_password = None
+    dll_path = None
+    limit_rows = None
+    read_workers = 1
+    staging_directory = None
+
+    def __init__(self, source_directory):
+        self.source_directory = source_directory
+
+
+def make_controller():
+    """Controller over empty receipt tables, used for their field types only."""
+    mapping_manager = MappingManager(str(Path(project_root) / "mappings_dv.json"))
+    fields = [
+        (mapping['dbf'], 'N' if mapping['type'] == 'number' else 'C', 12, 2 if mapping['type'] == 'number' else 0)
+        for mapping in mapping_manager.get_field_mappings("FLUJORES.DBF").values()
+    ]
+    source = Path(tempfile.mkdtemp())
+    for dbf_name in ("FLUJORES.DBF", "FLUJO01.DBF"):
+        write_dbf(source / dbf_name, fields, [])
+    return VentasController(mapping_manager, BenchConfig(str(source)))
+
+
+def make_data(headers, receipts):
+    """Headers referencing one receipt each, split over FLUJORES and FLUJO01.
+
+    Returns:
+        Tuple of (reference records, receipt tables)
+    """
+    reference_records = [{'ref_recibo': str(100000 + i), 'folio': f"{i:06d}"} for i in range(headers)]
+    receipt_tables = []
+    for table, dbf_name in enumerate(("FLUJORES.DBF", "FLUJO01.DBF")):
+        records = [
+            {
+                'FECHA': '05/05/2025 12:00:00 a. m.',
+                'REF_NUM': str(100000 + (i * 2 + table) % headers),
+                'IMPORTE': f"{i % 500}.50",
+                'CVE_CON': 'EF',
+                'TIENDA': 'DV',
+                'REF_TIPO': 'FA',
+                'HORA': '12:00',
+            }
+            for i in range(receipts)
+        ]
+        receipt_tables.append((dbf_name, records))
+    return reference_records, receipt_tables
+
+
+def legacy_match(controller, reference_records, receipt_tables):
+    """The join as it was: every header scans every receipt."""
+    raw_data = []
+    for dbf_name, records in receipt_tables:
+        plan = controller.get_plan(dbf_name, controller.receipt_dbfs[0])
+        raw_data.extend((record, plan) for record in records)
+
+    receipts_by_folio = {}
+    for ref in reference_records:
+        ref_recibo = ref.get('ref_recibo')
+        folio = ref.get('folio')
+        if ref_recibo and folio:
+            if folio not in receipts_by_folio:
+                receipts_by_folio[folio] = []
+            for record, plan in raw_data:
+                if 'REF_NUM' in record and str(record['REF_NUM']) == str(ref_recibo):
+                    transformed = plan.apply(record)
+                    if transformed:
+                        receipts_by_folio[folio].append(transformed)
+    return receipts_by_folio
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    controller = make_controller()
+    lines = [f"{'headers':>8} {'receipts':>9} {'nested loop':>12} {'indexed':>9} {'speedup':>8}"]
+    for headers, receipts in SIZES:
+        reference_records, receipt_tables = make_data(headers, receipts)
+        indexed, indexed_time = timed(controller._match_receipts, reference_records, receipt_tables)
+
+        if headers <= LEGACY_MAX_HEADERS:
+            legacy, legacy_time = timed(legacy_match, controller, reference_records, receipt_tables)
+            assert legacy == indexed, "The indexed join must return the same receipts"
+            lines.append(f"{headers:>8} {receipts * 2:>9} {legacy_time:>11.3f}s {indexed_time:>8.3f}s "
+                         f"{legacy_time / max(indexed_time, 1e-9):>7.1f}x")
+        else:
+            lines.append(f"{headers:>8} {receipts * 2:>9} {'-':>12} {indexed_time:>8.3f}s {'-':>8}")
+
+    output = "\n".join(lines)
+    print("\n" + output)
+    with open(Path(project_root) / "bench_output.txt", "w", encoding="utf-8") as f:
+        f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import sys
+import struct
+import tempfile
+from pathlib import Path
+from datetime import date
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.cdx import CDXIndex, encode_double, JULIAN_DAY_OFFSET
+from src.dbf_enc_reader.native import NativeBackend
+from tests.test_native_reader import write_dbf
+
+LEAF_ENTRIES = 4  # Small leaves so the tags get an interior root node
+
+
+def leaf_node(entries, key_length, trail_byte, attributes, left, right):
+    """Pack (key, recno) entries into a compact leaf node."""
+    info = b''
+    keys = b''
+    previous = b''
+    for key, recno in entries:
+        duplicates = 0
+        while duplicates < min(len(previous), key_length) and previous[duplicates] == key[duplicates]:
+            duplicates += 1
+        trailing = len(key) - len(key.rstrip(trail_byte))
+        trailing = min(trailing, key_length - duplicates)
+        info += (recno | duplicates << 16 | trailing << 24).to_bytes(4, 'little')
+        keys = key[duplicates:key_length - trailing] + keys
+        previous = key
+
+    node = struct.pack('<HHII', attributes, len(entries), left, right)
+    node += struct.pack('<HIBBBBBB', 488 - len(info) - len(keys), 0xFFFF, 0xFF, 0xFF, 16, 8, 8, 4)
+    node += info
+    return node + b'\x00' * (512 - len(node) - len(keys)) + keys
+
+
+def tag_header(root, key_length, expression):
+    header = struct.pack('<IIIHBB', root, 0xFFFFFFFF, 0, key_length, 0x60, 1)
+    header += b'\x00' * (502 - len(header))
+    header += struct.pack('<HHHHH', 0, 0, 0, 0, len(expression) + 1)
+    return header + (expression.encode('ascii') + b'\x00').ljust(512, b'\x00')
+
+
+def write_cdx(path, tags):
+    """Write a compound index.
+
+    Args:
+        path: Destination file
+        tags: List of (name, expression, key_length, trail_byte, sorted (key, recno) entries)
+    """
+    blobs = {}
+    offset = 1024 + 512  # directory header + directory leaf
+    tag_offsets = []
+    for name, expression, key_length, trail_byte, entries in tags:
+        header_offset = offset
+        offset += 1024
+        chunks = [entries[i:i + LEAF_ENTRIES] for i in range(0, len(entries), LEAF_ENTRIES)] or [[]]
+        leaf_offsets = [offset + 512 * i for i in range(len(chunks))]
+        offset += 512 * len(chunks)
+        single = len(chunks) == 1
+        for i, chunk in enumerate(chunks):
+            left = leaf_offsets[i - 1] if i > 0 else 0xFFFFFFFF
+            right = leaf_offsets[i + 1] if i + 1 < len(chunks) else 0xFFFFFFFF
+            blobs[leaf_offsets[i]] = leaf_node(chunk, key_length, trail_byte, 3 if single else 2, left, right)
+
+        root = leaf_offsets[0]
+        if not single:
+            root = offset
+            offset += 512
+            node = struct.pack('<HHII', 1, len(chunks), 0xFFFFFFFF, 0xFFFFFFFF)
+            for chunk, leaf_offset in zip(chunks, leaf_offsets):
+                last_key, last_recno = chunk[-1]
+                node += last_key + struct.pack('>II', last_recno, leaf_offset)
+            blobs[root] = node.ljust(512, b'\x00')
+
+        blobs[header_offset] = tag_header(root, key_length, expression)
+        tag_offsets.append((name.encode('ascii').ljust(10, b' '), header_offset))
+
+    blobs[0] = tag_header(1024, 10, '')
+    blobs[1024] = leaf_node(sorted(tag_offsets), 10, b' ', 3, 0xFFFFFFFF, 0xFFFFFFFF)
+
+    with open(path, 'wb') as f:
+        for position in sorted(blobs):
+            f.seek(position)
+            f.write(blobs[position])
+
+
+FIELDS = [
+    ('NO_REFEREN', 'C', 6, 0),
+    ('F_EMISION', 'D', 8, 0),
+]
+
+DAYS = [date(2025, 5, 1 + (i * 7) % 20) for i in range(30)]
+ROWS = [(f"{i + 1:06d}", day.strftime('%Y%m%d')) for i, day in enumerate(DAYS)]
+
+
+def make_source(with_dtos=False):
+    source = Path(tempfile.mkdtemp())
+    write_dbf(source / 'VENTA.DBF', FIELDS, ROWS, deleted={3})
+
+    folio_entries = sorted((folio.encode('ascii'), i + 1) for i, (folio, _) in enumerate(ROWS))
+    if with_dtos:
+        date_tag = ('FECHA', 'DTOS(F_EMISION)', 8, b' ',
+                    sorted((day.strftime('%Y%m%d').encode('ascii'), i + 1) for i, day in enumerate(DAYS)))
+    else:
+        date_tag = ('F_EMISION', 'F_EMISION', 8, b'\x00',
+                    sorted((encode_double(day.toordinal() + JULIAN_DAY_OFFSET), i + 1) for i, day in enumerate(DAYS)))
+
+    write_cdx(source / 'VENTA.CDX', [('NO_REFEREN', 'NO_REFEREN', 6, b' ', folio_entries), date_tag])
+    return source
+
+
+def range_filter(start, end):
+    return [{
+        'field': 'F_EMISION',
+        'operator': 'range',
+        'from_value': start.strftime("%m-%d-%Y"),
+        'to_value': end.strftime("%m-%d-%Y"),
+    }]
+
+
+def test_tag_directory():
+    source = make_source()
+    with CDXIndex(source / 'VENTA.CDX') as index:
+        assert set(index.tags) == {'NO_REFEREN', 'F_EMISION'}
+        assert index.tags['F_EMISION'].expression == 'F_EMISION'
+
+
+def check_date_range_seek(with_dtos):
+    source = make_source(with_dtos)
+    indexed = NativeBackend(source)
+    scanned = NativeBackend(source, use_index=False)
+    filters = range_filter(date(2025, 5, 8), date(2025, 5, 9))
+
+    table = indexed.open_table('VENTA.DBF')
+    candidates = indexed._index_candidates(table, filters)
+    expected = [i + 1 for i, day in enumerate(DAYS) if date(2025, 5, 8) <= day <= date(2025, 5, 9)]
+    assert candidates == expected
+
+    assert indexed.read_table('VENTA.DBF', 0, filters) == scanned.read_table('VENTA.DBF', 0, filters)
+
+
+def test_date_range_seek():
+    check_date_range_seek(with_dtos=False)
+
+
+def test_dtos_range_seek():
+    check_date_range_seek(with_dtos=True)
+
+
+def test_in_filter_seek():
+    source = make_source()
+    indexed = NativeBackend(source)
+    filters = [{'field': 'NO_REFEREN', 'operator': 'in', 'values': ['000004', '000017', '000030', '999999']}]
+
+    table = indexed.open_table('VENTA.DBF')
+    assert indexed._index_candidates(table, filters) == [4, 17, 30]
+
+    # Record 4 is deleted, the index still points at it
+    records = indexed.read_table('VENTA.DBF', 0, filters)
+    assert [r['NO_REFEREN'] for r in records] == ['000017', '000030']
+
+
+def main():
+    test_tag_directory()
+    test_date_range_seek()
+    test_dtos_range_seek()
+    test_in_filter_seek()
+    print("CDX index tests passed!")
+
+
+if __name__ == "__main__":
+    main()
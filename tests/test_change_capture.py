@@ -0,0 +1,72 @@
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader import change_capture
+from src.dbf_enc_reader.change_capture import ChangeCapture, ChangeStateStore, TableMark
+from src.dbf_enc_reader.native import NativeBackend
+from tests.test_native_reader import write_dbf, VENTA_FIELDS, VENTA_ROWS
+
+
+def make_rows(count):
+    return [('DV', f"{i:06d}", '20250505', f"{i}.00") for i in range(1, count + 1)]
+
+
+def mark(source, previous=None):
+    return TableMark.capture(NativeBackend(source).open_table('VENTA.DBF'), previous)
+
+
+def test_appended_and_modified_records():
+    source = Path(tempfile.mkdtemp())
+    change_capture.BLOCK_RECORDS = 4
+    try:
+        rows = make_rows(10)
+        write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, rows)
+        previous = mark(source)
+        assert previous.last_recno == 10
+        assert mark(source).changed_recnos(previous) == []
+
+        # Record 6 modified (block 5..8) and two records appended
+        rows[5] = ('DV', '000006', '20250505', '99.00')
+        write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, rows + make_rows(12)[10:])
+        assert mark(source, previous).changed_recnos(previous) == [5, 6, 7, 8, 11, 12]
+
+        # Packed table: fewer records than the mark
+        write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, rows[:8])
+        assert mark(source, previous).changed_recnos(previous) is None
+    finally:
+        change_capture.BLOCK_RECORDS = 1024
+
+
+def test_state_round_trip():
+    source = Path(tempfile.mkdtemp())
+    write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS)
+    store = ChangeStateStore(source / 'state' / 'sync.json')
+
+    capture = ChangeCapture(source, ['VENTA.DBF'], store)
+    assert capture.detect('2025-05-01', '2025-05-31') is None  # first run
+    capture.commit(['000002'])
+
+    write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS + [('DV', '000006', '20250507', '3.00')])
+    changes = capture.detect('2025-05-01', '2025-05-31')
+    assert changes == {'tables': {'VENTA.DBF': [6]}, 'pending_folios': ['000002']}
+
+    records = NativeBackend(source).read_records_at('VENTA.DBF', [5, 6], ['NO_REFEREN'])
+    assert records == [{'NO_REFEREN': '000005'}, {'NO_REFEREN': '000006'}]  # deleted records included
+
+    # Another window needs a full scan
+    assert ChangeCapture(source, ['VENTA.DBF'], store).detect('2025-05-01', '2025-06-01') is None
+
+
+def main():
+    test_appended_and_modified_records()
+    test_state_round_trip()
+    print("Change capture tests passed!")
+
+
+if __name__ == "__main__":
+    main()
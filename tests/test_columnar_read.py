@@ -0,0 +1,62 @@
+import sys
+import importlib.util
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.backends import ReaderBackend
+from src.dbf_enc_reader.native import NativeBackend
+from tests.test_native_reader import make_source
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+def test_native_columns():
+    if not HAS_NUMPY:
+        print("NumPy not installed, skipping columnar tests")
+        return
+    import numpy as np
+
+    backend = NativeBackend(make_source())
+    batch = backend.read_columns('VENTA.DBF')
+
+    assert len(batch) == 4
+    assert batch.names == ['TIPO_DOC', 'NO_REFEREN', 'F_EMISION', 'TOTAL_BRUT']
+    assert list(batch['NO_REFEREN']) == ['000001', '000002', '000003', '000004']
+    assert batch['TOTAL_BRUT'].dtype == np.float64
+    assert np.nansum(batch['TOTAL_BRUT']) == 127.75
+    assert np.isnan(batch['TOTAL_BRUT'][3])
+    assert batch['F_EMISION'][0] == np.datetime64('2025-05-04')
+
+    fixed = backend.read_columns('VENTA.DBF', fields=['TIPO_DOC'], strings='bytes')
+    assert fixed.names == ['TIPO_DOC']
+    assert fixed['TIPO_DOC'].dtype == np.dtype('S2')
+
+
+def test_generic_columns_match_native():
+    if not HAS_NUMPY:
+        return
+    import numpy as np
+
+    backend = NativeBackend(make_source())
+    filters = [{'field': 'TIPO_DOC', 'operator': '=', 'value': 'DV'}]
+    native = backend.read_columns('VENTA.DBF', 0, filters)
+    # Path used by backends without a columnar decoder (e.g. ADS)
+    generic = ReaderBackend.read_columns(backend, 'VENTA.DBF', 0, filters)
+
+    assert native.names == generic.names
+    for name in native.names:
+        assert native[name].dtype == generic[name].dtype
+        assert np.array_equal(native[name], generic[name], equal_nan=native[name].dtype.kind == 'f')
+
+
+def main():
+    test_native_columns()
+    test_generic_columns_match_native()
+    print("Columnar read tests passed!")
+
+
+if __name__ == "__main__":
+    main()
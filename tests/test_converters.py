@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.converters import DataConverter
+from src.dbf_enc_reader.mapping_manager import MappingManager
+from src.dbf_enc_reader.native import NativeBackend
+from tests.test_native_reader import make_source
+
+FIELD_MAPPINGS = {
+    "tipo_doc": {"dbf": "TIPO_DOC", "velneo_table": "Tipo", "type": "string"},
+    "folio": {"dbf": "NO_REFEREN", "velneo_table": "Folio", "type": "number"},
+    "fecha": {"dbf": "F_EMISION", "velneo_table": "Fecha", "type": "string"},
+    "total": {"dbf": "TOTAL_BRUT", "velneo_table": "Total", "type": "number"},
+    "missing": {"dbf": "MISSING", "velneo_table": "Missing", "type": "number"},
+}
+
+
+def test_number_conversion():
+    converter = DataConverter()
+    to_number = converter.field_converter('TOTAL_BRUT', 'number', 'N')
+
+    assert to_number('100.50') == 100.5
+    assert type(to_number('20')) is int
+    assert to_number('') == 0
+    assert to_number(None) == 0
+    assert to_number(7.0) == 7.0 and type(to_number(7.0)) is float
+    assert converter.field_converter('NO_REFEREN', 'number', 'C')('000123') == '000123'
+    assert converter.field_converter('CANTIDAD', 'number', 'I')('') == 0
+
+
+def test_convert_batch_from_native_reader():
+    source = make_source()
+    backend = NativeBackend(source)
+    converter = DataConverter()
+    converters = converter.compile_converters(FIELD_MAPPINGS, backend.get_field_types('VENTA.DBF'))
+
+    records = converter.convert_batch(backend.read_table('VENTA.DBF'), converters)
+    assert records[0] == {
+        'Tipo': 'DV',
+        'Folio': '000001',
+        'Fecha': '04/05/2025 12:00:00 a. m.',
+        'Total': 100.5,
+    }
+    assert records[3]['Total'] == 0
+    assert records == [converter.convert_record(r, converters) for r in backend.read_table('VENTA.DBF')]
+
+
+def test_mapping_plan_cache():
+    source = make_source()
+    backend = NativeBackend(source)
+    mapping_file = Path(tempfile.mkdtemp()) / 'mappings.json'
+    mapping_file.write_text(json.dumps({'VENTA.DBF': {'fields': FIELD_MAPPINGS}}))
+    field_types = backend.get_field_types('VENTA.DBF')
+
+    plan = MappingManager(str(mapping_file)).get_plan('VENTA.DBF', field_types)
+    records = backend.read_table('VENTA.DBF')
+    converter = DataConverter()
+    expected = converter.convert_batch(records, converter.compile_converters(FIELD_MAPPINGS, field_types))
+    assert plan.apply_batch(records) == expected
+    assert [plan.apply(r) for r in records] == expected
+
+    # Compiled once per mappings file version, shared by new managers
+    assert MappingManager(str(mapping_file)).get_plan('VENTA.DBF', field_types) is plan
+    mapping_file.write_text(json.dumps({'VENTA.DBF': {'fields': {'folio': FIELD_MAPPINGS['folio']}}}))
+    stat = mapping_file.stat()
+    os.utime(mapping_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    changed = MappingManager(str(mapping_file)).get_plan('VENTA.DBF', field_types)
+    assert changed is not plan and changed.apply(records[0]) == {'Folio': '000001'}
+
+
+def main():
+    test_number_conversion()
+    test_convert_batch_from_native_reader()
+    test_mapping_plan_cache()
+    print("Converter tests passed!")
+
+
+if __name__ == "__main__":
+    main()
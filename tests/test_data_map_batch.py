@@ -0,0 +1,78 @@
+import copy
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.db.velneo_mappings import VelneoMappings
+from src.utils.post_data_map import DataMap
+from tests.test_reference_cache import FakePool
+
+
+def make_mapper():
+    return DataMap(velneo_mappings=VelneoMappings({}, pool=FakePool()))
+
+
+def make_headers():
+    return [
+        {'Cabecera': 'DV', 'Folio': '000001', 'fpg': 'EF', 'og_folio': 'F1'},
+        {'Cabecera': 'DV', 'Folio': '000002', 'fpg': 'TC', 'og_folio': 'F9'},
+        {'Cabecera': 'DV', 'Folio': '000003', 'fpg': 'EF', 'og_folio': None},
+    ]
+
+
+def make_details():
+    return [{'REF': ref, 'iva_vta': iva} for ref, iva in [('A1', '16'), ('A2', '0'), ('A1', '16'), ('NOPE', '16')]]
+
+
+def make_receipts():
+    return [{'caja_bco': ref, 'importe': 10.5} for ref in ['EF', 'TC', 'EF']]
+
+
+def test_batch_matches_single_record():
+    data_mapper = make_mapper()
+    context = data_mapper.get_run_context('ROTON', 'XALAPA')
+    assert (context.ser, context.clt, context.alm, context.pai) == (31, 11, 21, 61)
+
+    for records, single, batch in [
+        (make_headers(), data_mapper.process_record_fac, data_mapper.process_batch_fac),
+        (make_details(), data_mapper.process_record_det, data_mapper.process_batch_det),
+        (make_receipts(), data_mapper.process_record_rec, data_mapper.process_batch_rec),
+    ]:
+        expected = [single(record, 'ROTON', 'XALAPA', context) for record in records]
+        mapped = copy.deepcopy(records)
+        batch(mapped, context)
+        assert mapped == expected
+
+    headers = make_headers()
+    data_mapper.process_batch_fac(headers, context)
+    assert [h['vta_fac_g'] for h in headers] == [501, 0, None]
+
+
+def test_batch_queries_per_distinct_key():
+    data_mapper = make_mapper()
+    context = data_mapper.get_run_context('ROTON', 'XALAPA')
+    pool = data_mapper.velneo_mappings.pool
+    queries = len(pool.queries)
+
+    details = [record for _ in range(50) for record in make_details()]
+    data_mapper.process_batch_det(details, context)
+    headers = [record for _ in range(50) for record in make_headers()]
+    data_mapper.process_batch_fac(headers, context)
+
+    # One bulk query for the articulos and one for the original folios, one
+    # load for the iva and metodo de pago tables, whatever the number of records
+    assert len(pool.queries) - queries == 4
+    assert details[0]['art'] == 1001 and details[-1]['art'] is None
+
+
+def main():
+    test_batch_matches_single_record()
+    test_batch_queries_per_distinct_key()
+    print("DataMap batch tests passed!")
+
+
+if __name__ == "__main__":
+    main()
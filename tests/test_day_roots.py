@@ -0,0 +1,133 @@
+import sys
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+import src.db.postgres_tracking as postgres_tracking
+from src.controllers.find_matches_process import MatchesProcess
+from src.utils.record_hash import dataset_hash, day_root, hash_records
+
+
+class FakeTracking:
+    """PostgresTracking keeping the hash_dia roots in memory."""
+
+    roots = {}
+    saved = []
+
+    def __init__(self, db_config):
+        pass
+
+    def get_day_roots(self, start_date, end_date):
+        return {day: root for day, (root, _) in self.roots.items() if start_date <= day <= end_date}
+
+    def save_day_roots(self, roots, stale_dates=()):
+        FakeTracking.saved.append((dict(roots), list(stale_dates)))
+        for day in stale_dates:
+            FakeTracking.roots.pop(day, None)
+        FakeTracking.roots.update(roots)
+        return True
+
+
+@contextmanager
+def fake_tracking():
+    """Use FakeTracking as PostgresTracking, restored afterwards."""
+    original = postgres_tracking.PostgresTracking
+    postgres_tracking.PostgresTracking = FakeTracking
+    FakeTracking.roots = {}
+    FakeTracking.saved = []
+    try:
+        yield
+    finally:
+        postgres_tracking.PostgresTracking = original
+
+
+def make_process():
+    process = MatchesProcess.__new__(MatchesProcess)
+    process.db_config = {}
+    return process
+
+
+def make_results(fechas, changed=()):
+    data = [
+        {'Folio': f"{i:06d}", 'fecha': fecha, 'total_bruto': 10.0 * i + (1 if i in changed else 0)}
+        for i, fecha in enumerate(fechas)
+    ]
+    hash_records(data, 2, False)
+    return {'data': data, 'dataset_hash': dataset_hash(data, 2), 'hash_version': 2, 'record_count': len(data)}
+
+
+def test_record_day_is_day_first():
+    assert MatchesProcess.get_record_day({'fecha': '30/04/2025 12:00:00 a. m.'}) == date(2025, 4, 30)
+    assert MatchesProcess.get_record_day({'fecha': '05/04/2025 03:15:00 p. m.'}) == date(2025, 4, 5)
+    assert MatchesProcess.get_record_day({'fecha': '05/04/2025'}) == date(2025, 4, 5)
+    assert MatchesProcess.get_record_day({'fecha': '2025-04-05'}) is None
+    assert MatchesProcess.get_record_day({}) is None
+
+
+def test_unchanged_days_skipped():
+    with fake_tracking():
+        process = make_process()
+        fechas = ['29/04/2025 10:00:00 a. m.', '30/04/2025 11:00:00 a. m.', '30/04/2025 01:00:00 p. m.']
+        start, end = date(2025, 4, 29), date(2025, 4, 30)
+
+        # First run, nothing stored, both days are compared and their roots saved
+        results = make_results(fechas)
+        day_roots = process.skip_unchanged_days(results, start, end)
+        assert sorted(day_roots) == [start, end]
+        assert day_roots[end] == (day_root({r['Folio']: r['md5_hash'] for r in results['data'][1:]}), 2)
+        process.save_day_roots(day_roots, {'api_operations': {}})
+        assert sorted(FakeTracking.roots) == [start, end]
+
+        # Second run, a folio of the 30th changed, only that day is left
+        results = make_results(fechas, changed=[2])
+        day_roots = process.skip_unchanged_days(results, start, end)
+        assert list(day_roots) == [end]
+        assert [r['Folio'] for r in results['data']] == ['000001', '000002']
+        assert results['record_count'] == 2
+        assert results['dataset_hash'] == dataset_hash(results['data'], 2)
+
+        # Its update makes the day stale, its root is dropped
+        update = {'folio': '000002', 'dbf_record': results['data'][1], 'sql_record': {'fecha_emision': end}}
+        process.save_day_roots(day_roots, {'api_operations': {'update': [update]}})
+        assert FakeTracking.saved[-1] == ({}, [end])
+        assert list(FakeTracking.roots) == [start]
+
+
+def test_unparseable_day_turns_roots_off():
+    with fake_tracking():
+        process = make_process()
+        FakeTracking.roots = {date(2025, 4, 30): (day_root({}), 0)}
+        results = make_results(['30/04/2025 10:00:00 a. m.', 'sin fecha'])
+
+        assert process.skip_unchanged_days(results, date(2025, 4, 30), date(2025, 4, 30)) is None
+        assert results['record_count'] == 2 and len(results['data']) == 2
+
+        # A record outside the range can't be placed either
+        results = make_results(['01/05/2025 10:00:00 a. m.'])
+        assert process.skip_unchanged_days(results, date(2025, 4, 30), date(2025, 4, 30)) is None
+
+
+def test_operation_without_day_saves_no_root():
+    with fake_tracking():
+        process = make_process()
+        day = date(2025, 4, 30)
+        day_roots = {day: (day_root({}), 0), date(2025, 5, 1): (day_root({}), 0)}
+        create = {'folio': '000009', 'dbf_record': {'Folio': '000009', 'fecha': 'sin fecha'}}
+        process.save_day_roots(day_roots, {'api_operations': {'create': [create]}})
+        assert FakeTracking.saved[-1] == ({}, sorted(day_roots))
+
+
+def main():
+    test_record_day_is_day_first()
+    test_unchanged_days_skipped()
+    test_unparseable_day_turns_roots_off()
+    test_operation_without_day_saves_no_root()
+    print("Day roots tests passed!")
+
+
+if __name__ == "__main__":
+    main()
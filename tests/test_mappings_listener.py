@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.db.velneo_mappings import VelneoMappings
+from tests.test_reference_cache import FakeCursor, FakePool, LOOKUP_TABLES, TABLES
+
+# Local Postgres the notification test runs against, skipped when unreachable
+TEST_DSN = os.environ.get('TEST_PG_DSN', 'dbname=postgres user=postgres host=localhost')
+TEST_SCHEMA = 'velneo_cache_test'
+
+
+def test_apply_invalidation():
+    mappings = VelneoMappings({}, pool=FakePool())
+    assert mappings.get_cliente() == 11
+    assert mappings.get_articulo('A1') == 1001
+    queries = len(mappings.pool.queries)
+
+    # Changed keys of a loaded table are queried again, the rest stays cached
+    TABLES['clientes'][0] = ('VTPUB', 13)
+    try:
+        mappings.apply_invalidation('clientes', [['VTPUB']])
+        assert mappings.get_cliente() == 13
+        assert mappings.lookup('clientes', 'OTRO') == 12
+        assert len(mappings.pool.queries) == queries + 1
+    finally:
+        TABLES['clientes'][0] = ('VTPUB', 11)
+
+    # Articulos are evicted and queried on their next lookup
+    mappings.apply_invalidation('articulos', [['A1']])
+    assert mappings.get_articulo('A1') == 1001
+    assert len(mappings.pool.queries) == queries + 2
+
+    # Tables not loaded yet are left alone, a TRUNCATE drops the table
+    mappings.apply_invalidation('pais', [['México']])
+    mappings.apply_invalidation('clientes', None)
+    assert len(mappings.pool.queries) == queries + 2
+    assert mappings.get_cliente() == 11
+    assert len(mappings.pool.queries) == queries + 3
+
+
+class BlockingPool(FakePool):
+    """FakePool whose first query of a table blocks once it has read the rows."""
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+        self.loading = threading.Event()
+        self.release = threading.Event()
+
+    def cursor(self):
+        pool = self
+        cursor = FakeCursor(self)
+
+        def execute(query, params=()):
+            FakeCursor.execute(cursor, query, params)
+            if f" FROM {pool.table}" in query and not pool.loading.is_set():
+                pool.loading.set()
+                pool.release.wait(5)
+        cursor.execute = execute
+        return cursor
+
+
+def invalidate_during_load(pool, load, table, keys, change):
+    """Run load() blocked on its query, send a change and its invalidation meanwhile."""
+    mappings = VelneoMappings({}, pool=pool)
+    loader = threading.Thread(target=load, args=(mappings,))
+    loader.start()
+    assert pool.loading.wait(5)
+
+    change()
+    notifier = threading.Thread(target=mappings.apply_invalidation, args=(table, keys))
+    notifier.start()
+    # The notification waits for the load instead of being dropped
+    notifier.join(0.2)
+    assert notifier.is_alive()
+
+    pool.release.set()
+    loader.join(5)
+    notifier.join(5)
+    assert not loader.is_alive() and not notifier.is_alive()
+    return mappings
+
+
+def test_invalidation_during_load():
+    def change_cliente():
+        TABLES['clientes'][0] = ('VTPUB', 13)
+
+    try:
+        mappings = invalidate_during_load(
+            BlockingPool('clientes'), lambda m: m.get_cliente(), 'clientes', [['VTPUB']], change_cliente
+        )
+        assert mappings.get_cliente() == 13
+    finally:
+        TABLES['clientes'][0] = ('VTPUB', 11)
+
+    def change_articulo():
+        LOOKUP_TABLES['articulos'][0] = ('A1', 1003)
+
+    try:
+        mappings = invalidate_during_load(
+            BlockingPool('articulos'), lambda m: m.prefetch_articulos(['A1', 'A2']), 'articulos', [['A1']],
+            change_articulo
+        )
+        assert mappings.get_articulo('A1') == 1003
+        assert mappings.get_articulo('A2') == 1002
+    finally:
+        LOOKUP_TABLES['articulos'][0] = ('A1', 1001)
+
+
+class LocalPool:
+    """Connections to the test schema of the local Postgres."""
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+
+    def get_connection(self):
+        import psycopg2
+        return psycopg2.connect(self.dsn, options=f"-c search_path={TEST_SCHEMA}")
+
+    def release_connection(self, conn):
+        conn.close()
+
+
+def wait_for(check, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if check():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_notify_roundtrip():
+    try:
+        import psycopg2
+        from src.db.mappings_listener import install_invalidation_triggers
+        conn = psycopg2.connect(TEST_DSN)
+    except Exception as e:
+        print(f"Local Postgres not available, skipping: {e}")
+        return
+
+    mappings = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+            cursor.execute(f"SET search_path = {TEST_SCHEMA}")
+            cursor.execute("CREATE TABLE clientes (pvsi_clave varchar(20), velneo integer)")
+            cursor.execute("CREATE TABLE articulos (pvsi_clave varchar(20), velneo_id integer)")
+            cursor.execute("INSERT INTO clientes VALUES ('VTPUB', 11)")
+        install_invalidation_triggers(conn, ['clientes', 'articulos'])
+
+        mappings = VelneoMappings({'dsn': TEST_DSN}, pool=LocalPool(TEST_DSN), listen=True)
+        assert mappings.listener is not None
+        assert mappings.get_cliente() == 11
+        assert mappings.get_articulo('A1') is None
+
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE clientes SET velneo = 12 WHERE pvsi_clave = 'VTPUB'")
+            cursor.execute("INSERT INTO articulos VALUES ('A1', 1001)")
+        conn.commit()
+
+        assert wait_for(lambda: mappings.lookup('clientes', 'VTPUB') == 12)
+        assert wait_for(lambda: mappings.get_articulo('A1') == 1001)
+
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE clientes")
+        conn.commit()
+        assert wait_for(lambda: mappings.get_cliente() is None)
+    finally:
+        if mappings is not None:
+            mappings.close()
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+def main():
+    test_apply_invalidation()
+    test_invalidation_during_load()
+    test_notify_roundtrip()
+    print("Mappings listener tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.utils.memory import MemoryGuard, get_rss_mb
+
+
+def test_rss_and_guard():
+    rss = get_rss_mb()
+    if rss is None:
+        print("Resident memory not available on this platform, skipping")
+        return
+    assert rss > 0
+
+    assert not MemoryGuard(None).exceeded()
+    assert not MemoryGuard(rss * 100).exceeded()
+    assert MemoryGuard(rss / 100).exceeded()
+
+
+def main():
+    test_rss_and_guard()
+    print("Memory tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import sys
+import struct
+import tempfile
+from pathlib import Path
+from datetime import date
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.native import NativeBackend
+
+
+def write_dbf(path, fields, rows, deleted=()):
+    """Write a minimal dBase III table.
+
+    Args:
+        path: Destination file
+        fields: List of (name, type, length, decimals)
+        rows: List of tuples with the already formatted field values
+        deleted: Indexes of rows flagged as deleted
+    """
+    record_length = 1 + sum(f[2] for f in fields)
+    header_length = 32 + 32 * len(fields) + 1
+    header = struct.pack('<BBBBIHH', 0x03, 125, 5, 5, len(rows), header_length, record_length)
+    header += b'\x00' * 17 + bytes([0x03]) + b'\x00' * 2
+
+    descriptors = b''
+    for name, field_type, length, decimals in fields:
+        descriptors += name.encode('ascii').ljust(11, b'\x00') + field_type.encode('ascii')
+        descriptors += b'\x00' * 4 + bytes([length, decimals]) + b'\x00' * 14
+
+    body = b''
+    for i, row in enumerate(rows):
+        body += b'*' if i in deleted else b' '
+        for (name, field_type, length, decimals), value in zip(fields, row):
+            text = str(value).encode('cp1252')
+            body += text.rjust(length) if field_type == 'N' else text.ljust(length)
+
+    with open(path, 'wb') as f:
+        f.write(header + descriptors + b'\x0D' + body + b'\x1A')
+
+
+VENTA_FIELDS = [
+    ('TIPO_DOC', 'C', 2, 0),
+    ('NO_REFEREN', 'C', 6, 0),
+    ('F_EMISION', 'D', 8, 0),
+    ('TOTAL_BRUT', 'N', 12, 2),
+]
+
+VENTA_ROWS = [
+    ('DV', '000001', '20250504', '100.50'),
+    ('DV', '000002', '20250505', '20.00'),
+    ('FA', '000003', '20250505', '7.25'),
+    ('DV', '000004', '20250506', ''),
+    ('DV', '000005', '20250505', '1.00'),
+]
+
+
+def make_source():
+    source = tempfile.mkdtemp()
+    write_dbf(Path(source) / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS, deleted={4})
+    return source
+
+
+def test_decode_records():
+    backend = NativeBackend(make_source())
+    records = backend.read_table('VENTA.DBF')
+
+    assert len(records) == 4  # deleted record is skipped
+    assert records[0] == {
+        'TIPO_DOC': 'DV',
+        'NO_REFEREN': '000001',
+        'F_EMISION': '04/05/2025 12:00:00 a. m.',
+        'TOTAL_BRUT': '100.50',
+    }
+    assert records[3]['TOTAL_BRUT'] == ''
+
+
+def test_range_filter_and_limit():
+    backend = NativeBackend(make_source())
+    filters = [{
+        'field': 'F_EMISION',
+        'operator': 'range',
+        'from_value': date(2025, 5, 5).strftime("%m-%d-%Y"),
+        'to_value': date(2025, 5, 6).strftime("%m-%d-%Y"),
+    }]
+
+    records = backend.read_table('venta', 0, filters)
+    assert [r['NO_REFEREN'] for r in records] == ['000002', '000003', '000004']
+
+    records = backend.read_table('venta', 2, filters)
+    assert len(records) == 2
+
+
+def test_or_filters_on_same_field():
+    backend = NativeBackend(make_source())
+    filters = [
+        {'field': 'NO_REFEREN', 'operator': '=', 'value': '000001'},
+        {'field': 'NO_REFEREN', 'operator': '=', 'value': '000003'},
+    ]
+
+    records = backend.read_table('VENTA.DBF', 0, filters)
+    assert [r['NO_REFEREN'] for r in records] == ['000001', '000003']
+
+
+def test_buffered_scan_matches_mmap():
+    source = make_source()
+    filters = [{'field': 'TIPO_DOC', 'operator': '=', 'value': 'DV'}]
+
+    mapped = NativeBackend(source, scan_mode='mmap').read_table('VENTA.DBF', 0, filters)
+    buffered = NativeBackend(source, scan_mode='buffered').read_table('VENTA.DBF', 0, filters)
+    assert mapped == buffered
+    assert len(mapped) == 3
+
+
+def test_record_views_decode_lazily():
+    backend = NativeBackend(make_source())
+    table = backend.open_table('VENTA.DBF')
+
+    folios = [view['NO_REFEREN'] for view in table.iter_records(show_deleted=True)]
+    assert folios == ['000001', '000002', '000003', '000004', '000005']
+
+
+def test_column_projection():
+    backend = NativeBackend(make_source())
+
+    records = backend.read_table('VENTA.DBF', 1, None, ['NO_REFEREN', 'TOTAL_BRUT', 'MISSING'])
+    assert records == [{'NO_REFEREN': '000001', 'TOTAL_BRUT': '100.50'}]
+
+
+def test_in_filter():
+    backend = NativeBackend(make_source())
+    filters = [{'field': 'NO_REFEREN', 'operator': 'in', 'values': ['000004', '000002', '999999']}]
+
+    records = backend.read_table('VENTA.DBF', 0, filters)
+    assert [r['NO_REFEREN'] for r in records] == ['000002', '000004']
+
+
+def test_session_reuses_tables():
+    source = make_source()
+    backend = NativeBackend(source)
+
+    backend.open_session()
+    try:
+        table = backend.open_table('VENTA.DBF')
+        assert backend.open_table('venta') is table
+        assert len(backend.read_table('VENTA.DBF')) == 4
+
+        # A modified file is parsed again
+        write_dbf(Path(source) / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS[:2])
+        assert backend.open_table('VENTA.DBF') is not table
+        assert len(backend.read_table('VENTA.DBF')) == 2
+    finally:
+        backend.close_session()
+
+    assert backend.open_table('VENTA.DBF') is not backend.open_table('VENTA.DBF')
+
+
+def main():
+    test_decode_records()
+    test_range_filter_and_limit()
+    test_or_filters_on_same_field()
+    test_buffered_scan_matches_mmap()
+    test_record_views_decode_lazily()
+    test_column_projection()
+    test_in_filter()
+    test_session_reuses_tables()
+    print("Native reader tests passed!")
+
+
+if __name__ == "__main__":
+    main()
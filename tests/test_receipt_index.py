@@ -0,0 +1,61 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from tests.bench_receipts_join import make_controller, make_data
+
+
+def make_counting_controller(receipt_tables):
+    """Controller whose receipt tables are the given records, counting the reads."""
+    controller = make_controller()
+    tables = dict(receipt_tables)
+    controller.reads = []
+
+    def read_receipts_table(dbf_name, start_date, end_date, refs=None):
+        controller.reads.append(dbf_name)
+        records = tables[dbf_name]
+        if refs is not None:
+            records = [record for record in records if str(record.get('REF_NUM')) in refs]
+        return dbf_name, records
+
+    controller._read_receipts_table = read_receipts_table
+    controller._get_details_for_folios = lambda folios: {}
+    return controller
+
+
+def test_parts_share_one_read():
+    reference_records, receipt_tables = make_data(40, 30)
+    controller = make_counting_controller(receipt_tables)
+    window = (date(2025, 5, 1), date(2025, 5, 31))
+
+    receipt_index = controller.get_receipt_index(*window)
+    assert controller.reads == ['FLUJORES.DBF', 'FLUJO01.DBF']
+
+    # Every part of the window gets the receipts a read of its own would find
+    for part in (reference_records[:15], reference_records[15:]):
+        headers = [{'Folio': ref['folio'], 'ref_recibo': ref['ref_recibo']} for ref in part]
+        _, from_index = controller._get_headers_related(headers, *window, receipt_index)
+        assert from_index == controller._match_receipts(part, receipt_tables)
+        assert any(from_index.values())
+    assert controller.reads == ['FLUJORES.DBF', 'FLUJO01.DBF']
+
+    # Folios sharing a receipt don't share its record, nor the index's
+    shared = [{'ref_recibo': '100000', 'folio': 'X1'}, {'ref_recibo': '100000', 'folio': 'X2'}]
+    matched = controller._receipts_by_folio(shared, receipt_index)
+    field = next(iter(matched['X1'][0]))
+    matched['X1'][0][field] = 'changed'
+    assert matched['X2'][0][field] != 'changed'
+    assert all(receipt[field] != 'changed' for receipt in receipt_index['100000'])
+
+
+def main():
+    test_parts_share_one_read()
+    print("Receipt index tests passed!")
+
+
+if __name__ == "__main__":
+    main()
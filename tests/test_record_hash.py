@@ -0,0 +1,88 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.utils.record_hash import dataset_hash, day_root, hash_records, matches_stored, record_hash
+
+
+def make_records():
+    return [
+        {
+            'Folio': f"{i:06d}",
+            'fecha': '05/05/2025 12:00:00 a. m.',
+            'total_bruto': 100.5 * i,
+            'detalles': [{'articulo': 'A1', 'cantidad': i, 'precio': 10.5}],
+            'recibos': [],
+        }
+        for i in range(3)
+    ]
+
+
+def test_legacy_version():
+    records = make_records()
+    expected = [hashlib.md5(json.dumps(r, sort_keys=True).encode('utf-8')).hexdigest() for r in records]
+    expected_dataset = hashlib.md5(json.dumps(records, sort_keys=True).encode('utf-8')).hexdigest()
+
+    hash_records(records, version=1, keep_legacy=True)
+    assert [r['md5_hash'] for r in records] == expected
+    assert all('legacy_hash' not in r for r in records)
+
+    # The dataset hash of version 1 is still taken over the records without their hashes
+    assert dataset_hash([{k: v for k, v in r.items() if k != 'md5_hash'} for r in records], 1) == expected_dataset
+
+
+def test_current_version():
+    records = make_records()
+    legacy = [hashlib.md5(json.dumps(r, sort_keys=True).encode('utf-8')).hexdigest() for r in records]
+    hash_records(records, version=2, keep_legacy=True)
+
+    assert all(len(r['md5_hash']) == 32 for r in records)
+    assert [r['legacy_hash'] for r in records] == legacy
+    assert matches_stored(records[0], legacy[0])
+    assert matches_stored(records[0], records[0]['md5_hash'])
+    assert not matches_stored(records[0], legacy[1])
+    assert not matches_stored(records[0], None)
+
+    # Independent of the key order, sensitive to the values
+    reordered = dict(reversed(list(make_records()[1].items())))
+    assert record_hash(reordered) == records[1]['md5_hash']
+    changed = make_records()[1]
+    changed['detalles'][0]['cantidad'] = 2
+    assert record_hash(changed) != records[1]['md5_hash']
+
+    # The dataset hash follows the record hashes and their order
+    assert len(dataset_hash(records)) == 32
+    assert dataset_hash(records) != dataset_hash(list(reversed(records)))
+
+    try:
+        record_hash(records[0], version=3)
+        assert False, "Unknown versions must be rejected"
+    except ValueError:
+        pass
+
+
+def test_day_root():
+    records = make_records()
+    hash_records(records)
+    folios = {r['Folio']: r['md5_hash'] for r in records}
+
+    assert day_root(folios) == day_root(dict(reversed(list(folios.items()))))
+    assert day_root(folios) != day_root({**folios, '000000': records[1]['md5_hash']})
+    assert day_root(folios) != day_root({k: v for k, v in folios.items() if k != '000002'})
+    assert day_root({}) == day_root({}) and len(day_root({})) == 32
+
+
+def main():
+    test_legacy_version()
+    test_current_version()
+    test_day_root()
+    print("Record hash tests passed!")
+
+
+if __name__ == "__main__":
+    main()
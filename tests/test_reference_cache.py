@@ -0,0 +1,170 @@
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.db.velneo_mappings import VelneoMappings
+
+TABLES = {
+    'clientes': [('VTPUB', 11), ('OTRO', 12)],
+    'almacen': [('ROTON', 'XALAPA', 21), ('ROTON', 'XALAPA', 22), ('CENTRO', 'XALAPA', 23)],
+    'general_misc': [('serie', 31), ('empresa', 32), ('division', 33)],
+    'metodo_pago': [('EF', 41)],
+    'vendedores': [('1', 51)],
+    'pais': [('México', 61)],
+    'iva': [('16', 71)],
+    'caja_banco': [('EF', 81)],
+    'forma_pago': [('EF', 91)],
+    'forma_pago_caja_banco': [('EF', 101), ('default_value', 100)],
+}
+# Queried by key, never loaded whole
+LOOKUP_TABLES = {
+    'articulos': [('A1', 1001), ('A2', 1002)],
+    'estado_factura_venta': [('F1', 501), ('F2', 502)],
+}
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.pool.queries.append(query)
+        if 'pg_stat_user_tables' in query:
+            self.rows = [(name,) + counters for name, counters in self.pool.counters.items()]
+            return
+        table = query.split(' FROM ')[1].split()[0].split('.')[-1]
+        rows = TABLES.get(table) or LOOKUP_TABLES[table]
+        if 'ANY' in query:
+            # Bulk lookup, the key and value of the matching rows
+            self.rows = [(row[0], row[-1]) for row in rows if row[0] in params[0]]
+        elif ' WHERE ' in query:
+            # Single key lookup, the value of the first matching row
+            self.rows = [(row[-1],) for row in rows if row[:len(params)] == tuple(params)][:1]
+        else:
+            self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.queries = []
+        # pg_stat_user_tables (n_tup_ins, n_tup_upd, n_tup_del) of the reference tables
+        self.counters = {name: (len(rows), 0, 0) for name, rows in TABLES.items()}
+
+    def get_connection(self):
+        return self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def release_connection(self, conn):
+        pass
+
+
+def make_mappings(articulo_cache_size=2):
+    return VelneoMappings({}, articulo_cache_size=articulo_cache_size, pool=FakePool())
+
+
+def test_reference_tables_loaded_once():
+    mappings = make_mappings()
+    for _ in range(3):
+        assert mappings.get_cliente() == 11
+        assert mappings.get_from_general_serie() == 31
+        assert mappings.get_from_general_emp() == 32
+        assert mappings.get_from_general_div() == 33
+        assert mappings.get_vendedor(1) == 51
+        assert mappings.get_pais('México') == 61
+        assert mappings.get_metodo_pago('EF') == 41
+        assert mappings.get_tipo_iva('16') == 71
+    # One query per table, general_misc shared by serie, empresa and division
+    assert len(mappings.pool.queries) == 6
+
+    # The first row of a repeated key wins, as with LIMIT 1
+    assert mappings.get_from_general_alm('ROTON', 'XALAPA') == 21
+    assert mappings.get_from_general_alm('ROTON', 'PUEBLA') is None
+
+
+def test_forma_pago_caja_banco_default():
+    mappings = make_mappings()
+    assert mappings.get_forma_pago_caja_banco('EF') == 101
+    assert mappings.get_forma_pago_caja_banco('TC') == 100
+    assert mappings.get_caja_banco('EF') == 81 and mappings.get_forma_pago('EF') == 91
+
+
+def test_articulo_lru():
+    mappings = make_mappings(articulo_cache_size=2)
+    assert mappings.get_articulo('A1') == 1001
+    assert mappings.get_articulo('A1') == 1001
+    assert mappings.get_articulo('NOPE') is None
+    assert mappings.get_articulo('NOPE') is None
+    assert len(mappings.pool.queries) == 2
+
+    # Evicted once over the bound, queried again
+    mappings.get_articulo('B2')
+    mappings.get_articulo('A1')
+    assert len(mappings.pool.queries) == 4
+
+    mappings.invalidate()
+    mappings.get_articulo('A1')
+    assert len(mappings.pool.queries) == 5
+
+
+def test_articulo_prefetch():
+    mappings = make_mappings()
+    assert mappings.prefetch_articulos(['A1', 'A2', 'A1', 'NOPE', None, '']) == 2
+    assert len(mappings.pool.queries) == 1
+
+    assert mappings.get_articulo('A1') == 1001
+    assert mappings.get_articulo('A2') == 1002
+    assert mappings.get_articulo('NOPE') is None
+    assert len(mappings.pool.queries) == 1
+
+    # Only the references not resolved yet are queried
+    assert mappings.prefetch_articulos(['A1', 'NOPE']) == 0
+    assert len(mappings.pool.queries) == 1
+    assert mappings.get_articulo('OTHER') is None
+    assert len(mappings.pool.queries) == 2
+
+
+def test_keys_match_exactly():
+    # Padding is significant, as with the WHERE col = %s of the varchar columns
+    TABLES['metodo_pago'].append(('EF ', 42))
+    try:
+        mappings = make_mappings()
+        assert mappings.get_metodo_pago('EF') == 41
+        assert mappings.get_metodo_pago('EF ') == 42
+        assert mappings.get_metodo_pago(' EF') is None
+        assert mappings.get_caja_banco('EF ') is None
+    finally:
+        TABLES['metodo_pago'].pop()
+
+    mappings = make_mappings()
+    assert mappings.get_articulo('A1 ') is None
+    mappings.prefetch_articulos(['A2 '])
+    assert mappings.get_articulo('A2 ') is None
+    assert mappings.get_articulo('A2') == 1002
+
+
+def main():
+    test_reference_tables_loaded_once()
+    test_forma_pago_caja_banco_default()
+    test_articulo_lru()
+    test_articulo_prefetch()
+    test_keys_match_exactly()
+    print("Reference cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.db import reference_snapshot
+from src.db.reference_snapshot import ReferenceSnapshot
+from src.db.velneo_mappings import VelneoMappings
+from tests.test_reference_cache import FakePool
+
+
+def table_queries(pool):
+    return [query for query in pool.queries if 'pg_stat_user_tables' not in query]
+
+
+def test_snapshot_roundtrip():
+    path = Path(tempfile.mkdtemp()) / 'snapshot.db'
+    snapshot = ReferenceSnapshot(str(path))
+    assert snapshot.load() is None
+
+    tables = {'clientes': {'VTPUB': 11}, 'almacen': {('ROTON', 'XALAPA'): 21}}
+    assert snapshot.save(tables, 'marker-1')
+    assert snapshot.load('marker-1') == tables
+    assert snapshot.load() == tables
+    assert snapshot.load('marker-2') is None
+
+    # Snapshots of another layout version are ignored
+    version = reference_snapshot.SNAPSHOT_VERSION
+    reference_snapshot.SNAPSHOT_VERSION = version + 1
+    try:
+        assert snapshot.load('marker-1') is None
+    finally:
+        reference_snapshot.SNAPSHOT_VERSION = version
+
+
+def test_cold_start_from_snapshot():
+    path = str(Path(tempfile.mkdtemp()) / 'snapshot.db')
+
+    # No snapshot yet: read from Postgres, the snapshot is written in the background
+    first = VelneoMappings({}, pool=FakePool(), snapshot_path=path)
+    first._snapshot_thread.join(10)
+    assert first.get_cliente() == 11
+    assert len(table_queries(first.pool)) == len(ReferenceSnapshot(path).load())
+
+    # Tables unchanged: started from the snapshot, no table is queried
+    second = VelneoMappings({}, pool=FakePool(), snapshot_path=path)
+    assert second._snapshot_thread is None
+    assert second.get_cliente() == 11
+    assert second.get_from_general_alm('ROTON', 'XALAPA') == 21
+    assert second.get_forma_pago_caja_banco('TC') == 100
+    assert table_queries(second.pool) == []
+
+    # A counter moved: the tables are read again
+    pool = FakePool()
+    pool.counters['clientes'] = (2, 1, 0)
+    third = VelneoMappings({}, pool=pool, snapshot_path=path)
+    third._snapshot_thread.join(10)
+    assert third.get_cliente() == 11
+    assert table_queries(pool)
+
+
+def main():
+    test_snapshot_roundtrip()
+    test_cold_start_from_snapshot()
+    print("Reference snapshot tests passed!")
+
+
+if __name__ == "__main__":
+    main()
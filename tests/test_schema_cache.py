@@ -0,0 +1,70 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.mapping_manager import MappingManager
+from src.dbf_enc_reader.native import NativeBackend
+from src.dbf_enc_reader.schema import SchemaCache, schema_cache
+from tests.test_native_reader import write_dbf, make_source, VENTA_FIELDS, VENTA_ROWS
+
+
+def test_schema_layout():
+    source = make_source()
+    schema = schema_cache.get(Path(source) / 'VENTA.DBF')
+    assert schema.names == ['TIPO_DOC', 'NO_REFEREN', 'F_EMISION', 'TOTAL_BRUT']
+    assert schema.field_types == {'TIPO_DOC': 'C', 'NO_REFEREN': 'C', 'F_EMISION': 'D', 'TOTAL_BRUT': 'N'}
+    assert [f.offset for f in schema.fields] == [1, 3, 9, 17]
+    assert schema.record_length == 29 and schema.record_count == 5
+
+    backend = NativeBackend(source)
+    assert backend.get_schema('venta') is schema
+    assert backend.open_table('VENTA.DBF').schema is schema
+    assert [f.name for f in schema.project(['total_brut', 'TIPO_DOC', 'OTHER'])] == ['TIPO_DOC', 'TOTAL_BRUT']
+
+
+def test_cache_invalidation():
+    source = make_source()
+    path = Path(source) / 'VENTA.DBF'
+    cache = SchemaCache()
+    schema = cache.get(path)
+    assert cache.get(path) is schema
+    assert schema.derived('columns', lambda: ['built']) == ['built']
+    assert schema.derived('columns', lambda: ['rebuilt']) == ['built']
+
+    # A rewritten table gets a new schema, and loses what was derived from the old one
+    write_dbf(path, VENTA_FIELDS[:2], [row[:2] for row in VENTA_ROWS])
+    changed = cache.get(path)
+    assert changed is not schema and changed.names == ['TIPO_DOC', 'NO_REFEREN']
+    assert changed.get_derived('columns') is None
+
+
+def test_mapping_validation():
+    source = make_source()
+    mapping_file = Path(tempfile.mkdtemp()) / 'mappings.json'
+    mapping_file.write_text(json.dumps({'VENTA.DBF': {'fields': {
+        'Folio': {'dbf': 'NO_REFEREN', 'type': 'string'},
+        'Total': {'dbf': 'TOTAL_BRUT', 'type': 'number'},
+        'Cliente': {'dbf': 'CVE_CLIENT', 'type': 'string'},
+    }}}))
+    manager = MappingManager(str(mapping_file))
+    schema = NativeBackend(source).get_schema('VENTA.DBF')
+
+    assert manager.validate_fields('VENTA.DBF', schema) == ['CVE_CLIENT']
+    assert manager.get_dbf_fields('VENTA.DBF', schema) == ['NO_REFEREN', 'TOTAL_BRUT']
+    assert manager.get_dbf_fields('VENTA.DBF') == ['NO_REFEREN', 'TOTAL_BRUT', 'CVE_CLIENT']
+
+
+def main():
+    test_schema_layout()
+    test_cache_invalidation()
+    test_mapping_validation()
+    print("Schema cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
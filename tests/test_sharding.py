@@ -0,0 +1,105 @@
+import multiprocessing
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+import src.controllers.main_workflow as main_workflow
+from src.controllers.main_workflow import add_to_totals, new_totals, run_shard
+
+# Operations each day compares to, folio 'B' shows up in both days
+SHARD_OPERATIONS = {
+    date(2025, 4, 29): {'create': ['A', 'B'], 'update': [], 'delete': []},
+    date(2025, 4, 30): {'create': ['B'], 'update': ['C'], 'delete': ['D']},
+}
+
+
+class FakeMatchesProcess:
+    def compare_range(self, config, start_date, end_date, scope=None, receipt_range=None, receipt_index=None):
+        operations = {
+            name: [{'folio': folio, 'dbf_record': {'Folio': folio}} for folio in folios]
+            for name, folios in SHARD_OPERATIONS[start_date].items()
+        }
+        return {
+            'api_operations': operations,
+            'summary': {
+                'matching_count': 5,
+                'create_count': len(operations['create']),
+                'update_count': len(operations['update']),
+                'delete_count': len(operations['delete']),
+                'total_actions_needed': sum(len(ops) for ops in operations.values()),
+            },
+        }
+
+
+class FakeOP:
+    sent = []
+    lock = threading.Lock()
+
+    def execute(self, operations):
+        with FakeOP.lock:
+            for name, ops in operations.items():
+                FakeOP.sent.extend((name, op['folio']) for op in ops)
+
+
+def run_shards():
+    """Run the shards of SHARD_OPERATIONS concurrently on shared claims.
+
+    Returns:
+        Tuple of (totals by day, folio -> owning shard)
+    """
+    with multiprocessing.Manager() as manager:
+        claims = manager.dict()
+        results = {}
+
+        def shard(day):
+            results[day] = run_shard({}, day, None, (date(2025, 4, 29), date(2025, 4, 30)), claims)
+
+        threads = [threading.Thread(target=shard, args=(day,)) for day in SHARD_OPERATIONS]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, dict(claims)
+
+
+def test_folio_sent_by_one_shard():
+    original = main_workflow.MatchesProcess, main_workflow.OP
+    main_workflow.MatchesProcess, main_workflow.OP = FakeMatchesProcess, FakeOP
+    FakeOP.sent = []
+    try:
+        results, owners = run_shards()
+    finally:
+        main_workflow.MatchesProcess, main_workflow.OP = original
+
+    # 'B' is claimed by one shard and sent once, by that shard
+    assert sorted(FakeOP.sent) == [('create', 'A'), ('create', 'B'), ('delete', 'D'), ('update', 'C')]
+    assert owners == {'A': '2025-04-29', 'B': owners['B'], 'C': '2025-04-30', 'D': '2025-04-30'}
+    owner = date.fromisoformat(owners['B'])
+    assert [o['folio'] for o in results[owner]['api_operations']['create']].count('B') == 1
+    other = next(day for day in SHARD_OPERATIONS if day != owner)
+    assert 'B' not in [o['folio'] for o in results[other]['api_operations']['create']]
+
+    # The merged totals count each folio once
+    totals = new_totals()
+    for result in results.values():
+        add_to_totals(totals, result)
+    assert sorted(o['folio'] for o in totals['api_operations']['create']) == ['A', 'B']
+    assert [o['folio'] for o in totals['api_operations']['update']] == ['C']
+    assert [o['folio'] for o in totals['api_operations']['delete']] == ['D']
+    assert totals['summary'] == {
+        'create_count': 2, 'update_count': 1, 'delete_count': 1, 'total_actions_needed': 4,
+    }
+
+
+def main():
+    test_folio_sent_by_one_shard()
+    print("Sharding tests passed!")
+
+
+if __name__ == "__main__":
+    main()
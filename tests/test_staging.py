@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.native import NativeBackend
+from src.dbf_enc_reader.staging import StagingArea
+from tests.test_native_reader import write_dbf, VENTA_FIELDS, VENTA_ROWS
+
+
+def test_stage_tables():
+    source = Path(tempfile.mkdtemp())
+    staging_dir = Path(tempfile.mkdtemp()) / 'staging'
+    write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS)
+    (source / 'venta.cdx').write_bytes(b'index')
+    (source / 'OTHER.DBF').write_bytes(b'not staged')
+
+    staging = StagingArea(str(source), str(staging_dir))
+    data_source = staging.stage(['VENTA.DBF'])
+    assert sorted(p.name for p in staging_dir.iterdir()) == ['VENTA.DBF', 'venta.cdx']
+    assert (staging_dir / 'VENTA.DBF').read_bytes() == (source / 'VENTA.DBF').read_bytes()
+
+    folios = [r['NO_REFEREN'] for r in NativeBackend(data_source).iter_table('VENTA.DBF', fields=['NO_REFEREN'])]
+    assert folios == ['000001', '000002', '000003', '000004', '000005']
+
+    # Unchanged files are not copied again, changed ones are
+    assert set(staging.stage_table('VENTA.DBF').values()) == {'unchanged'}
+    write_dbf(source / 'VENTA.DBF', VENTA_FIELDS, VENTA_ROWS[:2])
+    stat = (source / 'VENTA.DBF').stat()
+    os.utime(source / 'VENTA.DBF', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    staged = staging.stage_table('VENTA.DBF')
+    assert staged['venta.cdx'] == 'unchanged' and staged['VENTA.DBF'] in ('reflink', 'copy')
+    assert (staging_dir / 'VENTA.DBF').read_bytes() == (source / 'VENTA.DBF').read_bytes()
+
+
+def test_missing_table():
+    staging = StagingArea(tempfile.mkdtemp(), tempfile.mkdtemp())
+    try:
+        staging.stage(['VENTA.DBF'])
+        assert False, "Expected FileNotFoundError"
+    except FileNotFoundError:
+        pass
+
+
+def main():
+    test_stage_tables()
+    test_missing_table()
+    print("Staging tests passed!")
+
+
+if __name__ == "__main__":
+    main()